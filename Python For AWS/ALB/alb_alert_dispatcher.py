@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+ALB Alert Dispatcher
+
+Coalescing, rate-limited SNS alert pipeline for alb_health_check_monitor.
+Target health events are grouped by target group into incident windows; an event
+that repeats a target's last alerted state within an incident is suppressed, while
+a genuine change (unhealthy again after recovering) is always sent. Each flush turns the pending events
+into one message per target group, split to fit the SNS message size limit, and sends
+them through publish_batch (up to 10 messages per call) under a token-bucket rate limit.
+
+Use Cases:
+- Keeping SNS publish volume flat during large outages
+- Deduplicating repeated alerts for flapping targets
+"""
+
+import time
+from datetime import datetime
+from typing import List, Dict, Optional
+from alb_fanout import TokenBucket, call_with_backoff
+
+# SNS limits
+SNS_MAX_MESSAGE_BYTES = 256 * 1024  # Per message and per publish_batch request
+SNS_MAX_BATCH_ENTRIES = 10
+SNS_MAX_SUBJECT_LENGTH = 100
+
+DEFAULT_INCIDENT_WINDOW = 900  # Seconds an incident stays open after its first event
+DEFAULT_PUBLISH_RATE = 1.0  # publish_batch calls per second
+
+# Headroom for the part suffix and batch entry overhead
+_MESSAGE_OVERHEAD_BYTES = 1024
+
+class AlertDispatcher:
+    """
+    Groups health transition events into per-target-group incidents and publishes
+    them to SNS in batches.
+    
+    submit() queues events; flush() publishes everything pending. Counters:
+    events_submitted, events_suppressed, messages_published, batches_sent, publish_failures.
+    """
+    
+    def __init__(self, sns_client, topic_arn: str,
+                 incident_window: int = DEFAULT_INCIDENT_WINDOW,
+                 max_rate: float = DEFAULT_PUBLISH_RATE,
+                 max_message_bytes: int = SNS_MAX_MESSAGE_BYTES):
+        self.sns_client = sns_client
+        self.topic_arn = topic_arn
+        self.incident_window = incident_window
+        self.max_message_bytes = max_message_bytes
+        self.rate_limiter = TokenBucket(max_rate, max(1, int(max_rate)), min_rate=min(max_rate, 0.1))
+        self.events_submitted = 0
+        self.events_suppressed = 0
+        self.messages_published = 0
+        self.batches_sent = 0
+        self.publish_failures = 0
+        self._incidents = {}  # target group ARN -> {'started', 'last_kind', 'pending', 'name'}
+    
+    def submit(self, events: List[Dict], now: Optional[float] = None):
+        """
+        Queue transition events (see diff_health_snapshots) for the next flush.
+        
+        Args:
+            events: Transition dictionaries with kind, target_group_arn, target_id, port
+            now: Current epoch time (default: now)
+        """
+        now = time.time() if now is None else now
+        for event in events:
+            self.events_submitted += 1
+            incident = self._incidents.get(event['target_group_arn'])
+            if incident is None or now - incident['started'] >= self.incident_window:
+                incident = {'started': now, 'last_kind': {}, 'pending': [],
+                            'name': event['target_group_name']}
+                self._incidents[event['target_group_arn']] = incident
+            
+            # Only repeats of the target's current alerted state are suppressed
+            target = (event['target_id'], event['port'])
+            if incident['last_kind'].get(target) == event['kind']:
+                self.events_suppressed += 1
+                continue
+            incident['last_kind'][target] = event['kind']
+            incident['pending'].append(event)
+    
+    def _format_messages(self, target_group_name: str, started: float, events: List[Dict]) -> List[Dict]:
+        """
+        Format one incident's pending events into SNS batch entries within the size limit.
+        """
+        unhealthy = [e for e in events if e['kind'] == 'unhealthy']
+        recovered = [e for e in events if e['kind'] != 'unhealthy']
+        header = (f"ALB health incident for {target_group_name} "
+                  f"(opened {datetime.fromtimestamp(started).strftime('%Y-%m-%d %H:%M:%S')})")
+        lines = []
+        for title, group in [('NEWLY UNHEALTHY', unhealthy), ('RECOVERED', recovered)]:
+            if not group:
+                continue
+            lines.append(f"{title} ({len(group)}):")
+            for event in group:
+                lines.append(f"  - {event['target_id']}:{event['port']} "
+                             f"{event['from_state']} -> {event['to_state']} ({event['reason']})")
+        
+        limit = self.max_message_bytes - _MESSAGE_OVERHEAD_BYTES
+        chunks = [[header, ""]]
+        size = len(header.encode('utf-8')) + 1
+        for line in lines:
+            line_size = len(line.encode('utf-8')) + 1
+            if size + line_size > limit and len(chunks[-1]) > 2:
+                chunks.append([header, ""])
+                size = len(header.encode('utf-8')) + 1
+            chunks[-1].append(line[:limit])
+            size += line_size
+        
+        subject = f"ALB Health Alert - {target_group_name} - {len(unhealthy)} unhealthy, {len(recovered)} recovered"
+        messages = []
+        for index, chunk in enumerate(chunks, 1):
+            part = f" ({index}/{len(chunks)})" if len(chunks) > 1 else ""
+            messages.append({
+                'Subject': subject[:SNS_MAX_SUBJECT_LENGTH - len(part)] + part,
+                'Message': "\n".join(chunk)
+            })
+        return messages
+    
+    def _batches(self, messages: List[Dict]) -> List[List[Dict]]:
+        """
+        Pack messages into publish_batch requests by entry count and total size.
+        """
+        batches = [[]]
+        size = 0
+        for message in messages:
+            message_size = len(message['Message'].encode('utf-8')) + len(message['Subject'])
+            if batches[-1] and (len(batches[-1]) == SNS_MAX_BATCH_ENTRIES or
+                                size + message_size > self.max_message_bytes):
+                batches.append([])
+                size = 0
+            batches[-1].append(message)
+            size += message_size
+        return [batch for batch in batches if batch]
+    
+    def flush(self) -> int:
+        """
+        Publish all pending events.
+        
+        Returns:
+            Number of messages published successfully
+        """
+        messages = []
+        now = time.time()
+        for tg_arn, incident in list(self._incidents.items()):
+            if incident['pending']:
+                messages += self._format_messages(incident['name'], incident['started'], incident['pending'])
+                incident['pending'] = []
+            elif now - incident['started'] >= self.incident_window:
+                del self._incidents[tg_arn]
+        
+        published = 0
+        for batch in self._batches(messages):
+            entries = [dict(message, Id=str(index)) for index, message in enumerate(batch)]
+            try:
+                response = call_with_backoff(
+                    lambda e: self.sns_client.publish_batch(TopicArn=self.topic_arn, PublishBatchRequestEntries=e),
+                    entries, self.rate_limiter
+                )
+            except Exception as e:
+                print(f"Error sending SNS notification batch: {str(e)}")
+                self.publish_failures += len(entries)
+                continue
+            self.batches_sent += 1
+            for failure in response.get('Failed', []):
+                print(f"Error sending SNS notification: {failure.get('Code')} {failure.get('Message', '')}")
+            failed = len(response.get('Failed', []))
+            self.publish_failures += failed
+            published += len(entries) - failed
+        
+        self.messages_published += published
+        if published:
+            print(f"Published {published} alert message(s) to {self.topic_arn}")
+        return published
+    
+    def summary(self) -> str:
+        """
+        Format the dispatcher counters as a one-line summary.
+        """
+        return (f"{self.events_submitted} alert event(s), {self.events_suppressed} suppressed, "
+                f"{self.messages_published} message(s) in {self.batches_sent} batch(es), "
+                f"{self.publish_failures} failed")
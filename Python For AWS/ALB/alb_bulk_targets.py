@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+ALB Bulk Target Operations
+
+Registers or deregisters thousands of targets across many target groups from a CSV
+or JSON Lines file. Targets are chunked to the per-call limit, target groups are
+processed in parallel (chunks of one group run in order), and every call goes through
+the shared ELBv2 modify rate limiter. Per-chunk latency and failures are reported.
+
+File format (CSV header or JSONL keys):
+    target_group, id, port, availability_zone
+target_group may be a name or ARN and can be omitted when a default is given;
+port and availability_zone are optional.
+
+Use Cases:
+- Fleet cutovers registering thousands of IP targets
+- Bulk removal of targets during maintenance
+"""
+
+import csv
+import json
+import time
+from typing import List, Dict, Optional
+from alb_fanout import FanOutStats, call_with_backoff, fan_out, ELBV2_MODIFY_LIMITER, DEFAULT_WORKERS
+
+# Targets sent per register_targets / deregister_targets call
+DEFAULT_CHUNK_SIZE = 100
+
+# describe_target_groups accepts at most 20 names per call
+DESCRIBE_NAMES_PER_CALL = 20
+
+def load_target_file(path: str, default_target_group: Optional[str] = None) -> Dict[str, List[Dict]]:
+    """
+    Read targets from a CSV or JSON Lines file, grouped by target group.
+    
+    Args:
+        path: File path; .jsonl/.json files are read as JSON Lines, anything else as CSV
+        default_target_group: Target group for rows that don't name one
+        
+    Returns:
+        Dictionary mapping target group name or ARN to target dictionaries (Id, Port, AvailabilityZone)
+        
+    Raises:
+        ValueError: If a row can't be parsed or lacks an id or target group
+    """
+    with open(path, newline='') as f:
+        if path.endswith(('.jsonl', '.json')):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    
+    targets_by_group = {}
+    for line_number, row in enumerate(rows, 1):
+        target_group = row.get('target_group') or default_target_group
+        if not target_group or not row.get('id'):
+            raise ValueError(f"{path}: row {line_number} needs id and target_group")
+        target = {'Id': str(row['id']).strip()}
+        if row.get('port') not in (None, ''):
+            try:
+                target['Port'] = int(row['port'])
+            except (TypeError, ValueError):
+                raise ValueError(f"{path}: row {line_number} has an invalid port: {row['port']}")
+        if row.get('availability_zone'):
+            target['AvailabilityZone'] = row['availability_zone']
+        targets_by_group.setdefault(target_group, []).append(target)
+    return targets_by_group
+
+def resolve_target_group_arns(elb_client, names: List[str]) -> Dict[str, str]:
+    """
+    Resolve target group names to ARNs (ARNs are passed through).
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        names: Target group names or ARNs
+        
+    Returns:
+        Dictionary mapping each resolvable name or ARN to its ARN
+    """
+    resolved = {name: name for name in names if name.startswith('arn:')}
+    to_lookup = [name for name in names if name not in resolved]
+    for start in range(0, len(to_lookup), DESCRIBE_NAMES_PER_CALL):
+        batch = to_lookup[start:start + DESCRIBE_NAMES_PER_CALL]
+        try:
+            response = elb_client.describe_target_groups(Names=batch)
+        except elb_client.exceptions.TargetGroupNotFoundException:
+            # One missing name fails the whole call; fall back to one lookup per name
+            response = {'TargetGroups': []}
+            for name in batch:
+                try:
+                    response['TargetGroups'] += elb_client.describe_target_groups(Names=[name])['TargetGroups']
+                except elb_client.exceptions.TargetGroupNotFoundException:
+                    print(f"Target group '{name}' not found")
+        for tg in response['TargetGroups']:
+            resolved[tg['TargetGroupName']] = tg['TargetGroupArn']
+    return resolved
+
+def bulk_update_targets(elb_client, targets_by_arn: Dict[str, List[Dict]], action: str = 'register',
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = DEFAULT_WORKERS,
+                        stats: Optional[FanOutStats] = None) -> List[Dict]:
+    """
+    Register or deregister targets in chunks, with target groups processed in parallel.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        targets_by_arn: Dictionary mapping target group ARN to target dictionaries
+        action: 'register' or 'deregister'
+        chunk_size: Targets per API call
+        workers: Number of target groups processed concurrently
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        One result per chunk with target_group_arn, chunk, targets, latency and error (None on success)
+    """
+    operation = elb_client.register_targets if action == 'register' else elb_client.deregister_targets
+    
+    def process_group(target_group_arn):
+        targets = targets_by_arn[target_group_arn]
+        results = []
+        for start in range(0, len(targets), chunk_size):
+            chunk = targets[start:start + chunk_size]
+            attempt = {'started': time.monotonic()}
+            error = None
+            
+            def call(chunk_targets):
+                # Latency covers the last attempt only, not rate limiter waits or backoff
+                attempt['started'] = time.monotonic()
+                return operation(TargetGroupArn=target_group_arn, Targets=chunk_targets)
+            
+            try:
+                call_with_backoff(call, chunk, ELBV2_MODIFY_LIMITER, stats)
+            except Exception as e:
+                error = str(e)
+                print(f"Error {action}ing chunk {start // chunk_size + 1} of {target_group_arn}: {error}")
+            results.append({
+                'target_group_arn': target_group_arn,
+                'chunk': start // chunk_size + 1,
+                'targets': len(chunk),
+                'latency': time.monotonic() - attempt['started'],
+                'error': error
+            })
+        return results
+    
+    # Calls are rate limited and retried individually inside process_group()
+    per_group = fan_out(process_group, list(targets_by_arn), workers, rate_limiter=None, max_retries=0)
+    return [result for results in per_group for result in results]
+
+def summarize_chunk_results(results: List[Dict]) -> str:
+    """
+    Format chunk results as a per-target-group report.
+    
+    Args:
+        results: Chunk results from bulk_update_targets()
+        
+    Returns:
+        Report string
+    """
+    lines = []
+    by_group = {}
+    for result in results:
+        by_group.setdefault(result['target_group_arn'], []).append(result)
+    
+    for target_group_arn, chunks in by_group.items():
+        failed = [c for c in chunks if c['error']]
+        done = sum(c['targets'] for c in chunks if not c['error'])
+        lines.append(f"{target_group_arn}: {done}/{sum(c['targets'] for c in chunks)} target(s) in "
+                     f"{len(chunks)} chunk(s), {len(failed)} failed, "
+                     f"max chunk latency {max(c['latency'] for c in chunks) * 1000:.0f}ms")
+        for chunk in failed:
+            lines.append(f"  chunk {chunk['chunk']} ({chunk['targets']} targets): {chunk['error']}")
+    
+    latencies = sorted(r['latency'] for r in results)
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        lines.append(f"Total: {sum(r['targets'] for r in results if not r['error'])}/"
+                     f"{sum(r['targets'] for r in results)} target(s), {len(results)} chunk(s), "
+                     f"{sum(1 for r in results if r['error'])} failed, chunk latency "
+                     f"p50 {p50 * 1000:.0f}ms / p95 {p95 * 1000:.0f}ms")
+    return "\n".join(lines)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+ALB Certificate Index
+
+Builds an in-memory index of ACM certificates for a scan run. One paginated
+list_certificates sweep provides domain, status and expiry for every certificate;
+describe_certificate is only called (concurrently, rate-limited) for the certificates
+a caller needs fields from that the listing lacks, such as InUseBy. Certificates
+shared by many listeners are looked up once instead of once per listener.
+
+Use Cases:
+- Fast certificate scans across many ALB listeners
+- Shared certificate lookups for the ALB SSL tooling
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+from alb_fanout import TokenBucket, FanOutStats, fan_out, DEFAULT_WORKERS
+
+# ACM DescribeCertificate quota
+ACM_DESCRIBE_RATE = 10.0
+ACM_DESCRIBE_BURST = 10
+
+# list_certificates only returns RSA_2048 certificates unless key types are given
+ACM_KEY_TYPES = ['RSA_1024', 'RSA_2048', 'RSA_3072', 'RSA_4096',
+                 'EC_prime256v1', 'EC_secp384r1', 'EC_secp521r1']
+
+# Fields returned by describe_certificate but not by list_certificates
+DEFAULT_DESCRIBE_FIELDS = ('InUseBy',)
+
+ACM_DESCRIBE_LIMITER = TokenBucket(ACM_DESCRIBE_RATE, ACM_DESCRIBE_BURST)
+
+class CertificateIndex:
+    """
+    Certificate ARN -> certificate details lookups.
+    
+    Details are describe_certificate-shaped dictionaries; certificates that are
+    not in ACM (or could not be described) map to None.
+    """
+    
+    def __init__(self, certificates: Dict[str, Optional[Dict]]):
+        self.certificates = certificates
+    
+    def __contains__(self, certificate_arn: str) -> bool:
+        return certificate_arn in self.certificates
+    
+    def __len__(self) -> int:
+        return len(self.certificates)
+    
+    def get(self, certificate_arn: str) -> Optional[Dict]:
+        """
+        Get details for a certificate.
+        
+        Args:
+            certificate_arn: ARN of the certificate
+            
+        Returns:
+            Certificate details dictionary or None
+        """
+        return self.certificates.get(certificate_arn)
+    
+    def expiration(self, certificate_arn: str) -> Optional[datetime]:
+        """
+        Get the expiration date of a certificate as a naive datetime.
+        
+        Args:
+            certificate_arn: ARN of the certificate
+            
+        Returns:
+            Expiration datetime or None
+        """
+        details = self.get(certificate_arn)
+        if details and 'NotAfter' in details:
+            return details['NotAfter'].replace(tzinfo=None)
+        return None
+    
+    def is_expiring_soon(self, certificate_arn: str, days_threshold: int = 30) -> bool:
+        """
+        Check if a certificate expires within the threshold.
+        
+        Args:
+            certificate_arn: ARN of the certificate
+            days_threshold: Number of days to check ahead
+            
+        Returns:
+            True if expiring soon, False otherwise
+        """
+        expiration = self.expiration(certificate_arn)
+        if not expiration:
+            return False
+        return expiration <= datetime.now() + timedelta(days=days_threshold)
+
+def list_all_certificates(acm_client) -> List[Dict]:
+    """
+    List every ACM certificate in the region, of all key types and statuses.
+    
+    Args:
+        acm_client: Boto3 ACM client
+        
+    Returns:
+        List of CertificateSummary dictionaries
+    """
+    summaries = []
+    paginator = acm_client.get_paginator('list_certificates')
+    
+    try:
+        for page in paginator.paginate(Includes={'keyTypes': ACM_KEY_TYPES}):
+            summaries.extend(page['CertificateSummaryList'])
+    except Exception as e:
+        print(f"Error listing certificates: {str(e)}")
+        raise
+    
+    return summaries
+
+def build_certificate_index(acm_client, certificate_arns: Optional[List[str]] = None,
+                            workers: int = DEFAULT_WORKERS,
+                            describe_fields=DEFAULT_DESCRIBE_FIELDS,
+                            stats: Optional[FanOutStats] = None) -> CertificateIndex:
+    """
+    Build the certificate index.
+    
+    Args:
+        acm_client: Boto3 ACM client
+        certificate_arns: Certificates the caller will look up (default: every listed certificate)
+        workers: Number of concurrent describe_certificate calls
+        describe_fields: Fields that require describe_certificate; certificates missing
+                         any of them are described (pass () to use the listing only)
+        stats: FanOutStats to record describe calls into (optional)
+        
+    Returns:
+        CertificateIndex instance
+    """
+    certificates = {s['CertificateArn']: s for s in list_all_certificates(acm_client)}
+    wanted = list(dict.fromkeys(certificate_arns)) if certificate_arns is not None else list(certificates)
+    
+    to_describe = [arn for arn in wanted
+                   if arn not in certificates or any(f not in certificates[arn] for f in describe_fields)]
+    
+    def describe(certificate_arn):
+        return acm_client.describe_certificate(CertificateArn=certificate_arn)['Certificate']
+    
+    def on_error(certificate_arn, error):
+        if isinstance(error, acm_client.exceptions.ResourceNotFoundException):
+            print(f"Certificate {certificate_arn} not found in ACM")
+        else:
+            print(f"Error retrieving certificate: {str(error)}")
+        return None
+    
+    # Certificates that are not ACM certificates (e.g. IAM server certificates) can't be described
+    acm_arns = [arn for arn in to_describe if arn.split(':')[2:3] == ['acm']]
+    for arn in set(to_describe) - set(acm_arns):
+        certificates.setdefault(arn, None)
+    
+    described = fan_out(describe, acm_arns, workers, ACM_DESCRIBE_LIMITER, stats, on_error)
+    for arn, details in zip(acm_arns, described):
+        if details is not None:
+            certificates[arn] = dict(certificates.get(arn) or {}, **details)
+        elif arn not in certificates:
+            certificates[arn] = None
+    
+    return CertificateIndex(certificates)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+ALB Certificate Rotation
+
+Bulk rotation of a certificate across every ALB listener that references it, as
+the default certificate or as an SNI certificate. Listeners are found with the
+concurrent listener crawler, and changes are applied in batches through a
+rate-limited worker pool. Every planned change, with the listener's prior
+certificates, is appended to a JSON Lines journal, along with a record before
+each listener is modified and its outcome after, so a failed rotation can be
+rolled back from the journal. A rotation whose listener crawl was incomplete
+is refused, since listeners it missed would keep the old certificate.
+
+Use Cases:
+- Swapping a renewed wildcard certificate on hundreds of listeners
+- Fast rollback of a partially applied rotation
+"""
+
+import json
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional
+from alb_fanout import FanOutStats, call_with_backoff, fan_out, ELBV2_MODIFY_LIMITER, DEFAULT_WORKERS
+from alb_listener_crawler import crawl_listener_certificates
+
+DEFAULT_BATCH_SIZE = 50
+
+class RotationJournal:
+    """
+    Append-only JSON Lines journal of a certificate rotation.
+    
+    Each record is flushed as soon as it is written, and a started record is
+    written before each listener is modified, so the journal covers every change
+    made even if the process dies mid-rotation.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def append(self, event: str, **fields):
+        """
+        Append one record to the journal.
+        
+        Args:
+            event: Record type (rotation, planned, started, applied, failed, rollback_started,
+                   rolled_back, rollback_failed)
+            **fields: Record fields
+        """
+        record = dict(fields, event=event, time=datetime.now().isoformat())
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record, default=str) + "\n")
+                f.flush()
+    
+    @staticmethod
+    def load(path: str) -> List[Dict]:
+        """
+        Read every record of a journal.
+        
+        Args:
+            path: Journal file path
+            
+        Returns:
+            List of record dictionaries in the order they were written
+        """
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+def plan_rotation(elb_client, load_balancers: List[Dict], old_cert_arn: str, new_cert_arn: str,
+                  workers: int = DEFAULT_WORKERS, stats: Optional[FanOutStats] = None) -> List[Dict]:
+    """
+    Find every listener that references a certificate.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        load_balancers: Load balancer dictionaries to search
+        old_cert_arn: ARN of the certificate being replaced
+        new_cert_arn: ARN of the replacement certificate
+        workers: Number of load balancers crawled concurrently
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        List of planned changes with listener details and prior certificates
+        
+    Raises:
+        RuntimeError: If the listeners of any load balancer couldn't be crawled
+    """
+    plan = []
+    failed = []
+    for entry in crawl_listener_certificates(elb_client, load_balancers, workers, stats, failed):
+        certificates = {c['CertificateArn'] for c in entry['certificates']}
+        if old_cert_arn not in certificates:
+            continue
+        # A default certificate that is also in the SNI list is returned twice
+        is_default = any(c['CertificateArn'] == old_cert_arn and c.get('IsDefault')
+                         for c in entry['certificates'])
+        plan.append({
+            'load_balancer_name': entry['load_balancer']['LoadBalancerName'],
+            'listener_arn': entry['listener']['ListenerArn'],
+            'listener_port': entry['listener']['Port'],
+            'is_default': is_default,
+            'new_already_attached': new_cert_arn in certificates,
+            'prior_certificates': entry['certificates']
+        })
+    if failed:
+        raise RuntimeError(f"could not crawl the listeners of {len(failed)} load balancer(s): "
+                           f"{', '.join(lb['LoadBalancerName'] for lb in failed)}")
+    return plan
+
+def _call(stats: Optional[FanOutStats], func, **params):
+    """
+    Make one mutating ELBv2 call under the modify rate limiter.
+    """
+    return call_with_backoff(lambda p: func(**p), params, ELBV2_MODIFY_LIMITER, stats)
+
+def apply_rotation(elb_client, change: Dict, old_cert_arn: str, new_cert_arn: str,
+                   stats: Optional[FanOutStats] = None):
+    """
+    Replace the old certificate with the new one on a single listener.
+    
+    The default certificate is swapped with modify_listener; an SNI certificate is
+    swapped by adding the new certificate before removing the old one.
+    """
+    listener_arn = change['listener_arn']
+    if change['is_default']:
+        _call(stats, elb_client.modify_listener, ListenerArn=listener_arn,
+              Certificates=[{'CertificateArn': new_cert_arn}])
+    else:
+        if not change['new_already_attached']:
+            _call(stats, elb_client.add_listener_certificates, ListenerArn=listener_arn,
+                  Certificates=[{'CertificateArn': new_cert_arn}])
+        _call(stats, elb_client.remove_listener_certificates, ListenerArn=listener_arn,
+              Certificates=[{'CertificateArn': old_cert_arn}])
+
+def revert_rotation(elb_client, change: Dict, old_cert_arn: str, new_cert_arn: str,
+                    stats: Optional[FanOutStats] = None):
+    """
+    Restore the old certificate on a single listener (the inverse of apply_rotation).
+    """
+    listener_arn = change['listener_arn']
+    if change['is_default']:
+        _call(stats, elb_client.modify_listener, ListenerArn=listener_arn,
+              Certificates=[{'CertificateArn': old_cert_arn}])
+    else:
+        _call(stats, elb_client.add_listener_certificates, ListenerArn=listener_arn,
+              Certificates=[{'CertificateArn': old_cert_arn}])
+        if not change['new_already_attached']:
+            _call(stats, elb_client.remove_listener_certificates, ListenerArn=listener_arn,
+                  Certificates=[{'CertificateArn': new_cert_arn}])
+
+def _run_changes(elb_client, changes: List[Dict], action, old_cert_arn: str, new_cert_arn: str,
+                 journal: RotationJournal, started_event: str, ok_event: str, failed_event: str,
+                 workers: int, stats: Optional[FanOutStats]) -> List[bool]:
+    """
+    Apply action to each change through the worker pool, journaling each call and its outcome.
+    """
+    def run(change):
+        # Journaled first, so a listener modified by a process that then dies is still rolled back
+        journal.append(started_event, listener_arn=change['listener_arn'])
+        action(elb_client, change, old_cert_arn, new_cert_arn, stats)
+        journal.append(ok_event, listener_arn=change['listener_arn'])
+        return True
+    
+    def on_error(change, error):
+        print(f"Error on listener {change['listener_arn']}: {str(error)}")
+        journal.append(failed_event, listener_arn=change['listener_arn'], error=str(error))
+        return False
+    
+    # Calls are rate limited and retried individually inside action()
+    return fan_out(run, changes, workers, rate_limiter=None, on_error=on_error, max_retries=0)
+
+def rollback_rotation(elb_client, journal_path: str, workers: int = DEFAULT_WORKERS,
+                      stats: Optional[FanOutStats] = None) -> Dict:
+    """
+    Roll back a rotation from its journal.
+    
+    Every listener with a recorded change, whatever its outcome, is restored to the
+    old certificate: applied, failed (possibly partially applied), started without
+    an outcome (the process died mid-call) and unfinished or failed rollbacks.
+    Reverting is idempotent, so restoring a listener the call never reached is harmless.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        journal_path: Journal written by rotate_certificate_everywhere
+        workers: Number of concurrent listener changes
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        Dictionary with rolled_back and failed counts
+    """
+    records = RotationJournal.load(journal_path)
+    header = next(r for r in records if r['event'] == 'rotation')
+    planned = {}
+    last_event = {}
+    for record in records:
+        if record['event'] == 'planned':
+            planned[record['listener_arn']] = record
+        elif record['event'] != 'rotation':
+            last_event[record['listener_arn']] = record['event']
+    
+    changes = [planned[arn] for arn, event in last_event.items()
+               if event in ('started', 'applied', 'failed', 'rollback_started', 'rollback_failed')]
+    print(f"Rolling back {len(changes)} listener(s) from {journal_path}...")
+    
+    journal = RotationJournal(journal_path)
+    outcomes = _run_changes(elb_client, changes, revert_rotation, header['old_certificate_arn'],
+                            header['new_certificate_arn'], journal, 'rollback_started', 'rolled_back',
+                            'rollback_failed', workers, stats)
+    return {'rolled_back': sum(outcomes), 'failed': len(outcomes) - sum(outcomes)}
+
+def rotate_certificate_everywhere(elb_client, load_balancers: List[Dict], old_cert_arn: str,
+                                  new_cert_arn: str, journal_path: str, workers: int = DEFAULT_WORKERS,
+                                  batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False,
+                                  rollback_on_failure: bool = False,
+                                  stats: Optional[FanOutStats] = None) -> Dict:
+    """
+    Replace a certificate on every listener that references it.
+    
+    Changes are applied in batches; if any change in a batch fails, later batches
+    are not started, and the applied changes are rolled back if rollback_on_failure.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        load_balancers: Load balancer dictionaries to search
+        old_cert_arn: ARN of the certificate being replaced
+        new_cert_arn: ARN of the replacement certificate
+        journal_path: JSON Lines journal to append to
+        workers: Number of concurrent listener changes
+        batch_size: Listener changes per batch
+        dry_run: Only plan and print the changes
+        rollback_on_failure: Roll back the whole rotation if a batch has failures
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        Dictionary with planned, applied, failed and rolled_back counts
+        
+    Raises:
+        RuntimeError: If the listeners of any load balancer couldn't be crawled (nothing is changed)
+    """
+    plan = plan_rotation(elb_client, load_balancers, old_cert_arn, new_cert_arn, workers, stats)
+    summary = {'planned': len(plan), 'applied': 0, 'failed': 0, 'rolled_back': 0}
+    print(f"Found {len(plan)} listener(s) using {old_cert_arn} "
+          f"({sum(1 for c in plan if c['is_default'])} default, "
+          f"{sum(1 for c in plan if not c['is_default'])} SNI)")
+    
+    if dry_run:
+        for change in plan:
+            kind = 'default' if change['is_default'] else 'SNI'
+            print(f"  Would rotate {kind} certificate on {change['load_balancer_name']}:{change['listener_port']}")
+        return summary
+    
+    journal = RotationJournal(journal_path)
+    journal.append('rotation', old_certificate_arn=old_cert_arn, new_certificate_arn=new_cert_arn)
+    for change in plan:
+        journal.append('planned', **change)
+    
+    for start in range(0, len(plan), batch_size):
+        batch = plan[start:start + batch_size]
+        outcomes = _run_changes(elb_client, batch, apply_rotation, old_cert_arn, new_cert_arn,
+                                journal, 'started', 'applied', 'failed', workers, stats)
+        summary['applied'] += sum(outcomes)
+        summary['failed'] += len(outcomes) - sum(outcomes)
+        print(f"Batch {start // batch_size + 1}: {sum(outcomes)}/{len(batch)} listener(s) rotated")
+        
+        if summary['failed']:
+            print(f"Stopping after failures. Journal: {journal_path}")
+            if rollback_on_failure:
+                summary['rolled_back'] = rollback_rotation(elb_client, journal_path, workers, stats)['rolled_back']
+            break
+    
+    return summary
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+ALB Certificate Watch
+
+Long-running expiry watcher for certificates attached to ALB listeners. Certificates
+are kept in a min-heap keyed on the next expiry threshold they will cross (30/14/7/1
+days by default, then expiry itself). The watcher sleeps until the earliest deadline
+and re-verifies only the certificates that are due, so a renewed certificate is
+rescheduled instead of alerting. A periodic delta sweep picks up new load balancers,
+renewed certificates and newly attached certificates without re-crawling the fleet.
+IAM server certificates on listeners are watched through IAM when an IAM client is given.
+
+Use Cases:
+- Certificate expiry alerts without re-running full scans
+- API usage proportional to expiry events rather than fleet size
+"""
+
+import heapq
+import time
+from datetime import datetime
+from typing import Callable, List, Dict, Optional
+from alb_fanout import FanOutStats, call_with_backoff, DEFAULT_WORKERS
+from alb_certificate_index import list_all_certificates, ACM_DESCRIBE_LIMITER
+from alb_listener_crawler import crawl_listener_certificates
+
+DEFAULT_THRESHOLDS = (30, 14, 7, 1)
+DEFAULT_SWEEP_INTERVAL = 3600  # Seconds between delta sweeps
+
+SECONDS_PER_DAY = 86400
+
+class CertificateWatcher:
+    """
+    Min-heap scheduler of certificate expiry threshold crossings.
+    
+    Heap entries are (deadline, certificate ARN, version, threshold days); an entry
+    is stale once its certificate has been rescheduled (its version changed), and
+    stale entries are skipped when popped. Threshold 0 means the certificate expired.
+    Without an IAM client, IAM server certificates are reported and not watched.
+    """
+    
+    def __init__(self, elb_client, acm_client, thresholds=DEFAULT_THRESHOLDS,
+                 workers: int = DEFAULT_WORKERS, notify: Optional[Callable] = None,
+                 stats: Optional[FanOutStats] = None, iam_client=None):
+        self.elb_client = elb_client
+        self.acm_client = acm_client
+        self.iam_client = iam_client
+        self.thresholds = sorted(set(thresholds) | {0}, reverse=True)
+        self.workers = workers
+        self.notify = notify or (lambda alert: print(format_expiry_alert(alert)))
+        self.stats = stats or FanOutStats()
+        self.certificates = {}  # ARN -> {'not_after', 'domain_name', 'listeners', 'alerted', 'version'}
+        self.load_balancers = {}  # ARN -> set of certificate ARNs attached to its listeners
+        self.current_load_balancers = {}  # ARN -> load balancer dictionary from the last sweep
+        self._heap = []
+        self._version = 0
+    
+    def _track(self, cert_arn: str, not_after: Optional[float], domain_name: str = 'N/A'):
+        """
+        Start tracking a certificate, or update its expiry if it changed.
+        """
+        cert = self.certificates.get(cert_arn)
+        if cert is None:
+            cert = {'not_after': None, 'domain_name': domain_name, 'listeners': set(),
+                    'alerted': set(), 'version': 0}
+            self.certificates[cert_arn] = cert
+        if not_after is not None and cert['not_after'] != not_after:
+            cert['not_after'] = not_after
+            cert['alerted'] = set()
+            self._schedule(cert_arn, time.time())
+    
+    def _untrack(self, cert_arn: str):
+        """
+        Stop tracking a certificate; its heap entries become stale.
+        """
+        self.certificates.pop(cert_arn, None)
+    
+    def _schedule(self, cert_arn: str, now: float):
+        """
+        Push the certificate's next threshold crossing onto the heap.
+        
+        A threshold that has already been crossed but not alerted is due immediately.
+        """
+        cert = self.certificates[cert_arn]
+        self._version += 1
+        cert['version'] = self._version
+        remaining_days = (cert['not_after'] - now) / SECONDS_PER_DAY
+        crossed = [t for t in self.thresholds if remaining_days <= t and t not in cert['alerted']]
+        if crossed:
+            deadline, threshold = now, min(crossed)
+        else:
+            upcoming = [t for t in self.thresholds if remaining_days > t]
+            if not upcoming:
+                return
+            threshold = max(upcoming)
+            deadline = cert['not_after'] - threshold * SECONDS_PER_DAY
+        heapq.heappush(self._heap, (deadline, cert_arn, cert['version'], threshold))
+    
+    def _crawl(self, load_balancers: List[Dict]):
+        """
+        Crawl listeners of the given load balancers and track their certificates.
+        
+        The listener sets of certificates on these load balancers are rebuilt, so
+        added and removed listeners are both picked up; certificates left without
+        listeners are untracked. Load balancers whose listeners couldn't be crawled
+        keep their previous state (new ones are crawled again on the next sweep).
+        """
+        failed = []
+        entries = list(crawl_listener_certificates(self.elb_client, load_balancers, self.workers,
+                                                   self.stats, failed=failed))
+        failed_arns = {lb['LoadBalancerArn'] for lb in failed}
+        for lb in load_balancers:
+            lb_arn = lb['LoadBalancerArn']
+            if lb_arn in failed_arns:
+                continue
+            for cert_arn in self.load_balancers.get(lb_arn, set()):
+                cert = self.certificates.get(cert_arn)
+                if cert:
+                    cert['listeners'] = {l for l in cert['listeners'] if l[0] != lb_arn}
+            self.load_balancers[lb_arn] = set()
+        
+        for entry in entries:
+            lb = entry['load_balancer']
+            if lb['LoadBalancerArn'] in failed_arns:
+                continue
+            for cert in entry['certificates']:
+                self._track(cert['CertificateArn'], None)
+                self.certificates[cert['CertificateArn']]['listeners'].add(
+                    (lb['LoadBalancerArn'], lb['LoadBalancerName'], entry['listener']['Port'])
+                )
+                self.load_balancers[lb['LoadBalancerArn']].add(cert['CertificateArn'])
+        
+        for cert_arn, cert in list(self.certificates.items()):
+            if not cert['listeners']:
+                self._untrack(cert_arn)
+    
+    def _describe(self, cert_arn: str) -> Optional[Dict]:
+        """
+        Describe one certificate, or None if it no longer exists or can't be described.
+        
+        IAM server certificates are looked up with get_server_certificate and
+        have no InUseBy.
+        """
+        service = cert_arn.split(':')[2:3]
+        if service == ['iam'] and self.iam_client is not None:
+            try:
+                metadata = call_with_backoff(
+                    lambda name: self.iam_client.get_server_certificate(
+                        ServerCertificateName=name)['ServerCertificate']['ServerCertificateMetadata'],
+                    cert_arn.rsplit('/', 1)[-1], None, self.stats
+                )
+            except Exception as e:
+                print(f"Error retrieving server certificate {cert_arn}: {str(e)}")
+                return None
+            return {'NotAfter': metadata['Expiration'], 'DomainName': metadata['ServerCertificateName']}
+        if service != ['acm']:
+            return None
+        try:
+            return call_with_backoff(
+                lambda arn: self.acm_client.describe_certificate(CertificateArn=arn)['Certificate'],
+                cert_arn, ACM_DESCRIBE_LIMITER, self.stats
+            )
+        except Exception as e:
+            print(f"Error retrieving certificate {cert_arn}: {str(e)}")
+            return None
+    
+    def sweep(self, load_balancers: List[Dict]):
+        """
+        Reconcile tracked state with the current load balancers and ACM listing.
+        
+        Only new load balancers are crawled. Expiry dates come from one
+        list_certificates sweep, so renewed certificates are rescheduled cheaply.
+        In-use certificates that are not tracked are described on every sweep to
+        find known load balancers with new listeners, which are then re-crawled
+        (a certificate used elsewhere, e.g. by CloudFront, can be attached later).
+        Listeners of certificates already tracked are refreshed when they're
+        re-verified (see process_due).
+        
+        Args:
+            load_balancers: Current load balancer dictionaries
+        """
+        current = {lb['LoadBalancerArn']: lb for lb in load_balancers}
+        self.current_load_balancers = current
+        for lb_arn in set(self.load_balancers) - set(current):
+            for cert_arn in self.load_balancers.pop(lb_arn):
+                cert = self.certificates.get(cert_arn)
+                if cert:
+                    cert['listeners'] = {l for l in cert['listeners'] if l[0] != lb_arn}
+                    if not cert['listeners']:
+                        self._untrack(cert_arn)
+        
+        new_load_balancers = [lb for arn, lb in current.items() if arn not in self.load_balancers]
+        if new_load_balancers:
+            print(f"Crawling listeners of {len(new_load_balancers)} new load balancer(s)")
+            self._crawl(new_load_balancers)
+        
+        summaries = {s['CertificateArn']: s for s in list_all_certificates(self.acm_client)}
+        
+        to_recrawl = {}
+        for cert_arn, summary in summaries.items():
+            if cert_arn in self.certificates or not summary.get('InUse'):
+                continue
+            # Possibly attached to a new listener on a load balancer we already know
+            details = self._describe(cert_arn) or {}
+            for lb_arn in details.get('InUseBy', []):
+                if lb_arn in current:
+                    to_recrawl[lb_arn] = current[lb_arn]
+        if to_recrawl:
+            print(f"Re-crawling listeners of {len(to_recrawl)} load balancer(s)")
+            self._crawl(list(to_recrawl.values()))
+        
+        for cert_arn, cert in list(self.certificates.items()):
+            summary = summaries.get(cert_arn)
+            if summary and 'NotAfter' in summary:
+                cert['domain_name'] = summary.get('DomainName', 'N/A')
+                self._track(cert_arn, summary['NotAfter'].timestamp())
+            elif cert['not_after'] is None:
+                # Not in the ACM listing: IAM server certificates, or ACM ones just deleted
+                details = self._describe(cert_arn)
+                if details and 'NotAfter' in details:
+                    cert['domain_name'] = details.get('DomainName', 'N/A')
+                    self._track(cert_arn, details['NotAfter'].timestamp())
+                else:
+                    if cert_arn.split(':')[2:3] == ['iam'] and self.iam_client is None:
+                        print(f"Skipping IAM server certificate {cert_arn}: no IAM client to read its expiry")
+                    else:
+                        print(f"Skipping certificate {cert_arn}: expiry unavailable")
+                    self._untrack(cert_arn)
+    
+    def next_deadline(self) -> Optional[float]:
+        """
+        Get the epoch time of the earliest pending threshold crossing (None if nothing is scheduled).
+        """
+        while self._heap:
+            deadline, cert_arn, version, _ = self._heap[0]
+            cert = self.certificates.get(cert_arn)
+            if cert and cert['version'] == version:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+    
+    def process_due(self, now: Optional[float] = None) -> List[Dict]:
+        """
+        Re-verify certificates whose deadline has passed and alert on real crossings.
+        
+        Known load balancers that use a due certificate are re-crawled before it
+        alerts, so the alert lists its current listeners.
+        
+        Args:
+            now: Current epoch time (default: now)
+            
+        Returns:
+            List of alert dictionaries sent to notify
+        """
+        now = time.time() if now is None else now
+        alerts = []
+        while self.next_deadline() is not None and self._heap[0][0] <= now:
+            _, cert_arn, _, threshold = heapq.heappop(self._heap)
+            cert = self.certificates[cert_arn]
+            
+            details = self._describe(cert_arn)
+            if details is not None:
+                if 'InUseBy' in details:
+                    if not any(':loadbalancer/app/' in arn for arn in details['InUseBy']):
+                        self._untrack(cert_arn)
+                        continue
+                    using_arns = details['InUseBy']
+                else:
+                    # IAM server certificates don't report their users; a re-crawl
+                    # of their known load balancers drops them if they were detached
+                    using_arns = sorted({listener[0] for listener in cert['listeners']})
+                using = [self.current_load_balancers[arn] for arn in using_arns
+                         if arn in self.current_load_balancers]
+                if using:
+                    self._crawl(using)
+                    cert = self.certificates.get(cert_arn)
+                    if cert is None:
+                        continue
+                not_after = details['NotAfter'].timestamp()
+                if not_after != cert['not_after']:
+                    # Renewed (or re-imported) since it was scheduled
+                    cert['not_after'] = not_after
+                    cert['alerted'] = set()
+                    self._schedule(cert_arn, now)
+                    continue
+            
+            cert['alerted'].update(t for t in self.thresholds if t >= threshold)
+            alert = {
+                'certificate_arn': cert_arn,
+                'domain_name': cert['domain_name'],
+                'threshold_days': threshold,
+                'expiration_date': datetime.fromtimestamp(cert['not_after']).isoformat(),
+                'days_until_expiry': int((cert['not_after'] - now) // SECONDS_PER_DAY),
+                'listeners': sorted((name, port) for _, name, port in cert['listeners'])
+            }
+            alerts.append(alert)
+            self.notify(alert)
+            self._schedule(cert_arn, now)
+        return alerts
+    
+    def run(self, get_load_balancers: Callable, sweep_interval: int = DEFAULT_SWEEP_INTERVAL):
+        """
+        Watch certificates until interrupted.
+        
+        Args:
+            get_load_balancers: Callable returning the current load balancer dictionaries
+            sweep_interval: Seconds between delta sweeps
+        """
+        next_sweep = 0.0
+        while True:
+            now = time.time()
+            if now >= next_sweep:
+                self.sweep(get_load_balancers())
+                next_sweep = now + sweep_interval
+                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Watching "
+                      f"{len(self.certificates)} certificate(s) on {len(self.load_balancers)} "
+                      f"load balancer(s); {self.stats.summary()}")
+            
+            self.process_due()
+            
+            deadline = self.next_deadline()
+            wake = next_sweep if deadline is None else min(deadline, next_sweep)
+            time.sleep(max(0.0, wake - time.time()))
+
+def format_expiry_alert(alert: Dict) -> str:
+    """
+    Format an expiry alert as text.
+    
+    Args:
+        alert: Alert dictionary from CertificateWatcher.process_due()
+        
+    Returns:
+        Alert message string
+    """
+    if alert['threshold_days'] == 0:
+        headline = f"Certificate {alert['domain_name']} has EXPIRED"
+    else:
+        headline = (f"Certificate {alert['domain_name']} expires within {alert['threshold_days']} day(s) "
+                    f"({alert['days_until_expiry']} days left)")
+    lines = [headline, f"  ARN: {alert['certificate_arn']}", f"  Expires: {alert['expiration_date']}"]
+    for name, port in alert['listeners']:
+        lines.append(f"  Listener: {name}:{port}")
+    return "\n".join(lines)
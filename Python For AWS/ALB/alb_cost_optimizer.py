@@ -15,9 +15,55 @@ Use Cases:
 
 import boto3
 import argparse
+import threading
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import json
+from alb_target_index import TargetGroupIndex, build_target_index, summarize_target_health
+from alb_metric_cache import MetricCache, metric_series, DEFAULT_RETENTION_DAYS
+from alb_fanout import describe_target_health_many
+from alb_metric_data import get_metric_data_batched
+
+# Default caps on in-flight API calls per service when running with --workers
+DEFAULT_ELB_CONCURRENCY = 10
+DEFAULT_CLOUDWATCH_CONCURRENCY = 10
+
+# Per-ALB metrics fetched by the batched GetMetricData backend:
+# (query key, metric name, period in seconds, statistic)
+USAGE_METRIC_QUERIES = [
+    ('requests', 'RequestCount', 86400, 'Sum'),
+    ('connections', 'ActiveConnectionCount', 3600, 'Average'),
+    ('lcus', 'ConsumedLCUs', 3600, 'Average'),
+    ('elb5xx', 'HTTPCode_ELB_5XX_Count', 86400, 'Sum'),
+    ('latency', 'TargetResponseTime', 86400, 'Average'),
+]
+
+class ConcurrencyLimitedClient:
+    """
+    Proxy around a Boto3 client that caps the number of in-flight API calls.
+    
+    Only real API operations (the client's method_to_api_mapping) are gated;
+    everything else (exceptions, meta, get_paginator, ...) passes straight through.
+    Boto3 clients are thread-safe, so one proxy can be shared by all workers.
+    """
+    
+    def __init__(self, client, max_concurrency: int):
+        self._client = client
+        self._semaphore = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._operations = set(client.meta.method_to_api_mapping)
+    
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name not in self._operations:
+            return attr
+        
+        def limited_call(*args, **kwargs):
+            with self._semaphore:
+                return attr(*args, **kwargs)
+        
+        return limited_call
 
 def get_all_load_balancers(elb_client) -> List[Dict]:
     """
@@ -79,48 +125,80 @@ def get_target_groups_for_alb(elb_client, load_balancer_arn: str) -> List[Dict]:
         print(f"Error retrieving target groups: {str(e)}")
         return []
 
-def get_target_health_summary(elb_client, target_group_arn: str) -> Dict:
+def get_load_balancer_dimension(load_balancer: Dict) -> str:
     """
-    Get summary of target health for a target group.
+    Get the CloudWatch LoadBalancer dimension value for an ALB.
+    
+    CloudWatch identifies ALBs by the final portion of the ARN
+    (app/<name>/<id>), not by the load balancer name.
     
     Args:
-        elb_client: Boto3 ELBv2 client
-        target_group_arn: ARN of the target group
+        load_balancer: Load balancer dictionary
         
     Returns:
-        Dictionary with health summary statistics
+        Dimension value string
     """
-    try:
-        response = elb_client.describe_target_health(TargetGroupArn=target_group_arn)
-        targets = response.get('TargetHealthDescriptions', [])
-        
-        healthy = sum(1 for t in targets if t['TargetHealth']['State'] == 'healthy')
-        unhealthy = sum(1 for t in targets if t['TargetHealth']['State'] == 'unhealthy')
-        total = len(targets)
+    return load_balancer['LoadBalancerArn'].split(':loadbalancer/', 1)[-1]
+
+def get_metric_datapoints(cloudwatch_client, metric_name: str, load_balancer_dimension: str,
+                          period: int, stat: str, start_time: datetime, end_time: datetime,
+                          cache: Optional[MetricCache] = None) -> List[tuple]:
+    """
+    Get datapoints for one ALB metric, consulting the metric cache first.
+    
+    With a cache, only the windows not already stored are requested from
+    CloudWatch. Errors are raised to the caller.
+    
+    Args:
+        cloudwatch_client: Boto3 CloudWatch client
+        metric_name: AWS/ApplicationELB metric name
+        load_balancer_dimension: LoadBalancer dimension value (app/<name>/<id>)
+        period: Period in seconds
+        stat: Statistic name (Sum, Average, ...)
+        start_time: Start of the metric window
+        end_time: End of the metric window
+        cache: MetricCache instance (optional)
         
-        return {
-            'total': total,
-            'healthy': healthy,
-            'unhealthy': unhealthy,
-            'has_targets': total > 0,
-            'all_healthy': healthy > 0 and unhealthy == 0
-        }
-    except Exception as e:
-        print(f"Error getting target health: {str(e)}")
-        return {'total': 0, 'healthy': 0, 'unhealthy': 0, 'has_targets': False, 'all_healthy': False}
+    Returns:
+        List of (timestamp, value) pairs
+    """
+    def fetch(window_start, window_end):
+        response = cloudwatch_client.get_metric_statistics(
+            Namespace='AWS/ApplicationELB',
+            MetricName=metric_name,
+            Dimensions=[
+                {'Name': 'LoadBalancer', 'Value': load_balancer_dimension}
+            ],
+            StartTime=window_start,
+            EndTime=window_end,
+            Period=period,
+            Statistics=[stat]
+        )
+        return [(point['Timestamp'], point[stat]) for point in response['Datapoints']]
+    
+    if cache is None:
+        return fetch(start_time, end_time)
+    
+    series = metric_series(metric_name, 'LoadBalancer', load_balancer_dimension, period, stat)
+    for window_start, window_end in cache.missing_windows(series, start_time, end_time):
+        cache.store(series, fetch(window_start, window_end), window_start, window_end)
+    
+    return cache.get_datapoints(series, start_time, end_time)
 
-def get_cloudwatch_metrics(cloudwatch_client, load_balancer_name: str, 
-                          days: int = 7) -> Dict:
+def get_cloudwatch_metrics(cloudwatch_client, load_balancer_dimension: str, 
+                          days: int = 7, cache: Optional[MetricCache] = None) -> Dict:
     """
     Get CloudWatch metrics for load balancer to assess usage.
     
     Args:
         cloudwatch_client: Boto3 CloudWatch client
-        load_balancer_name: Name of the load balancer
+        load_balancer_dimension: LoadBalancer dimension value (app/<name>/<id>)
         days: Number of days to look back
+        cache: MetricCache to read from and update (optional)
         
     Returns:
-        Dictionary with metric statistics
+        Dictionary with metric statistics; metrics_unavailable is set when the
+        request count couldn't be read, so zero traffic isn't proven
     """
     end_time = datetime.utcnow()
     start_time = end_time - timedelta(days=days)
@@ -129,19 +207,12 @@ def get_cloudwatch_metrics(cloudwatch_client, load_balancer_name: str,
     
     # Request count metric
     try:
-        response = cloudwatch_client.get_metric_statistics(
-            Namespace='AWS/ApplicationELB',
-            MetricName='RequestCount',
-            Dimensions=[
-                {'Name': 'LoadBalancer', 'Value': load_balancer_name}
-            ],
-            StartTime=start_time,
-            EndTime=end_time,
-            Period=86400,  # Daily
-            Statistics=['Sum']
+        datapoints = get_metric_datapoints(
+            cloudwatch_client, 'RequestCount', load_balancer_dimension,
+            86400, 'Sum', start_time, end_time, cache  # Daily
         )
         
-        total_requests = sum(point['Sum'] for point in response['Datapoints'])
+        total_requests = sum(value for _, value in datapoints)
         metrics['total_requests'] = total_requests
         metrics['avg_daily_requests'] = total_requests / days if days > 0 else 0
         metrics['has_traffic'] = total_requests > 0
@@ -150,23 +221,17 @@ def get_cloudwatch_metrics(cloudwatch_client, load_balancer_name: str,
         metrics['total_requests'] = 0
         metrics['avg_daily_requests'] = 0
         metrics['has_traffic'] = False
+        metrics['metrics_unavailable'] = True
     
     # Active connection count
     try:
-        response = cloudwatch_client.get_metric_statistics(
-            Namespace='AWS/ApplicationELB',
-            MetricName='ActiveConnectionCount',
-            Dimensions=[
-                {'Name': 'LoadBalancer', 'Value': load_balancer_name}
-            ],
-            StartTime=start_time,
-            EndTime=end_time,
-            Period=3600,  # Hourly
-            Statistics=['Average']
+        datapoints = get_metric_datapoints(
+            cloudwatch_client, 'ActiveConnectionCount', load_balancer_dimension,
+            3600, 'Average', start_time, end_time, cache  # Hourly
         )
         
-        if response['Datapoints']:
-            avg_connections = sum(point['Average'] for point in response['Datapoints']) / len(response['Datapoints'])
+        if datapoints:
+            avg_connections = sum(value for _, value in datapoints) / len(datapoints)
             metrics['avg_connections'] = avg_connections
         else:
             metrics['avg_connections'] = 0
@@ -175,8 +240,103 @@ def get_cloudwatch_metrics(cloudwatch_client, load_balancer_name: str,
     
     return metrics
 
+def get_cloudwatch_metrics_batch(cloudwatch_client, load_balancers: List[Dict],
+                                 days: int = 7, cache: Optional[MetricCache] = None) -> Dict[str, Dict]:
+    """
+    Get usage metrics for many load balancers with batched GetMetricData calls.
+    
+    Returns the same per-LB dictionary as get_cloudwatch_metrics(), plus ConsumedLCUs,
+    ELB 5XX count and target response time, which cost no extra API calls here.
+    With a cache, queries are grouped by missing window so a nightly re-run only
+    requests the tail since the previous run.
+    
+    Args:
+        cloudwatch_client: Boto3 CloudWatch client
+        load_balancers: Load balancer dictionaries
+        days: Number of days to look back
+        cache: MetricCache to read from and update (optional)
+        
+    Returns:
+        Dictionary mapping load balancer ARN to its metrics dictionary; metrics_unavailable
+        is set for load balancers whose request count came back incomplete with no requests
+    """
+    end_time = datetime.utcnow()
+    start_time = end_time - timedelta(days=days)
+    
+    # Group queries by the window they need fetched; without a cache that is
+    # a single window covering the whole lookback period
+    series_by_id = {}
+    queries_by_window = {}
+    for index, lb in enumerate(load_balancers):
+        dimension = get_load_balancer_dimension(lb)
+        for key, metric_name, period, stat in USAGE_METRIC_QUERIES:
+            query = {
+                'Id': f"{key}_{index}",
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': 'AWS/ApplicationELB',
+                        'MetricName': metric_name,
+                        'Dimensions': [{'Name': 'LoadBalancer', 'Value': dimension}]
+                    },
+                    'Period': period,
+                    'Stat': stat
+                },
+                'ReturnData': True
+            }
+            if cache is None:
+                queries_by_window.setdefault((start_time, end_time), []).append(query)
+                continue
+            
+            series = metric_series(metric_name, 'LoadBalancer', dimension, period, stat)
+            series_by_id[query['Id']] = series
+            for window in cache.missing_windows(series, start_time, end_time):
+                queries_by_window.setdefault(window, []).append(query)
+    
+    datapoints = {}
+    incomplete = set()
+    for (window_start, window_end), queries in queries_by_window.items():
+        statuses = {}
+        fetched = get_metric_data_batched(cloudwatch_client, queries, window_start, window_end, statuses)
+        incomplete.update(query_id for query_id, status in statuses.items() if status != 'Complete')
+        if cache is None:
+            datapoints.update(fetched)
+            continue
+        for query_id, points in fetched.items():
+            # Partial results are used for this run but the window is fetched again next time
+            cache.store(series_by_id[query_id], points, window_start, window_end,
+                        complete=statuses.get(query_id) == 'Complete')
+    
+    if cache is not None:
+        for query_id, series in series_by_id.items():
+            datapoints[query_id] = cache.get_datapoints(series, start_time, end_time)
+    
+    values = {query_id: [value for _, value in points] for query_id, points in datapoints.items()}
+    
+    metrics_by_lb = {}
+    for index, lb in enumerate(load_balancers):
+        total_requests = sum(values.get(f"requests_{index}", []))
+        connections = values.get(f"connections_{index}", [])
+        lcus = values.get(f"lcus_{index}", [])
+        latency = values.get(f"latency_{index}", [])
+        
+        metrics_by_lb[lb['LoadBalancerArn']] = {
+            'total_requests': total_requests,
+            'avg_daily_requests': total_requests / days if days > 0 else 0,
+            'has_traffic': total_requests > 0,
+            # A failed or partial request count doesn't show the ALB is idle
+            'metrics_unavailable': f"requests_{index}" in incomplete and total_requests == 0,
+            'avg_connections': sum(connections) / len(connections) if connections else 0,
+            'avg_consumed_lcus': sum(lcus) / len(lcus) if lcus else 0,
+            'elb_5xx_count': sum(values.get(f"elb5xx_{index}", [])),
+            'avg_target_response_time': sum(latency) / len(latency) if latency else 0
+        }
+    
+    return metrics_by_lb
+
 def analyze_alb_usage(elb_client, cloudwatch_client, load_balancer: Dict, 
-                     days: int = 7) -> Dict:
+                     days: int = 7, metrics: Optional[Dict] = None,
+                     target_index: Optional[TargetGroupIndex] = None,
+                     metric_cache: Optional[MetricCache] = None) -> Dict:
     """
     Analyze ALB usage and determine if it's a candidate for deletion.
     
@@ -185,6 +345,11 @@ def analyze_alb_usage(elb_client, cloudwatch_client, load_balancer: Dict,
         cloudwatch_client: Boto3 CloudWatch client
         load_balancer: Load balancer dictionary
         days: Days to analyze for usage
+        metrics: Pre-fetched metrics (e.g. from get_cloudwatch_metrics_batch);
+                 fetched per ALB when omitted
+        target_index: Prefetched target group index (see alb_target_index);
+                      target groups and health are looked up per ALB when omitted
+        metric_cache: MetricCache consulted when metrics are fetched per ALB (optional)
         
     Returns:
         Dictionary with analysis results
@@ -197,7 +362,10 @@ def analyze_alb_usage(elb_client, cloudwatch_client, load_balancer: Dict,
     has_listeners = len(listeners) > 0
     
     # Get target groups
-    target_groups = get_target_groups_for_alb(elb_client, lb_arn)
+    if target_index is not None:
+        target_groups = target_index.target_groups_for(lb_arn)
+    else:
+        target_groups = get_target_groups_for_alb(elb_client, lb_arn)
     has_target_groups = len(target_groups) > 0
     
     # Analyze target health
@@ -205,15 +373,25 @@ def analyze_alb_usage(elb_client, cloudwatch_client, load_balancer: Dict,
     healthy_targets = 0
     has_healthy_targets = False
     
+    # Without an index, fan this ALB's health lookups out through the shared rate limiter
+    descriptions = {}
+    if target_index is None:
+        descriptions = describe_target_health_many(elb_client, [tg['TargetGroupArn'] for tg in target_groups])
+    
     for tg in target_groups:
-        health = get_target_health_summary(elb_client, tg['TargetGroupArn'])
+        if target_index is not None:
+            health = target_index.health_for(tg['TargetGroupArn'])
+        else:
+            health = summarize_target_health(descriptions[tg['TargetGroupArn']] or [])
         total_targets += health['total']
         healthy_targets += health['healthy']
         if health['healthy'] > 0:
             has_healthy_targets = True
     
     # Get CloudWatch metrics
-    metrics = get_cloudwatch_metrics(cloudwatch_client, lb_name, days)
+    if metrics is None:
+        metrics = get_cloudwatch_metrics(cloudwatch_client, get_load_balancer_dimension(load_balancer),
+                                         days, metric_cache)
     
     # Determine if candidate for deletion
     deletion_candidate = False
@@ -231,7 +409,8 @@ def analyze_alb_usage(elb_client, cloudwatch_client, load_balancer: Dict,
         deletion_candidate = True
         deletion_reasons.append("No healthy targets")
     
-    if not metrics.get('has_traffic', False):
+    # Without usable metrics the ALB's traffic isn't analyzed rather than assumed zero
+    if not metrics.get('has_traffic', False) and not metrics.get('metrics_unavailable'):
         deletion_candidate = True
         deletion_reasons.append(f"No traffic in last {days} days")
     
@@ -263,6 +442,63 @@ def analyze_alb_usage(elb_client, cloudwatch_client, load_balancer: Dict,
     
     return analysis
 
+def analyze_albs_concurrently(elb_client, cloudwatch_client, load_balancers: List[Dict],
+                              days: int = 7, workers: int = 8,
+                              elb_concurrency: int = DEFAULT_ELB_CONCURRENCY,
+                              cloudwatch_concurrency: int = DEFAULT_CLOUDWATCH_CONCURRENCY,
+                              metrics_by_lb: Optional[Dict[str, Dict]] = None,
+                              target_index: Optional[TargetGroupIndex] = None,
+                              metric_cache: Optional[MetricCache] = None) -> List[Dict]:
+    """
+    Analyze many ALBs with a bounded worker pool.
+    
+    Each worker runs analyze_alb_usage() for one load balancer. ELBv2 and CloudWatch
+    calls are capped independently so a large pool does not exceed either service's
+    API rate. Results are returned in the same order as load_balancers.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        cloudwatch_client: Boto3 CloudWatch client
+        load_balancers: Load balancer dictionaries to analyze
+        days: Days to analyze for usage
+        workers: Number of load balancers analyzed in parallel
+        elb_concurrency: Maximum in-flight ELBv2 API calls
+        cloudwatch_concurrency: Maximum in-flight CloudWatch API calls
+        metrics_by_lb: Pre-fetched metrics keyed by load balancer ARN (optional)
+        target_index: Prefetched target group index (optional)
+        metric_cache: MetricCache for per-ALB metric lookups (optional)
+        
+    Returns:
+        List of analysis dictionaries in input order
+    """
+    limited_elb = ConcurrencyLimitedClient(elb_client, elb_concurrency)
+    limited_cloudwatch = ConcurrencyLimitedClient(cloudwatch_client, cloudwatch_concurrency)
+    metrics_by_lb = metrics_by_lb or {}
+    total = len(load_balancers)
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(analyze_alb_usage, limited_elb, limited_cloudwatch, lb, days,
+                            metrics_by_lb.get(lb['LoadBalancerArn']), target_index, metric_cache)
+            for lb in load_balancers
+        ]
+        
+        # Collect in submission order so the report stays deterministic
+        analyses = []
+        for index, (lb, future) in enumerate(zip(load_balancers, futures), start=1):
+            analyses.append(future.result())
+            print(f"[{index}/{total}] Analyzed {lb['LoadBalancerName']}")
+    
+    return analyses
+
+def format_traffic(metrics: Dict) -> str:
+    """
+    Format an ALB's request count for the report.
+    """
+    if metrics.get('metrics_unavailable'):
+        return "not analyzed (metrics unavailable)"
+    return f"{metrics.get('total_requests', 0):,} requests"
+
 def generate_optimization_report(analyses: List[Dict]) -> str:
     """
     Generate a formatted cost optimization report.
@@ -280,11 +516,14 @@ def generate_optimization_report(analyses: List[Dict]) -> str:
     report_lines.append("")
     
     candidates = [a for a in analyses if a['deletion_candidate']]
+    not_analyzed = [a for a in analyses if a['metrics'].get('metrics_unavailable')]
     total_monthly_cost = sum(a['estimated_monthly_cost'] for a in analyses)
     potential_savings = sum(a['estimated_monthly_cost'] for a in candidates)
     
     report_lines.append(f"Total ALBs Analyzed: {len(analyses)}")
     report_lines.append(f"Deletion Candidates: {len(candidates)}")
+    if not_analyzed:
+        report_lines.append(f"Traffic Not Analyzed (metrics unavailable): {len(not_analyzed)}")
     report_lines.append(f"Total Estimated Monthly Cost: ${total_monthly_cost:.2f}")
     report_lines.append(f"Potential Monthly Savings: ${potential_savings:.2f}")
     report_lines.append(f"Potential Annual Savings: ${potential_savings * 12:.2f}")
@@ -303,7 +542,7 @@ def generate_optimization_report(analyses: List[Dict]) -> str:
             report_lines.append(f"    Listeners: {candidate['listeners_count']}")
             report_lines.append(f"    Target Groups: {candidate['target_groups_count']}")
             report_lines.append(f"    Total Targets: {candidate['total_targets']} ({candidate['healthy_targets']} healthy)")
-            report_lines.append(f"    Traffic (7 days): {candidate['metrics'].get('total_requests', 0):,} requests")
+            report_lines.append(f"    Traffic (7 days): {format_traffic(candidate['metrics'])}")
             report_lines.append("")
     
     report_lines.append("ALL LOAD BALANCERS:")
@@ -312,8 +551,12 @@ def generate_optimization_report(analyses: List[Dict]) -> str:
         status = "CANDIDATE FOR DELETION" if analysis['deletion_candidate'] else "ACTIVE"
         report_lines.append(f"  {status}: {analysis['load_balancer_name']}")
         report_lines.append(f"    Cost: ${analysis['estimated_monthly_cost']:.2f}/month")
-        report_lines.append(f"    Traffic: {analysis['metrics'].get('total_requests', 0):,} requests (7 days)")
+        report_lines.append(f"    Traffic (7 days): {format_traffic(analysis['metrics'])}")
         report_lines.append(f"    Targets: {analysis['healthy_targets']}/{analysis['total_targets']} healthy")
+        if 'lcu_usage' in analysis:
+            lcu = analysis['lcu_usage']
+            report_lines.append(f"    LCUs/hour: p50 {lcu['lcu_p50']}, p95 {lcu['lcu_p95']}, "
+                                f"max {lcu['lcu_max']} (driven by {lcu['dominant_dimension']})")
         report_lines.append("")
     
     report_lines.append("=" * 100)
@@ -331,12 +574,46 @@ def main():
     parser.add_argument('--export-json', help='Export results to JSON file')
     parser.add_argument('--dry-run', action='store_true',
                        help='Show analysis without taking action')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                       help='Number of ALBs to analyze in parallel (default: 1)')
+    parser.add_argument('--elb-concurrency', type=int, default=DEFAULT_ELB_CONCURRENCY,
+                       help=f'Max in-flight ELBv2 API calls with --workers (default: {DEFAULT_ELB_CONCURRENCY})')
+    parser.add_argument('--cloudwatch-concurrency', type=int, default=DEFAULT_CLOUDWATCH_CONCURRENCY,
+                       help=f'Max in-flight CloudWatch API calls with --workers (default: {DEFAULT_CLOUDWATCH_CONCURRENCY})')
+    parser.add_argument('--metrics-backend', choices=['statistics', 'batch'], default='statistics',
+                       help='statistics: GetMetricStatistics per ALB; batch: GetMetricData for '
+                            'all ALBs in batches of 500 queries (default: statistics)')
+    parser.add_argument('--prefetch-targets', action='store_true',
+                       help='Index all target groups and target health in one region-wide '
+                            'sweep instead of looking them up per ALB')
+    parser.add_argument('--cost-model', choices=['flat', 'lcu'], default='flat',
+                       help='flat: base ALB price plus a fixed LCU allowance; lcu: bill hourly '
+                            'LCU usage from CloudWatch (requires numpy) (default: flat)')
+    parser.add_argument('--alb-hourly-price', type=float,
+                       help='Price per ALB-hour for --cost-model lcu (default: us-east-1 price)')
+    parser.add_argument('--lcu-hourly-price', type=float,
+                       help='Price per LCU-hour for --cost-model lcu (default: us-east-1 price)')
+    parser.add_argument('--metric-cache',
+                       help='SQLite file used to cache CloudWatch datapoints between runs')
+    parser.add_argument('--cache-retention-days', type=int, default=DEFAULT_RETENTION_DAYS,
+                       help=f'Days of cached datapoints to keep (default: {DEFAULT_RETENTION_DAYS})')
     
     args = parser.parse_args()
     
-    # Initialize clients
-    elb_client = boto3.client('elbv2', region_name=args.region)
-    cloudwatch_client = boto3.client('cloudwatch', region_name=args.region)
+    # The LCU cost model needs numpy, so check before doing any work
+    lcu_cost_model = None
+    if args.cost_model == 'lcu':
+        try:
+            import alb_lcu_cost_model as lcu_cost_model
+        except ImportError:
+            print("Error: --cost-model lcu requires numpy (pip install numpy)")
+            return
+    
+    # Initialize clients, sizing the HTTP connection pools for the concurrency limits
+    elb_client = boto3.client('elbv2', region_name=args.region,
+                              config=Config(max_pool_connections=max(10, args.elb_concurrency)))
+    cloudwatch_client = boto3.client('cloudwatch', region_name=args.region,
+                                     config=Config(max_pool_connections=max(10, args.cloudwatch_concurrency)))
     
     print("Analyzing Application Load Balancers...")
     print(f"Region: {args.region}")
@@ -348,12 +625,67 @@ def main():
     print(f"Found {len(load_balancers)} Application Load Balancer(s)")
     print("")
     
+    # Open the metric cache and drop datapoints past the retention period
+    metric_cache = None
+    if args.metric_cache:
+        metric_cache = MetricCache(args.metric_cache, args.cache_retention_days)
+        evicted = metric_cache.evict()
+        print(f"Using metric cache {args.metric_cache} ({evicted} expired datapoint(s) evicted)")
+    
+    # Fetch metrics for every ALB up front when using the batched backend
+    metrics_by_lb = {}
+    if args.metrics_backend == 'batch':
+        print("Fetching CloudWatch metrics with batched GetMetricData...")
+        metrics_by_lb = get_cloudwatch_metrics_batch(cloudwatch_client, load_balancers,
+                                                     args.days, metric_cache)
+    
+    # Build the region-wide target group index up front if requested
+    target_index = None
+    if args.prefetch_targets:
+        print("Prefetching target groups and target health...")
+        target_index = build_target_index(elb_client, workers=max(args.workers, args.elb_concurrency))
+        print(f"Indexed {len(target_index.target_groups)} target group(s)")
+    
     # Analyze each ALB
-    analyses = []
-    for lb in load_balancers:
-        print(f"Analyzing {lb['LoadBalancerName']}...")
-        analysis = analyze_alb_usage(elb_client, cloudwatch_client, lb, args.days)
-        analyses.append(analysis)
+    if args.workers > 1:
+        print(f"Using {args.workers} workers "
+              f"(ELBv2 concurrency {args.elb_concurrency}, CloudWatch concurrency {args.cloudwatch_concurrency})")
+        analyses = analyze_albs_concurrently(
+            elb_client, cloudwatch_client, load_balancers, args.days,
+            workers=args.workers,
+            elb_concurrency=args.elb_concurrency,
+            cloudwatch_concurrency=args.cloudwatch_concurrency,
+            metrics_by_lb=metrics_by_lb,
+            target_index=target_index,
+            metric_cache=metric_cache
+        )
+    else:
+        analyses = []
+        for lb in load_balancers:
+            print(f"Analyzing {lb['LoadBalancerName']}...")
+            analysis = analyze_alb_usage(elb_client, cloudwatch_client, lb, args.days,
+                                         metrics_by_lb.get(lb['LoadBalancerArn']), target_index,
+                                         metric_cache)
+            analyses.append(analysis)
+    
+    # Replace the flat estimate with hourly LCU billing for the whole fleet
+    if lcu_cost_model:
+        print("Estimating cost from hourly LCU usage...")
+        lcu_costs = lcu_cost_model.estimate_lcu_costs(
+            cloudwatch_client,
+            [get_load_balancer_dimension(lb) for lb in load_balancers],
+            args.days,
+            alb_hourly_price=args.alb_hourly_price or lcu_cost_model.ALB_HOURLY_PRICE,
+            lcu_hourly_price=args.lcu_hourly_price or lcu_cost_model.LCU_HOURLY_PRICE
+        )
+        for analysis, lcu_cost in zip(analyses, lcu_costs):
+            analysis['estimated_monthly_cost'] = lcu_cost['estimated_monthly_cost']
+            analysis['lcu_usage'] = lcu_cost
+    
+    if metric_cache:
+        print(f"Metric cache: fetched {metric_cache.windows_fetched} series window(s), "
+              f"{metric_cache.datapoints_fetched} datapoint(s) from CloudWatch")
+        metric_cache.close()
     
     # Generate report
     report = generate_optimization_report(analyses)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+ALB Cost Optimizer Benchmark
+
+Measures how alb_cost_optimizer.py behaves on large accounts without touching AWS.
+A synthetic fleet of ALBs, listeners, target groups, targets and CloudWatch datapoints
+is served to real Boto3 clients through botocore's before-call hook (the same hook
+botocore's Stubber uses). Responses are generated on demand instead of queued, so
+concurrent workers may call in any order.
+
+Each scenario runs get_all_load_balancers -> analyze -> generate_optimization_report
+in a fresh process and reports wall time, API calls per operation and peak RSS.
+
+Use Cases:
+- Regression baseline before and after concurrency or batching changes
+- Capacity planning for very large accounts
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import List, Dict
+
+import boto3
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_MODES = ['serial', 'concurrent', 'batch']
+
+# Mode -> keyword arguments for run_pipeline()
+MODES = {
+    'serial': {},
+    'concurrent': {'workers': 16},
+    'batch': {'workers': 16, 'metrics_backend': 'batch', 'prefetch_targets': True},
+}
+
+TARGET_STATES = ['healthy'] * 8 + ['unhealthy', 'draining']
+
+class _StubHttpResponse:
+    """
+    Minimal HTTP response returned alongside stubbed parsed responses.
+    """
+    status_code = 200
+    headers = {}
+    content = b''
+    raw = None
+
+class SyntheticFleet:
+    """
+    Deterministic synthetic ALB fleet that answers ELBv2 and CloudWatch calls.
+    
+    Roughly 10% of ALBs get no traffic and 5% get no target groups, so the
+    report contains a realistic mix of deletion candidates.
+    """
+    
+    def __init__(self, size: int, seed: int = 42, latency_ms: float = 0):
+        rng = random.Random(seed)
+        self.latency = latency_ms / 1000.0
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        
+        self.load_balancers = []
+        self.listeners = {}
+        self.target_groups = []
+        self.target_groups_by_lb = {}
+        self.target_health = {}
+        self.requests_per_hour = {}
+        
+        for i in range(size):
+            name = f"bench-alb-{i:05d}"
+            lb_arn = f"arn:aws:elasticloadbalancing:us-east-1:123456789012:loadbalancer/app/{name}/{i:016x}"
+            self.load_balancers.append({
+                'LoadBalancerArn': lb_arn,
+                'LoadBalancerName': name,
+                'Type': 'application',
+                'Scheme': 'internet-facing',
+                'State': {'Code': 'active'}
+            })
+            self.listeners[lb_arn] = [
+                {'ListenerArn': f"{lb_arn.replace(':loadbalancer/', ':listener/')}/{port}",
+                 'Port': port, 'Protocol': 'HTTPS' if port == 443 else 'HTTP'}
+                for port in [80, 443][:rng.randint(1, 2)]
+            ]
+            self.requests_per_hour[f"app/{name}/{i:016x}"] = 0 if rng.random() < 0.1 else rng.randint(1, 50000)
+            
+            tg_count = 0 if rng.random() < 0.05 else rng.randint(1, 3)
+            for t in range(tg_count):
+                tg_arn = f"arn:aws:elasticloadbalancing:us-east-1:123456789012:targetgroup/{name}-{t}/{i:012x}{t:04x}"
+                target_group = {
+                    'TargetGroupArn': tg_arn,
+                    'TargetGroupName': f"{name}-{t}",
+                    'TargetType': 'instance',
+                    'LoadBalancerArns': [lb_arn]
+                }
+                self.target_groups.append(target_group)
+                self.target_groups_by_lb.setdefault(lb_arn, []).append(target_group)
+                self.target_health[tg_arn] = [
+                    {'Target': {'Id': f"i-{i:08x}{t:02x}{n:02x}", 'Port': 8080},
+                     'TargetHealth': {'State': rng.choice(TARGET_STATES)}}
+                    for n in range(rng.randint(0, 10))
+                ]
+        
+        self.handlers = {
+            'DescribeLoadBalancers': self._describe_load_balancers,
+            'DescribeListeners': self._describe_listeners,
+            'DescribeTargetGroups': self._describe_target_groups,
+            'DescribeTargetHealth': self._describe_target_health,
+            'GetMetricStatistics': self._get_metric_statistics,
+            'GetMetricData': self._get_metric_data,
+        }
+    
+    def client(self, service_name: str):
+        """
+        Create a Boto3 client whose API calls are answered by this fleet.
+        
+        Args:
+            service_name: 'elbv2' or 'cloudwatch'
+            
+        Returns:
+            Boto3 client
+        """
+        client = boto3.client(service_name, region_name='us-east-1',
+                              aws_access_key_id='benchmark', aws_secret_access_key='benchmark')
+        client.meta.events.register_first('before-parameter-build.*.*', self._capture_params)
+        client.meta.events.register_first('before-call.*.*', self._respond)
+        return client
+    
+    def _capture_params(self, params, **kwargs):
+        self._local.params = dict(params)
+    
+    def _respond(self, model, **kwargs):
+        with self._lock:
+            self.calls[model.name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        response = self.handlers[model.name](self._local.params)
+        response['ResponseMetadata'] = {'HTTPStatusCode': 200}
+        return _StubHttpResponse(), response
+    
+    @staticmethod
+    def _page(items: List, params: Dict, key: str, page_size: int = 400) -> Dict:
+        """
+        Return one Marker-paginated page of items, like the ELBv2 describe APIs.
+        """
+        start = int(params.get('Marker') or 0)
+        size = params.get('PageSize') or page_size
+        response = {key: items[start:start + size]}
+        if start + size < len(items):
+            response['NextMarker'] = str(start + size)
+        return response
+    
+    def _describe_load_balancers(self, params):
+        return self._page(self.load_balancers, params, 'LoadBalancers')
+    
+    def _describe_listeners(self, params):
+        return {'Listeners': self.listeners.get(params.get('LoadBalancerArn'), [])}
+    
+    def _describe_target_groups(self, params):
+        if 'LoadBalancerArn' in params:
+            return {'TargetGroups': self.target_groups_by_lb.get(params['LoadBalancerArn'], [])}
+        return self._page(self.target_groups, params, 'TargetGroups')
+    
+    def _describe_target_health(self, params):
+        return {'TargetHealthDescriptions': self.target_health.get(params['TargetGroupArn'], [])}
+    
+    def _datapoints(self, dimension: str, start, end, period: int):
+        """
+        Generate evenly spaced datapoints for an ALB (none for idle ALBs).
+        """
+        per_hour = self.requests_per_hour.get(dimension, 0)
+        timestamps = []
+        current = start
+        while current < end and per_hour:
+            timestamps.append(current)
+            current += timedelta(seconds=period)
+        return timestamps, float(per_hour * period / 3600)
+    
+    def _get_metric_statistics(self, params):
+        stat = params['Statistics'][0]
+        timestamps, value = self._datapoints(params['Dimensions'][0]['Value'],
+                                             params['StartTime'], params['EndTime'], params['Period'])
+        return {'Label': params['MetricName'],
+                'Datapoints': [{'Timestamp': ts, stat: value} for ts in timestamps]}
+    
+    def _get_metric_data(self, params):
+        queries = {q['Id']: q for q in params['MetricDataQueries']}
+        results = []
+        for query in params['MetricDataQueries']:
+            if not query.get('ReturnData', True):
+                continue
+            stat = query.get('MetricStat')
+            if stat is None:
+                # FILL(raw_id, value) expression: answer for the underlying metric
+                stat = queries[query['Expression'][5:].split(',')[0]]['MetricStat']
+            timestamps, value = self._datapoints(stat['Metric']['Dimensions'][0]['Value'],
+                                                 params['StartTime'], params['EndTime'], stat['Period'])
+            results.append({'Id': query['Id'], 'Timestamps': timestamps,
+                            'Values': [value] * len(timestamps), 'StatusCode': 'Complete'})
+        return {'MetricDataResults': results}
+
+def run_pipeline(size: int, days: int = 7, workers: int = 1, metrics_backend: str = 'statistics',
+                 prefetch_targets: bool = False, latency_ms: float = 0, seed: int = 42,
+                 describe_rate: float = 0) -> Dict:
+    """
+    Run the cost optimizer pipeline against a synthetic fleet.
+    
+    Args:
+        size: Number of ALBs in the fleet
+        days: Days of metrics to analyze
+        workers: Worker pool size (1 = serial analyze_alb_usage loop)
+        metrics_backend: 'statistics' or 'batch'
+        prefetch_targets: Use the region-wide target group index
+        latency_ms: Simulated latency per API call
+        seed: Random seed for the synthetic fleet
+        describe_rate: ELBv2 describe rate limit per second (0 = unlimited)
+        
+    Returns:
+        Dictionary with wall time, API call counts and peak RSS
+    """
+    import alb_cost_optimizer as optimizer
+    from alb_target_index import build_target_index
+    from alb_fanout import ELBV2_DESCRIBE_LIMITER
+    
+    # The stub has no quota, so only apply the shared rate limiter when asked to
+    if describe_rate:
+        ELBV2_DESCRIBE_LIMITER.configure(describe_rate, burst=max(1, int(describe_rate * 2)))
+    else:
+        ELBV2_DESCRIBE_LIMITER.configure(1e9, burst=10 ** 9)
+    
+    fleet = SyntheticFleet(size, seed, latency_ms)
+    elb_client = fleet.client('elbv2')
+    cloudwatch_client = fleet.client('cloudwatch')
+    
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_balancers = optimizer.get_all_load_balancers(elb_client)
+        
+        metrics_by_lb = {}
+        if metrics_backend == 'batch':
+            metrics_by_lb = optimizer.get_cloudwatch_metrics_batch(cloudwatch_client, load_balancers, days)
+        
+        target_index = build_target_index(elb_client, workers) if prefetch_targets else None
+        
+        if workers > 1:
+            analyses = optimizer.analyze_albs_concurrently(
+                elb_client, cloudwatch_client, load_balancers, days, workers=workers,
+                metrics_by_lb=metrics_by_lb, target_index=target_index
+            )
+        else:
+            analyses = [
+                optimizer.analyze_alb_usage(elb_client, cloudwatch_client, lb, days,
+                                            metrics_by_lb.get(lb['LoadBalancerArn']), target_index)
+                for lb in load_balancers
+            ]
+        
+        optimizer.generate_optimization_report(analyses)
+    elapsed = time.perf_counter() - started
+    
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+    
+    return {
+        'albs': size,
+        'wall_seconds': round(elapsed, 3),
+        'api_calls': dict(fleet.calls),
+        'total_api_calls': sum(fleet.calls.values()),
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'deletion_candidates': sum(1 for a in analyses if a['deletion_candidate'])
+    }
+
+def _run_isolated(kwargs: Dict) -> Dict:
+    """
+    Run one scenario in a fresh process so peak RSS is not shared between runs.
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(run_pipeline, kwds=kwargs)
+
+def generate_benchmark_report(results: List[Dict]) -> str:
+    """
+    Generate a formatted benchmark report.
+    
+    Args:
+        results: List of scenario result dictionaries
+        
+    Returns:
+        Formatted report string
+    """
+    report_lines = []
+    report_lines.append("=" * 100)
+    report_lines.append("ALB Cost Optimizer Benchmark")
+    report_lines.append("=" * 100)
+    report_lines.append(f"{'ALBs':>6}  {'Mode':<11} {'Wall (s)':>9} {'API calls':>10} {'Peak RSS (MB)':>14}  Calls per operation")
+    report_lines.append("-" * 100)
+    
+    for result in results:
+        calls = ", ".join(f"{op}={count}" for op, count in sorted(result['api_calls'].items()))
+        report_lines.append(f"{result['albs']:>6}  {result['mode']:<11} {result['wall_seconds']:>9.2f} "
+                            f"{result['total_api_calls']:>10} {result['peak_rss_mb']:>14.1f}  {calls}")
+    
+    report_lines.append("=" * 100)
+    
+    return "\n".join(report_lines)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark alb_cost_optimizer against a synthetic ELBv2/CloudWatch fleet'
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                       help=f'Fleet sizes to benchmark (default: {" ".join(map(str, DEFAULT_SIZES))})')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=DEFAULT_MODES,
+                       help='Pipelines to run: serial, concurrent (--workers 16), '
+                            'batch (--workers 16 --metrics-backend batch --prefetch-targets)')
+    parser.add_argument('--days', '-d', type=int, default=7,
+                       help='Days of metrics to analyze (default: 7)')
+    parser.add_argument('--latency-ms', type=float, default=0,
+                       help='Simulated latency per API call in milliseconds (default: 0)')
+    parser.add_argument('--describe-rate', type=float, default=0,
+                       help='Apply the shared ELBv2 describe rate limit (calls/second) '
+                            'instead of running unthrottled (default: 0 = unlimited)')
+    parser.add_argument('--seed', type=int, default=42,
+                       help='Random seed for the synthetic fleet (default: 42)')
+    parser.add_argument('--export-json', help='Export results to JSON file')
+    
+    args = parser.parse_args()
+    
+    results = []
+    for size in args.sizes:
+        for mode in args.modes:
+            print(f"Running {mode} pipeline with {size} ALB(s)...")
+            result = _run_isolated(dict(size=size, days=args.days, latency_ms=args.latency_ms,
+                                        seed=args.seed, describe_rate=args.describe_rate,
+                                        **MODES[mode]))
+            result['mode'] = mode
+            results.append(result)
+    
+    print("")
+    print(generate_benchmark_report(results))
+    
+    if args.export_json:
+        with open(args.export_json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults exported to {args.export_json}")
+
+if __name__ == "__main__":
+    main()
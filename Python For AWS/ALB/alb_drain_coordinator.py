@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+ALB Drain Coordinator
+
+Waits for deregistered targets to finish draining across many target groups at once.
+Each target group is polled with describe_target_health filtered to its still-draining
+targets, on a schedule adapted to its deregistration delay: every second until shortly
+after the expected end, then with gradual backoff if draining runs long. ALB usually
+finishes draining early, once in-flight requests complete, so that is detected within
+about a second too. Polls of all groups share the ELBv2 describe rate limiter, so with
+more draining groups than its rate the per-group interval stretches accordingly.
+
+Use Cases:
+- Draining targets from dozens of target groups during a cutover
+- Maintenance windows that must wait for connections to close
+"""
+
+import heapq
+import time
+from typing import List, Dict, Optional, Tuple
+from alb_fanout import FanOutStats, call_with_backoff, ELBV2_DESCRIBE_LIMITER
+
+DEFAULT_DEREGISTRATION_DELAY = 300  # ELBv2 default when the attribute can't be read
+DEFAULT_DRAIN_TIMEOUT = 900
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 15.0
+TARGETS_PER_CALL = 100
+
+def get_deregistration_delay(elb_client, target_group_arn: str,
+                             stats: Optional[FanOutStats] = None) -> int:
+    """
+    Get a target group's deregistration delay in seconds.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        target_group_arn: ARN of the target group
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        Deregistration delay (DEFAULT_DEREGISTRATION_DELAY if it can't be read)
+    """
+    try:
+        response = call_with_backoff(
+            lambda arn: elb_client.describe_target_group_attributes(TargetGroupArn=arn),
+            target_group_arn, ELBV2_DESCRIBE_LIMITER, stats
+        )
+    except Exception as e:
+        print(f"Error reading deregistration delay for {target_group_arn}: {str(e)}")
+        return DEFAULT_DEREGISTRATION_DELAY
+    for attribute in response.get('Attributes', []):
+        if attribute['Key'] == 'deregistration_delay.timeout_seconds':
+            return int(attribute['Value'])
+    return DEFAULT_DEREGISTRATION_DELAY
+
+def next_poll_interval(now: float, expected_end: float, overdue_polls: int) -> float:
+    """
+    Choose the delay before the next poll of a draining target group.
+    
+    Draining can end any time before the expected end (as soon as connections
+    close), so poll every MIN_POLL_INTERVAL until then and for ten polls after it,
+    then back off exponentially up to MAX_POLL_INTERVAL.
+    """
+    if now < expected_end or overdue_polls < 10:
+        return MIN_POLL_INTERVAL
+    return min(MAX_POLL_INTERVAL, MIN_POLL_INTERVAL * 2 ** (overdue_polls - 9))
+
+def _target_key(target: Dict) -> Tuple[str, Optional[int]]:
+    return (target['Id'], target.get('Port'))
+
+def _still_draining(elb_client, target_group_arn: str, pending: set,
+                    stats: Optional[FanOutStats]) -> set:
+    """
+    Return the subset of pending targets still in the draining state.
+    """
+    keys = sorted(pending, key=str)
+    draining = set()
+    for start in range(0, len(keys), TARGETS_PER_CALL):
+        targets = [{'Id': target_id, 'Port': port} if port is not None else {'Id': target_id}
+                   for target_id, port in keys[start:start + TARGETS_PER_CALL]]
+        response = call_with_backoff(
+            lambda t: elb_client.describe_target_health(TargetGroupArn=target_group_arn, Targets=t),
+            targets, ELBV2_DESCRIBE_LIMITER, stats
+        )
+        for description in response['TargetHealthDescriptions']:
+            if description['TargetHealth']['State'] == 'draining':
+                target = description['Target']
+                key = (target['Id'], target.get('Port'))
+                # Targets given without a port match any port
+                draining.add(key if key in pending else (target['Id'], None))
+    return draining & pending
+
+def wait_for_drains(elb_client, drains: List[Tuple[str, List[Dict]]],
+                    timeout: int = DEFAULT_DRAIN_TIMEOUT, started: Optional[float] = None,
+                    stats: Optional[FanOutStats] = None) -> Dict[str, Dict]:
+    """
+    Wait until the given targets have finished draining in all target groups.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        drains: (target group ARN, targets) pairs; targets are dictionaries with Id and optional Port
+        timeout: Maximum time to wait in seconds
+        started: Epoch time the targets were deregistered (default: now)
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        Dictionary mapping target group ARN to {'drained': bool, 'pending': set of
+        (id, port), 'elapsed': seconds until drained or timeout}
+    """
+    started = time.time() if started is None else started
+    deadline = started + timeout
+    groups = {}
+    schedule = []
+    
+    for target_group_arn, targets in drains:
+        group = groups.setdefault(target_group_arn, {'pending': set(), 'overdue_polls': 0})
+        group['pending'].update(_target_key(t) for t in targets)
+    for target_group_arn, group in groups.items():
+        delay = get_deregistration_delay(elb_client, target_group_arn, stats)
+        group['expected_end'] = started + delay
+        group['elapsed'] = None
+        first_poll = time.time() + next_poll_interval(time.time(), group['expected_end'], 0)
+        heapq.heappush(schedule, (first_poll, target_group_arn))
+    
+    while schedule:
+        poll_at, target_group_arn = heapq.heappop(schedule)
+        group = groups[target_group_arn]
+        if poll_at > deadline:
+            continue
+        time.sleep(max(0.0, poll_at - time.time()))
+        
+        try:
+            group['pending'] = _still_draining(elb_client, target_group_arn, group['pending'], stats)
+        except Exception as e:
+            print(f"Error checking drain status for {target_group_arn}: {str(e)}")
+        
+        now = time.time()
+        if not group['pending']:
+            group['elapsed'] = now - started
+            print(f"{target_group_arn}: all targets drained after {group['elapsed']:.0f}s")
+            continue
+        
+        if now >= group['expected_end']:
+            group['overdue_polls'] += 1
+        heapq.heappush(schedule, (now + next_poll_interval(now, group['expected_end'], group['overdue_polls']),
+                                  target_group_arn))
+    
+    results = {}
+    for target_group_arn, group in groups.items():
+        drained = not group['pending']
+        if not drained:
+            print(f"{target_group_arn}: timeout after {timeout}s, {len(group['pending'])} target(s) still draining")
+        results[target_group_arn] = {
+            'drained': drained,
+            'pending': group['pending'],
+            'elapsed': group['elapsed'] if drained else timeout
+        }
+    return results
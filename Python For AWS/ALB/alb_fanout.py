@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+ALB API Fan-Out
+
+Shared, throttle-aware executor for fanning ELBv2 describe calls out across many
+target groups. Calls go through a bounded thread pool and a token-bucket rate limiter
+tuned to the ELBv2 describe quota. Throttling errors shrink the bucket's rate and are
+retried with jittered exponential backoff; the rate creeps back up as calls succeed.
+Per-call latency and throttle counts are collected for reporting.
+
+Use Cases:
+- Full-fleet describe_target_health sweeps in seconds without tripping API limits
+- Shared rate limiting across the ALB monitoring and cost scripts
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Optional
+
+# Sustained rate and burst for ELBv2 Describe* calls (shared per account and region)
+ELBV2_DESCRIBE_RATE = 20.0
+ELBV2_DESCRIBE_BURST = 40
+
+# Sustained rate and burst for ELBv2 mutating calls (modify/register/add/remove)
+ELBV2_MODIFY_RATE = 5.0
+ELBV2_MODIFY_BURST = 5
+
+DEFAULT_WORKERS = 10
+
+# Latency percentiles cover the most recent calls, so long-running watchers
+# keep a fixed amount of latency history
+LATENCY_WINDOW = 10000
+DEFAULT_MAX_RETRIES = 5
+
+THROTTLING_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'RequestLimitExceeded',
+    'TooManyRequestsException', 'RequestThrottled', 'SlowDown'
+}
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter with adaptive rate.
+    
+    throttled() halves the refill rate (down to min_rate); each successful call
+    adds back 1% of max_rate until the configured rate is reached again.
+    """
+    
+    def __init__(self, rate: float, burst: int, min_rate: float = 1.0):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        Block until a token is available, then consume it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+    
+    def throttled(self):
+        """
+        Reduce the rate after a throttling error.
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+    
+    def configure(self, rate: float, burst: Optional[int] = None):
+        """
+        Change the configured rate (and optionally burst) of the bucket.
+        
+        Args:
+            rate: Sustained calls per second
+            burst: Maximum calls allowed in a burst (unchanged if omitted)
+        """
+        with self._lock:
+            self.max_rate = rate
+            self.rate = rate
+            self.min_rate = min(self.min_rate, rate)
+            if burst is not None:
+                self.burst = burst
+    
+    def succeeded(self):
+        """
+        Recover the rate gradually after a successful call.
+        """
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+class FanOutStats:
+    """
+    Cumulative call, throttle and error counters for fan-out calls, plus the
+    latencies of the last LATENCY_WINDOW calls and the maximum latency.
+    """
+    
+    def __init__(self):
+        self.calls = 0
+        self.throttles = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.max_latency = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, latency: float, throttled: bool = False, error: bool = False):
+        """
+        Record one API call attempt.
+        
+        Args:
+            latency: Call duration in seconds
+            throttled: True if the call was throttled
+            error: True if the call failed for another reason
+        """
+        with self._lock:
+            self.calls += 1
+            self.throttles += throttled
+            self.errors += error
+            self.latencies.append(latency)
+            self.max_latency = max(self.max_latency, latency)
+    
+    def percentiles(self, *percents: float) -> List[float]:
+        """
+        Get latency percentiles in seconds over the recent calls (0 if no calls were made).
+        """
+        with self._lock:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            return [0.0 for _ in percents]
+        return [ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] for percent in percents]
+    
+    def summary(self) -> str:
+        """
+        Format the counters as a one-line summary.
+        """
+        p50, p95 = self.percentiles(50, 95)
+        return (f"{self.calls} API calls, {self.throttles} throttled, {self.errors} failed, "
+                f"latency p50 {p50 * 1000:.0f}ms / "
+                f"p95 {p95 * 1000:.0f}ms / max {self.max_latency * 1000:.0f}ms")
+
+# Process-wide limiter: the describe quota is shared by every caller in the account
+ELBV2_DESCRIBE_LIMITER = TokenBucket(ELBV2_DESCRIBE_RATE, ELBV2_DESCRIBE_BURST)
+ELBV2_MODIFY_LIMITER = TokenBucket(ELBV2_MODIFY_RATE, ELBV2_MODIFY_BURST)
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    Check whether an exception is an AWS throttling error.
+    
+    Args:
+        error: Exception raised by a Boto3 call
+        
+    Returns:
+        True if the error code is a throttling code
+    """
+    response = getattr(error, 'response', None) or {}
+    return response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+def call_with_backoff(func: Callable, item, rate_limiter: Optional[TokenBucket] = None,
+                      stats: Optional[FanOutStats] = None, max_retries: int = DEFAULT_MAX_RETRIES):
+    """
+    Call func(item) under the rate limiter, retrying throttling errors.
+    
+    Args:
+        func: Function making one API call
+        item: Argument passed to func
+        rate_limiter: TokenBucket to draw from (optional)
+        stats: FanOutStats to record into (optional)
+        max_retries: Retries allowed after throttling errors
+        
+    Returns:
+        Result of func(item); the last exception is raised if all attempts fail
+    """
+    for attempt in range(max_retries + 1):
+        if rate_limiter:
+            rate_limiter.acquire()
+        started = time.monotonic()
+        try:
+            result = func(item)
+        except Exception as e:
+            throttled = is_throttling_error(e)
+            if stats:
+                stats.record(time.monotonic() - started, throttled=throttled, error=not throttled)
+            if not throttled or attempt == max_retries:
+                raise
+            if rate_limiter:
+                rate_limiter.throttled()
+            time.sleep(random.uniform(0, min(10.0, 0.2 * 2 ** attempt)))
+            continue
+        if stats:
+            stats.record(time.monotonic() - started)
+        if rate_limiter:
+            rate_limiter.succeeded()
+        return result
+
+def _item_runner(func: Callable, rate_limiter: Optional[TokenBucket], stats: Optional[FanOutStats],
+                 on_error: Optional[Callable], max_retries: int) -> Callable:
+    """
+    Wrap func with backoff and the on_error fallback for use in a worker pool.
+    """
+    def run(item):
+        try:
+            return call_with_backoff(func, item, rate_limiter, stats, max_retries)
+        except Exception as e:
+            if on_error is None:
+                raise
+            return on_error(item, e)
+    
+    return run
+
+def fan_out(func: Callable, items: List, workers: int = DEFAULT_WORKERS,
+            rate_limiter: Optional[TokenBucket] = ELBV2_DESCRIBE_LIMITER,
+            stats: Optional[FanOutStats] = None, on_error: Optional[Callable] = None,
+            max_retries: int = DEFAULT_MAX_RETRIES) -> List:
+    """
+    Run func over items through a bounded, rate-limited thread pool.
+    
+    Args:
+        func: Function making one API call per item; should raise on failure
+        items: Items to process
+        workers: Maximum concurrent calls
+        rate_limiter: TokenBucket shared by all calls (defaults to the ELBv2 describe limiter)
+        stats: FanOutStats to record into (optional)
+        on_error: Called as on_error(item, exception) when an item fails; its return
+                  value is used as the result. Without it, failures re-raise.
+        max_retries: Retries allowed after throttling errors
+        
+    Returns:
+        List of results in the same order as items
+    """
+    run = _item_runner(func, rate_limiter, stats, on_error, max_retries)
+    
+    if len(items) <= 1 or workers <= 1:
+        return [run(item) for item in items]
+    
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        return list(executor.map(run, items))
+
+def iter_fan_out(func: Callable, items: List, workers: int = DEFAULT_WORKERS,
+                 rate_limiter: Optional[TokenBucket] = ELBV2_DESCRIBE_LIMITER,
+                 stats: Optional[FanOutStats] = None, on_error: Optional[Callable] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+    """
+    Like fan_out, but yield (item, result) pairs as each call completes.
+    
+    Args:
+        func: Function making one API call per item; should raise on failure
+        items: Items to process
+        workers: Maximum concurrent calls
+        rate_limiter: TokenBucket shared by all calls (defaults to the ELBv2 describe limiter)
+        stats: FanOutStats to record into (optional)
+        on_error: Called as on_error(item, exception) when an item fails; its return
+                  value is used as the result. Without it, failures re-raise.
+        max_retries: Retries allowed after throttling errors
+        
+    Yields:
+        (item, result) tuples in completion order
+    """
+    run = _item_runner(func, rate_limiter, stats, on_error, max_retries)
+    
+    if not items:
+        return
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as executor:
+        futures = {executor.submit(run, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def describe_target_health_many(elb_client, target_group_arns: List[str],
+                                workers: int = DEFAULT_WORKERS,
+                                rate_limiter: Optional[TokenBucket] = ELBV2_DESCRIBE_LIMITER,
+                                stats: Optional[FanOutStats] = None) -> Dict[str, List[Dict]]:
+    """
+    Describe target health for many target groups concurrently.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        target_group_arns: Target group ARNs
+        workers: Maximum concurrent calls
+        rate_limiter: TokenBucket shared by all calls
+        stats: FanOutStats to record into (optional)
+        
+    Returns:
+        Dictionary mapping target group ARN to its TargetHealthDescriptions
+        (None if the lookup failed, so callers can tell it from an empty group)
+    """
+    def describe(target_group_arn):
+        response = elb_client.describe_target_health(TargetGroupArn=target_group_arn)
+        return response.get('TargetHealthDescriptions', [])
+    
+    def on_error(target_group_arn, error):
+        print(f"Error getting target health for {target_group_arn}: {str(error)}")
+        return None
+    
+    results = fan_out(describe, target_group_arns, workers, rate_limiter, stats, on_error)
+    return dict(zip(target_group_arns, results))
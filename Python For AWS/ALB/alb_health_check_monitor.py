@@ -10,18 +10,37 @@ Use Cases:
 - Automated alerting for unhealthy targets
 - Health check compliance reporting
 - Integration with monitoring systems
+- Continuous watch mode that alerts only on health state transitions
+- Flap counts, time-in-state and MTTR per target group from in-memory history
+- Prometheus /metrics endpoint fed by the watch-mode poller
+- Alerts coalesced per target group and incident, sent with SNS publish_batch
 """
 
 import boto3
+import argparse
 import json
+import math
 import os
+import time
 from datetime import datetime
 from typing import List, Dict, Optional
+from alb_fanout import (FanOutStats, describe_target_health_many,
+                        ELBV2_DESCRIBE_LIMITER, ELBV2_DESCRIBE_RATE)
+from alb_health_history import HealthHistory
+from alb_health_exporter import HealthMetricsExporter
+from alb_alert_dispatcher import AlertDispatcher, DEFAULT_INCIDENT_WINDOW, DEFAULT_PUBLISH_RATE
 
 # Use environment variables or default credential chain
 REGION = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
 SNS_TOPIC_ARN = os.environ.get('ALB_HEALTH_SNS_TOPIC_ARN', None)  # Optional SNS topic for alerts
 
+# Watch mode defaults
+DEFAULT_REFRESH_INTERVAL = 300  # Seconds between target group list refreshes
+DEFAULT_WORKERS = 10  # Concurrent describe_target_health calls
+DEFAULT_HISTORY_HOURS = 24  # Health history window kept in memory
+DEFAULT_REPORT_INTERVAL = 3600  # Seconds between history reports
+DEFAULT_METRICS_INTERVAL = 60  # Poll interval when serving /metrics without --watch
+
 def get_all_alb_target_groups(elb_client) -> List[Dict]:
     """
     Retrieve all target groups for Application Load Balancers.
@@ -44,24 +63,6 @@ def get_all_alb_target_groups(elb_client) -> List[Dict]:
     
     return target_groups
 
-def get_target_health(elb_client, target_group_arn: str) -> Dict:
-    """
-    Get health status for all targets in a target group.
-    
-    Args:
-        elb_client: Boto3 ELBv2 client
-        target_group_arn: ARN of the target group
-        
-    Returns:
-        Dictionary containing target health information
-    """
-    try:
-        response = elb_client.describe_target_health(TargetGroupArn=target_group_arn)
-        return response
-    except Exception as e:
-        print(f"Error getting target health for {target_group_arn}: {str(e)}")
-        return {'TargetHealthDescriptions': []}
-
 def analyze_target_health(target_health_descriptions: List[Dict]) -> Dict:
     """
     Analyze target health and categorize by status.
@@ -108,16 +109,165 @@ def analyze_target_health(target_health_descriptions: List[Dict]) -> Dict:
     
     return stats
 
-def generate_health_report(all_health_data: List[Dict]) -> str:
+def collect_health_data(elb_client, target_groups: List[Dict], workers: int = 1,
+                        stats: Optional[FanOutStats] = None) -> List[Dict]:
+    """
+    Describe and analyze target health for a list of target groups.
+    
+    describe_target_health calls are fanned out through the shared rate-limited
+    executor (see alb_fanout), which backs off on Throttling errors.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        target_groups: Target group dictionaries
+        workers: Number of concurrent describe_target_health calls
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        List of health data dictionaries, in the same order as target_groups;
+        groups whose lookup failed have lookup_failed set and no targets
+    """
+    descriptions = describe_target_health_many(
+        elb_client, [tg['TargetGroupArn'] for tg in target_groups], workers, stats=stats
+    )
+    
+    all_health_data = []
+    for tg in target_groups:
+        targets = descriptions[tg['TargetGroupArn']]
+        all_health_data.append({
+            'target_group_name': tg['TargetGroupName'],
+            'target_group_arn': tg['TargetGroupArn'],
+            'target_group_port': tg.get('Port', 'N/A'),
+            'protocol': tg.get('Protocol', 'N/A'),
+            'health_check_path': tg.get('HealthCheckPath', 'N/A'),
+            'health_stats': analyze_target_health(targets or []),
+            'lookup_failed': targets is None,
+            'timestamp': datetime.now().isoformat()
+        })
+    
+    return all_health_data
+
+def build_health_snapshot(all_health_data: List[Dict]) -> Dict[tuple, Dict]:
+    """
+    Flatten health data into a per-target state snapshot.
+    
+    Args:
+        all_health_data: List of health data for all target groups
+        
+    Returns:
+        Dictionary keyed by (target group ARN, target id, port) with state details
+    """
+    snapshot = {}
+    for tg_data in all_health_data:
+        for state, targets in tg_data['health_stats'].items():
+            for target in targets:
+                key = (tg_data['target_group_arn'], target['id'], target['port'])
+                snapshot[key] = {
+                    'target_group_name': tg_data['target_group_name'],
+                    'state': state,
+                    'reason': target['reason']
+                }
+    return snapshot
+
+def diff_health_snapshots(previous: Dict[tuple, Dict], current: Dict[tuple, Dict]) -> List[Dict]:
+    """
+    Find alert-worthy state transitions between two snapshots.
+    
+    A target becoming unhealthy (including one first seen unhealthy) is reported
+    as 'unhealthy'. An unhealthy target that turns healthy or is deregistered is
+    reported as 'recovered'. Other state changes do not alert.
+    
+    Args:
+        previous: Snapshot from the previous sweep (empty on the first sweep)
+        current: Snapshot from the latest sweep
+        
+    Returns:
+        List of transition dictionaries
+    """
+    transitions = []
+    
+    for key, target in current.items():
+        before = previous.get(key, {}).get('state')
+        after = target['state']
+        if after == 'unhealthy' and before != 'unhealthy':
+            kind = 'unhealthy'
+        elif before == 'unhealthy' and after == 'healthy':
+            kind = 'recovered'
+        else:
+            continue
+        transitions.append({
+            'kind': kind,
+            'target_group_arn': key[0],
+            'target_group_name': target['target_group_name'],
+            'target_id': key[1],
+            'port': key[2],
+            'from_state': before or 'new',
+            'to_state': after,
+            'reason': target['reason']
+        })
+    
+    for key, target in previous.items():
+        if key not in current and target['state'] == 'unhealthy':
+            transitions.append({
+                'kind': 'recovered',
+                'target_group_arn': key[0],
+                'target_group_name': target['target_group_name'],
+                'target_id': key[1],
+                'port': key[2],
+                'from_state': 'unhealthy',
+                'to_state': 'deregistered',
+                'reason': 'N/A'
+            })
+    
+    return transitions
+
+def format_transition_alert(transitions: List[Dict]) -> str:
+    """
+    Format state transitions into an alert message.
+    
+    Args:
+        transitions: List of transition dictionaries
+        
+    Returns:
+        Formatted alert string
+    """
+    lines = [f"ALB Health State Changes - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    for kind, title in [('unhealthy', 'NEWLY UNHEALTHY'), ('recovered', 'RECOVERED')]:
+        events = [t for t in transitions if t['kind'] == kind]
+        if not events:
+            continue
+        lines.append(f"{title}:")
+        for event in events:
+            lines.append(f"  - {event['target_group_name']}: {event['target_id']}:{event['port']} "
+                         f"{event['from_state']} -> {event['to_state']} ({event['reason']})")
+        lines.append("")
+    return "\n".join(lines)
+
+def format_duration(seconds: float) -> str:
+    """
+    Format a duration in seconds as e.g. '2h05m', '4m12s' or '38s'.
+    """
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+def generate_health_report(all_health_data: List[Dict],
+                           history: Optional[HealthHistory] = None) -> str:
     """
     Generate a formatted health report.
     
     Args:
         all_health_data: List of health data for all target groups
+        history: HealthHistory to add flap, time-in-state and MTTR lines from (optional)
         
     Returns:
         Formatted report string
     """
+    history_summaries = history.summarize() if history else {}
+    total_flaps = 0
     report_lines = []
     report_lines.append("=" * 80)
     report_lines.append(f"ALB Health Check Report - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -145,6 +295,8 @@ def generate_health_report(all_health_data: List[Dict]) -> str:
         report_lines.append(f"  Total Targets: {total_targets}")
         report_lines.append(f"  Healthy: {healthy_count}")
         report_lines.append(f"  Unhealthy: {unhealthy_count}")
+        if tg_data.get('lookup_failed'):
+            report_lines.append("  Health lookup failed")
         
         if stats['unhealthy']:
             report_lines.append("  Unhealthy Targets:")
@@ -157,34 +309,27 @@ def generate_health_report(all_health_data: List[Dict]) -> str:
         if stats['draining']:
             report_lines.append(f"  Draining: {len(stats['draining'])}")
         
+        summary = history_summaries.get(tg_arn)
+        if summary:
+            total_flaps += summary['flaps']
+            time_in_state = ", ".join(f"{state} {format_duration(seconds)}"
+                                      for state, seconds in sorted(summary['time_in_state'].items()))
+            mttr = format_duration(summary['mttr_seconds']) if summary['mttr_seconds'] is not None else 'N/A'
+            report_lines.append(f"  History: {summary['flaps']} flap(s), {summary['recoveries']} "
+                                f"recovery(ies), MTTR {mttr}")
+            report_lines.append(f"  Target time in state: {time_in_state or 'N/A'}")
+        
         report_lines.append("")
     
     report_lines.append("=" * 80)
     report_lines.append(f"Summary: {total_healthy} healthy, {total_unhealthy} unhealthy targets")
+    if history:
+        report_lines.append(f"History: {history.samples} sweep(s) of {len(history)} targets, "
+                            f"{total_flaps} flap(s)")
     report_lines.append("=" * 80)
     
     return "\n".join(report_lines)
 
-def send_sns_notification(sns_client, topic_arn: str, subject: str, message: str):
-    """
-    Send notification via SNS if unhealthy targets are detected.
-    
-    Args:
-        sns_client: Boto3 SNS client
-        topic_arn: SNS topic ARN
-        subject: Notification subject
-        message: Notification message
-    """
-    try:
-        sns_client.publish(
-            TopicArn=topic_arn,
-            Subject=subject,
-            Message=message
-        )
-        print(f"Notification sent to {topic_arn}")
-    except Exception as e:
-        print(f"Error sending SNS notification: {str(e)}")
-
 def export_to_json(all_health_data: List[Dict], filename: str = None):
     """
     Export health data to JSON file.
@@ -204,18 +349,159 @@ def export_to_json(all_health_data: List[Dict], filename: str = None):
     except Exception as e:
         print(f"Error exporting to JSON: {str(e)}")
 
+def watch_target_health(elb_client, sns_client, topic_arn: Optional[str], interval: int,
+                        refresh_interval: int = DEFAULT_REFRESH_INTERVAL,
+                        workers: int = DEFAULT_WORKERS,
+                        history_hours: float = DEFAULT_HISTORY_HOURS,
+                        report_interval: int = DEFAULT_REPORT_INTERVAL,
+                        exporter: Optional[HealthMetricsExporter] = None,
+                        dispatcher: Optional[AlertDispatcher] = None):
+    """
+    Continuously poll target health and alert only on state transitions.
+    
+    The target group list is cached and refreshed every refresh_interval seconds;
+    health is polled concurrently every interval seconds. A target group whose
+    lookup fails keeps its last known health for that sweep, so its targets don't
+    look deregistered and then newly unhealthy again. Every sweep is recorded in
+    a fixed-size HealthHistory covering history_hours, and a report with flap counts,
+    time in state and MTTR is printed every report_interval seconds. If an exporter is
+    given, each sweep is published to its /metrics page. Alerts go through an
+    AlertDispatcher, which coalesces and deduplicates them per target group incident.
+    Runs until interrupted.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        sns_client: Boto3 SNS client (or None to only print alerts)
+        topic_arn: SNS topic ARN for alerts (optional)
+        interval: Seconds between health sweeps
+        refresh_interval: Seconds between target group list refreshes
+        workers: Number of concurrent describe_target_health calls
+        history_hours: Hours of health history to keep in memory
+        report_interval: Seconds between history reports (0 to disable)
+        exporter: HealthMetricsExporter to publish sweeps to (optional)
+        dispatcher: AlertDispatcher for SNS alerts (default: one built from sns_client and topic_arn)
+    """
+    target_groups = []
+    last_refresh = None
+    last_report = time.monotonic()
+    previous = {}
+    last_health = {}  # target group ARN -> last successfully looked up health data
+    stats = FanOutStats()
+    if dispatcher is None and topic_arn and sns_client:
+        dispatcher = AlertDispatcher(sns_client, topic_arn)
+    history = HealthHistory(capacity=max(1, math.ceil(history_hours * 3600 / interval)))
+    
+    while True:
+        sweep_started = time.monotonic()
+        
+        # Refresh the cached target group list periodically
+        if last_refresh is None or sweep_started - last_refresh >= refresh_interval:
+            try:
+                target_groups = get_all_alb_target_groups(elb_client)
+                last_refresh = sweep_started
+                print(f"Refreshed target group list: {len(target_groups)} target groups")
+            except Exception:
+                print("Keeping previous target group list")
+        
+        all_health_data = collect_health_data(elb_client, target_groups, workers, stats)
+        failed_lookups = sum(1 for tg_data in all_health_data if tg_data['lookup_failed'])
+        all_health_data = [last_health.get(tg_data['target_group_arn'], tg_data) if tg_data['lookup_failed']
+                           else tg_data for tg_data in all_health_data]
+        last_health = {tg_data['target_group_arn']: tg_data for tg_data in all_health_data}
+        history.record(all_health_data)
+        current = build_health_snapshot(all_health_data)
+        transitions = diff_health_snapshots(previous, current)
+        previous = current
+        
+        unhealthy = sum(1 for t in current.values() if t['state'] == 'unhealthy')
+        elapsed = time.monotonic() - sweep_started
+        if exporter:
+            exporter.update(all_health_data, elapsed, stats)
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {len(current)} targets, "
+              f"{unhealthy} unhealthy, {len(transitions)} transition(s)"
+              + (f", {failed_lookups} failed lookup(s) kept from the previous sweep" if failed_lookups else "")
+              + f" ({elapsed:.1f}s; {stats.summary()})")
+        
+        if transitions:
+            print(format_transition_alert(transitions))
+            if dispatcher:
+                dispatcher.submit(transitions)
+                dispatcher.flush()
+                print(f"Alerts: {dispatcher.summary()}")
+        
+        if report_interval and time.monotonic() - last_report >= report_interval:
+            print("\n" + generate_health_report(all_health_data, history) + "\n")
+            last_report = time.monotonic()
+        
+        time.sleep(max(0, interval - (time.monotonic() - sweep_started)))
+
 def main():
     """
     Main execution function.
     """
+    parser = argparse.ArgumentParser(
+        description='Monitor target health across all ALB target groups'
+    )
+    parser.add_argument('--region', '-r', default=REGION,
+                       help=f'AWS region (default: {REGION})')
+    parser.add_argument('--sns-topic-arn', default=SNS_TOPIC_ARN,
+                       help='SNS topic for alerts (default: $ALB_HEALTH_SNS_TOPIC_ARN)')
+    parser.add_argument('--watch', type=int, metavar='INTERVAL',
+                       help='Run continuously, polling every INTERVAL seconds and alerting '
+                            'only on state transitions')
+    parser.add_argument('--refresh', type=int, default=DEFAULT_REFRESH_INTERVAL,
+                       help=f'Seconds between target group list refreshes in watch mode '
+                            f'(default: {DEFAULT_REFRESH_INTERVAL})')
+    parser.add_argument('--workers', '-w', type=int, default=DEFAULT_WORKERS,
+                       help=f'Concurrent describe_target_health calls (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--describe-rate', type=float, default=ELBV2_DESCRIBE_RATE,
+                       help=f'Max ELBv2 describe calls per second; lowered automatically on '
+                            f'throttling (default: {ELBV2_DESCRIBE_RATE})')
+    parser.add_argument('--history-hours', type=float, default=DEFAULT_HISTORY_HOURS,
+                       help=f'Hours of health history kept in memory in watch mode '
+                            f'(default: {DEFAULT_HISTORY_HOURS})')
+    parser.add_argument('--report-interval', type=int, default=DEFAULT_REPORT_INTERVAL,
+                       help=f'Seconds between flap/MTTR history reports in watch mode, 0 to disable '
+                            f'(default: {DEFAULT_REPORT_INTERVAL})')
+    parser.add_argument('--metrics-port', type=int,
+                       help=f'Serve Prometheus metrics on this port (implies watch mode, polling every '
+                            f'{DEFAULT_METRICS_INTERVAL}s unless --watch is given)')
+    parser.add_argument('--incident-window', type=int, default=DEFAULT_INCIDENT_WINDOW,
+                       help=f'Seconds alerts for a target group are grouped into one incident; repeats '
+                            f'within it are suppressed (default: {DEFAULT_INCIDENT_WINDOW})')
+    parser.add_argument('--alert-rate', type=float, default=DEFAULT_PUBLISH_RATE,
+                       help=f'Max SNS publish_batch calls per second (default: {DEFAULT_PUBLISH_RATE})')
+    
+    args = parser.parse_args()
+    ELBV2_DESCRIBE_LIMITER.configure(args.describe_rate, burst=max(1, int(args.describe_rate * 2)))
+    
     # Initialize clients
-    elb_client = boto3.client('elbv2', region_name=REGION)
-    sns_client = boto3.client('sns', region_name=REGION) if SNS_TOPIC_ARN else None
+    elb_client = boto3.client('elbv2', region_name=args.region)
+    sns_client = boto3.client('sns', region_name=args.region) if args.sns_topic_arn else None
+    dispatcher = None
+    if sns_client:
+        dispatcher = AlertDispatcher(sns_client, args.sns_topic_arn, args.incident_window, args.alert_rate)
     
     print("Starting ALB Health Check Monitor...")
-    print(f"Region: {REGION}")
+    print(f"Region: {args.region}")
     print("")
     
+    exporter = None
+    if args.metrics_port is not None:
+        exporter = HealthMetricsExporter(args.metrics_port)
+        exporter.start()
+        args.watch = args.watch or DEFAULT_METRICS_INTERVAL
+    
+    if args.watch:
+        print(f"Watch mode: polling every {args.watch}s, refreshing target groups every {args.refresh}s")
+        try:
+            watch_target_health(elb_client, sns_client, args.sns_topic_arn, args.watch,
+                                args.refresh, args.workers, args.history_hours, args.report_interval,
+                                exporter, dispatcher)
+        except KeyboardInterrupt:
+            print("\nWatch mode stopped.")
+        return
+    
     # Get all target groups
     target_groups = get_all_alb_target_groups(elb_client)
     print(f"Found {len(target_groups)} target groups")
@@ -225,34 +511,11 @@ def main():
         return
     
     # Collect health data for all target groups
-    all_health_data = []
-    has_unhealthy = False
-    
-    for tg in target_groups:
-        tg_arn = tg['TargetGroupArn']
-        tg_name = tg['TargetGroupName']
-        
-        print(f"Checking {tg_name}...")
-        
-        # Get target health
-        health_response = get_target_health(elb_client, tg_arn)
-        health_descriptions = health_response.get('TargetHealthDescriptions', [])
-        
-        # Analyze health
-        health_stats = analyze_target_health(health_descriptions)
-        
-        if health_stats['unhealthy']:
-            has_unhealthy = True
-        
-        all_health_data.append({
-            'target_group_name': tg_name,
-            'target_group_arn': tg_arn,
-            'target_group_port': tg.get('Port', 'N/A'),
-            'protocol': tg.get('Protocol', 'N/A'),
-            'health_check_path': tg.get('HealthCheckPath', 'N/A'),
-            'health_stats': health_stats,
-            'timestamp': datetime.now().isoformat()
-        })
+    print(f"Checking target health with {args.workers} workers...")
+    stats = FanOutStats()
+    all_health_data = collect_health_data(elb_client, target_groups, args.workers, stats)
+    print(f"Health sweep: {stats.summary()}")
+    has_unhealthy = any(tg_data['health_stats']['unhealthy'] for tg_data in all_health_data)
     
     # Generate and print report
     report = generate_health_report(all_health_data)
@@ -261,10 +524,10 @@ def main():
     # Export to JSON
     export_to_json(all_health_data)
     
-    # Send notification if unhealthy targets found
-    if has_unhealthy and SNS_TOPIC_ARN and sns_client:
-        subject = "ALB Health Check Alert - Unhealthy Targets Detected"
-        send_sns_notification(sns_client, SNS_TOPIC_ARN, subject, report)
+    # Send one alert per target group with unhealthy targets
+    if has_unhealthy and dispatcher:
+        dispatcher.submit(diff_health_snapshots({}, build_health_snapshot(all_health_data)))
+        dispatcher.flush()
     
     print("\nHealth check monitoring complete.")
 
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+ALB Health Metrics Exporter
+
+Prometheus/OpenMetrics text endpoint for alb_health_check_monitor. The monitor's
+watch loop publishes each health sweep to the exporter, which renders the metrics
+page once per sweep; scrapes of /metrics are served from that cached page and never
+trigger AWS calls.
+
+Use Cases:
+- Scraping ALB target health into Prometheus instead of parsing JSON reports
+- Alerting on unhealthy target counts from the metrics stack
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional
+from alb_fanout import FanOutStats
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+EXPORTED_STATES = ['healthy', 'unhealthy', 'initial', 'draining', 'unused', 'unavailable']
+
+def _escape_label(value) -> str:
+    """
+    Escape a label value for the Prometheus text format.
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_metrics(all_health_data: List[Dict], sweep_seconds: float, sweeps: int,
+                   sweep_timestamp: float, stats: Optional[FanOutStats] = None) -> str:
+    """
+    Render one health sweep in the Prometheus text exposition format.
+    
+    Args:
+        all_health_data: Health data from collect_health_data()
+        sweep_seconds: Duration of the sweep in seconds
+        sweeps: Number of sweeps completed so far
+        sweep_timestamp: Epoch time the sweep finished
+        stats: Cumulative FanOutStats of the poller's API calls (optional)
+        
+    Returns:
+        Metrics page text
+    """
+    lines = [
+        '# HELP alb_target_group_targets Targets in each health state per target group.',
+        '# TYPE alb_target_group_targets gauge'
+    ]
+    for tg_data in all_health_data:
+        labels = (f'target_group="{_escape_label(tg_data["target_group_name"])}",'
+                  f'target_group_arn="{_escape_label(tg_data["target_group_arn"])}"')
+        for state in EXPORTED_STATES:
+            count = len(tg_data['health_stats'].get(state, []))
+            lines.append(f'alb_target_group_targets{{{labels},state="{state}"}} {count}')
+    
+    lines += [
+        '# HELP alb_health_sweep_duration_seconds Duration of the last health sweep.',
+        '# TYPE alb_health_sweep_duration_seconds gauge',
+        f'alb_health_sweep_duration_seconds {sweep_seconds:.6f}',
+        '# HELP alb_health_last_sweep_timestamp_seconds Time the last health sweep finished.',
+        '# TYPE alb_health_last_sweep_timestamp_seconds gauge',
+        f'alb_health_last_sweep_timestamp_seconds {sweep_timestamp:.3f}',
+        '# HELP alb_health_sweeps_total Health sweeps completed.',
+        '# TYPE alb_health_sweeps_total counter',
+        f'alb_health_sweeps_total {sweeps}',
+    ]
+    
+    if stats:
+        for name, value, help_text in [
+            ('alb_health_api_calls_total', stats.calls, 'ELBv2 describe calls made by the poller.'),
+            ('alb_health_api_throttles_total', stats.throttles, 'ELBv2 describe calls that were throttled.'),
+            ('alb_health_api_errors_total', stats.errors, 'ELBv2 describe calls that failed.'),
+        ]:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter', f'{name} {value}']
+    
+    return '\n'.join(lines) + '\n'
+
+class HealthMetricsExporter:
+    """
+    Serves the latest rendered health sweep on an HTTP /metrics endpoint.
+    
+    update() is called by the poller after every sweep; the HTTP server runs in a
+    daemon thread and only ever reads the cached page.
+    """
+    
+    def __init__(self, port: int, address: str = ''):
+        self.port = port
+        self.address = address
+        self.sweeps = 0
+        self._page = b'# No health sweep completed yet\n'
+        self._lock = threading.Lock()
+        self._server = None
+    
+    def update(self, all_health_data: List[Dict], sweep_seconds: float,
+               stats: Optional[FanOutStats] = None):
+        """
+        Publish a completed health sweep.
+        
+        Args:
+            all_health_data: Health data from collect_health_data()
+            sweep_seconds: Duration of the sweep in seconds
+            stats: Cumulative FanOutStats of the poller's API calls (optional)
+        """
+        page = render_metrics(all_health_data, sweep_seconds, self.sweeps + 1, time.time(), stats)
+        with self._lock:
+            self.sweeps += 1
+            self._page = page.encode('utf-8')
+    
+    def page(self) -> bytes:
+        """
+        Get the cached metrics page.
+        """
+        with self._lock:
+            return self._page
+    
+    def start(self):
+        """
+        Start serving /metrics in a background daemon thread.
+        """
+        exporter = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.page()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer((self.address, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Serving metrics on http://{self.address or '0.0.0.0'}:{self.port}/metrics")
+    
+    def stop(self):
+        """
+        Stop the HTTP server.
+        """
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
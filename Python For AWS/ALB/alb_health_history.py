@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+ALB Health History
+
+Compact in-process history of target health for alb_health_check_monitor's watch mode.
+Every sweep writes one byte per target (a state code) into a fixed-size ring buffer,
+with a single shared timestamp ring for all targets, so 50k targets x 24h of one-minute
+samples fits in about 100 MB regardless of how long the monitor runs.
+
+Exposes per-target-group flap counts, time in each state and mean time to recovery.
+
+Use Cases:
+- Flapping target detection
+- MTTR and availability reporting without re-reading old JSON dumps
+"""
+
+import time
+from array import array
+from typing import List, Dict, Optional
+
+# One byte per sample; 0 means the target was not registered during that sweep
+STATE_CODES = {
+    'healthy': 1,
+    'unhealthy': 2,
+    'initial': 3,
+    'draining': 4,
+    'unused': 5,
+    'unavailable': 6,
+}
+STATE_NAMES = {code: name for name, code in STATE_CODES.items()}
+ABSENT = 0
+HEALTHY = STATE_CODES['healthy']
+UNHEALTHY = STATE_CODES['unhealthy']
+
+class _TargetSeries:
+    """
+    Ring buffer of state codes for one target, aligned with the shared sample clock.
+    """
+    __slots__ = ('target_group_arn', 'target_id', 'port', 'states')
+    
+    def __init__(self, target_group_arn: str, target_id: str, port: int, capacity: int):
+        self.target_group_arn = target_group_arn
+        self.target_id = target_id
+        self.port = port
+        self.states = bytearray(capacity)
+
+class HealthHistory:
+    """
+    Fixed-size ring buffer of per-target health states.
+    
+    Samples are recorded once per sweep with record(); the oldest sweep is
+    overwritten once capacity is reached. Targets absent for the whole window
+    are dropped.
+    """
+    
+    def __init__(self, capacity: int = 1440):
+        self.capacity = capacity
+        self.samples = 0
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._next = 0
+        self._series = {}
+    
+    def __len__(self) -> int:
+        return len(self._series)
+    
+    def record(self, all_health_data: List[Dict], timestamp: Optional[float] = None):
+        """
+        Record one sweep of health data.
+        
+        Args:
+            all_health_data: Health data from collect_health_data()
+            timestamp: Sweep time in epoch seconds (default: now)
+        """
+        slot = self._next
+        self._timestamps[slot] = time.time() if timestamp is None else timestamp
+        for series in self._series.values():
+            series.states[slot] = ABSENT
+        
+        for tg_data in all_health_data:
+            tg_arn = tg_data['target_group_arn']
+            for state, targets in tg_data['health_stats'].items():
+                code = STATE_CODES.get(state, ABSENT)
+                for target in targets:
+                    key = (tg_arn, target['id'], target['port'])
+                    series = self._series.get(key)
+                    if series is None:
+                        series = _TargetSeries(tg_arn, target['id'], target['port'], self.capacity)
+                        self._series[key] = series
+                    series.states[slot] = code
+        
+        self._next = (slot + 1) % self.capacity
+        self.samples = min(self.samples + 1, self.capacity)
+        
+        # Once per lap of the ring, drop targets not seen anywhere in the window
+        if self._next == 0:
+            self._series = {key: series for key, series in self._series.items()
+                            if series.states.count(ABSENT) < self.capacity}
+    
+    def _ordered(self, buffer):
+        """
+        Return the valid part of a ring buffer, oldest sample first.
+        """
+        if self.samples < self.capacity:
+            return buffer[:self.samples]
+        return buffer[self._next:] + buffer[:self._next]
+    
+    def _durations(self, now: Optional[float] = None) -> List[float]:
+        """
+        Seconds each sample represents: until the next sample, or until now for the latest.
+        """
+        timestamps = list(self._ordered(self._timestamps))
+        if not timestamps:
+            return []
+        end = max(timestamps[-1], time.time() if now is None else now)
+        return [after - before for before, after in zip(timestamps, timestamps[1:] + [end])]
+    
+    def summarize_target_group(self, target_group_arn: str, now: Optional[float] = None) -> Dict:
+        """
+        Summarize the history of one target group.
+        
+        A flap is a healthy -> unhealthy transition. Recovery time is measured from
+        the first unhealthy sample of an episode to the first healthy sample after it;
+        episodes still open are not counted towards MTTR.
+        
+        Args:
+            target_group_arn: ARN of the target group
+            now: Current time in epoch seconds (default: now)
+            
+        Returns:
+            Dictionary with targets, flaps, recoveries, mttr_seconds and
+            time_in_state (state name -> seconds, summed over targets)
+        """
+        return self.summarize(now).get(target_group_arn, self._empty_summary())
+    
+    @staticmethod
+    def _empty_summary() -> Dict:
+        return {'targets': 0, 'flaps': 0, 'recoveries': 0, 'mttr_seconds': None, 'time_in_state': {}}
+    
+    def summarize(self, now: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Summarize every target group in the history.
+        
+        Args:
+            now: Current time in epoch seconds (default: now)
+            
+        Returns:
+            Dictionary mapping target group ARN to its summary (see summarize_target_group)
+        """
+        durations = self._durations(now)
+        timestamps = list(self._ordered(self._timestamps))
+        total_duration = sum(durations)
+        summaries = {}
+        recovery_times = {}
+        
+        for series in self._series.values():
+            summary = summaries.setdefault(series.target_group_arn, self._empty_summary())
+            summary['targets'] += 1
+            states = self._ordered(series.states)
+            time_in_state = summary['time_in_state']
+            
+            # Steady targets (the common case) are summarized without walking samples
+            if states.count(states[0]) == len(states):
+                if states[0] != ABSENT:
+                    name = STATE_NAMES[states[0]]
+                    time_in_state[name] = time_in_state.get(name, 0.0) + total_duration
+                continue
+            
+            previous = ABSENT
+            episode_start = None
+            for code, duration, timestamp in zip(states, durations, timestamps):
+                if code != ABSENT:
+                    name = STATE_NAMES[code]
+                    time_in_state[name] = time_in_state.get(name, 0.0) + duration
+                if code == UNHEALTHY and previous != UNHEALTHY:
+                    episode_start = timestamp
+                    if previous == HEALTHY:
+                        summary['flaps'] += 1
+                elif code == HEALTHY and previous == UNHEALTHY and episode_start is not None:
+                    recovery_times.setdefault(series.target_group_arn, []).append(timestamp - episode_start)
+                    episode_start = None
+                if code != ABSENT:
+                    previous = code
+        
+        for tg_arn, times in recovery_times.items():
+            summaries[tg_arn]['recoveries'] = len(times)
+            summaries[tg_arn]['mttr_seconds'] = sum(times) / len(times)
+        
+        return summaries
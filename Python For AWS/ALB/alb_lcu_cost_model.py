@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+ALB LCU Cost Model
+
+Estimates Application Load Balancer cost from hourly Load Balancer Capacity Unit (LCU)
+usage. Hourly ConsumedLCUs, NewConnectionCount, ActiveConnectionCount, ProcessedBytes
+and RuleEvaluations are pulled for the whole fleet with batched GetMetricData calls and
+held as NumPy arrays (ALBs x hours), so billing is computed for every ALB and hour at once.
+
+Each hour is billed on the largest of the four LCU dimensions. When CloudWatch reports
+ConsumedLCUs for an hour, that value is used as-is; otherwise the dimension maximum is.
+
+Requires NumPy: pip install numpy
+
+Use Cases:
+- Accurate monthly cost estimates for ranking ALBs
+- LCU utilisation percentiles for right-sizing and consolidation
+"""
+
+import numpy as np
+from datetime import datetime, timedelta
+from typing import List, Dict
+
+# us-east-1 on-demand pricing; override for other regions
+ALB_HOURLY_PRICE = 0.0225
+LCU_HOURLY_PRICE = 0.008
+HOURS_PER_MONTH = 730
+
+# One LCU provides, per hour:
+NEW_CONNECTIONS_PER_SECOND = 25
+ACTIVE_CONNECTIONS_PER_MINUTE = 3000
+PROCESSED_BYTES_PER_HOUR = 1024 ** 3  # 1 GB for EC2/IP targets
+RULE_EVALUATIONS_PER_SECOND = 1000
+
+# (series key, metric name, statistic)
+LCU_METRICS = [
+    ('consumed_lcus', 'ConsumedLCUs', 'Average'),
+    ('new_connections', 'NewConnectionCount', 'Sum'),
+    ('active_connections', 'ActiveConnectionCount', 'Sum'),
+    ('processed_bytes', 'ProcessedBytes', 'Sum'),
+    ('rule_evaluations', 'RuleEvaluations', 'Sum'),
+]
+
+LCU_DIMENSIONS = ['new_connections', 'active_connections', 'processed_bytes', 'rule_evaluations']
+
+# Every metric needs a raw query plus a FILL() expression, and both must be in
+# the same GetMetricData request (limit 500 queries)
+ALBS_PER_REQUEST = 500 // (2 * len(LCU_METRICS))
+
+# FILL() value marking hours with no ConsumedLCUs datapoint
+MISSING_VALUE = -1
+
+def build_lcu_queries(index: int, dimension: str) -> List[Dict]:
+    """
+    Build the GetMetricData queries for one ALB.
+    
+    Each metric is wrapped in FILL() so CloudWatch returns a dense hourly series and
+    values can be loaded into arrays without aligning individual timestamps.
+    
+    Args:
+        index: Position of the ALB in the fleet arrays
+        dimension: LoadBalancer dimension value (app/<name>/<id>)
+        
+    Returns:
+        List of MetricDataQueries entries
+    """
+    queries = []
+    for key, metric_name, stat in LCU_METRICS:
+        raw_id = f"raw_{key}_{index}"
+        fill_value = MISSING_VALUE if key == 'consumed_lcus' else 0
+        queries.append({
+            'Id': raw_id,
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': 'AWS/ApplicationELB',
+                    'MetricName': metric_name,
+                    'Dimensions': [{'Name': 'LoadBalancer', 'Value': dimension}]
+                },
+                'Period': 3600,
+                'Stat': stat
+            },
+            'ReturnData': False
+        })
+        queries.append({
+            'Id': f"{key}_{index}",
+            'Expression': f"FILL({raw_id}, {fill_value})",
+            'ReturnData': True
+        })
+    return queries
+
+def fetch_hourly_lcu_metrics(cloudwatch_client, dimensions: List[str],
+                             days: int = 30) -> Dict[str, np.ndarray]:
+    """
+    Fetch hourly LCU metrics for a fleet of ALBs into (ALBs x hours) arrays.
+    
+    Args:
+        cloudwatch_client: Boto3 CloudWatch client
+        dimensions: LoadBalancer dimension values, one per ALB
+        days: Number of days to look back
+        
+    Returns:
+        Dictionary mapping series key to a float array of shape (len(dimensions), hours).
+        Hours without a ConsumedLCUs datapoint are NaN; other metrics default to 0.
+    """
+    end_time = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    start_time = end_time - timedelta(days=days)
+    hours = days * 24
+    
+    series = {key: np.zeros((len(dimensions), hours)) for key, _, _ in LCU_METRICS}
+    series['consumed_lcus'].fill(np.nan)
+    
+    paginator = cloudwatch_client.get_paginator('get_metric_data')
+    for offset in range(0, len(dimensions), ALBS_PER_REQUEST):
+        queries = []
+        for index in range(offset, min(offset + ALBS_PER_REQUEST, len(dimensions))):
+            queries.extend(build_lcu_queries(index, dimensions[index]))
+        
+        # Pages arrive in timestamp order, so each result's values can be concatenated
+        first_timestamps = {}
+        values = {}
+        try:
+            for page in paginator.paginate(MetricDataQueries=queries,
+                                           StartTime=start_time,
+                                           EndTime=end_time,
+                                           ScanBy='TimestampAscending'):
+                for result in page['MetricDataResults']:
+                    if result.get('Timestamps'):
+                        first_timestamps.setdefault(result['Id'], result['Timestamps'][0])
+                    values.setdefault(result['Id'], []).extend(result.get('Values', []))
+        except Exception as e:
+            print(f"Error getting LCU metrics for ALBs {offset}-{offset + ALBS_PER_REQUEST - 1}: {str(e)}")
+            continue
+        
+        for query_id, first_timestamp in first_timestamps.items():
+            key, index = query_id.rsplit('_', 1)
+            start_hour = int((first_timestamp.replace(tzinfo=None) - start_time).total_seconds() // 3600)
+            row = np.asarray(values[query_id], dtype=float)[:max(0, hours - start_hour)]
+            series[key][int(index), start_hour:start_hour + len(row)] = row
+    
+    series['consumed_lcus'][series['consumed_lcus'] == MISSING_VALUE] = np.nan
+    return series
+
+def compute_lcu_costs(series: Dict[str, np.ndarray],
+                      alb_hourly_price: float = ALB_HOURLY_PRICE,
+                      lcu_hourly_price: float = LCU_HOURLY_PRICE) -> Dict[str, np.ndarray]:
+    """
+    Compute per-hour LCU billing and monthly cost for every ALB at once.
+    
+    Args:
+        series: Arrays from fetch_hourly_lcu_metrics()
+        alb_hourly_price: Price per ALB-hour
+        lcu_hourly_price: Price per LCU-hour
+        
+    Returns:
+        Dictionary of per-ALB arrays: monthly_cost, lcu_monthly_cost, lcu_hours,
+        lcu_p50, lcu_p95, lcu_p99, lcu_max and dominant_dimension (index into LCU_DIMENSIONS)
+    """
+    dimension_lcus = np.stack([
+        series['new_connections'] / (3600 * NEW_CONNECTIONS_PER_SECOND),
+        series['active_connections'] / 60 / ACTIVE_CONNECTIONS_PER_MINUTE,
+        series['processed_bytes'] / PROCESSED_BYTES_PER_HOUR,
+        series['rule_evaluations'] / (3600 * RULE_EVALUATIONS_PER_SECOND),
+    ])
+    
+    # Bill each hour on its largest dimension unless CloudWatch reported ConsumedLCUs
+    consumed = series['consumed_lcus']
+    billed = np.where(np.isnan(consumed), dimension_lcus.max(axis=0), consumed)
+    
+    lcu_hours = billed.sum(axis=1)
+    lcu_monthly_cost = lcu_hours / billed.shape[1] * HOURS_PER_MONTH * lcu_hourly_price
+    p50, p95, p99 = np.percentile(billed, [50, 95, 99], axis=1)
+    
+    return {
+        'monthly_cost': HOURS_PER_MONTH * alb_hourly_price + lcu_monthly_cost,
+        'lcu_monthly_cost': lcu_monthly_cost,
+        'lcu_hours': lcu_hours,
+        'lcu_p50': p50,
+        'lcu_p95': p95,
+        'lcu_p99': p99,
+        'lcu_max': billed.max(axis=1),
+        'dominant_dimension': dimension_lcus.sum(axis=2).argmax(axis=0),
+    }
+
+def estimate_lcu_costs(cloudwatch_client, dimensions: List[str], days: int = 30,
+                       alb_hourly_price: float = ALB_HOURLY_PRICE,
+                       lcu_hourly_price: float = LCU_HOURLY_PRICE) -> List[Dict]:
+    """
+    Fetch LCU metrics and estimate monthly cost for a fleet of ALBs.
+    
+    Args:
+        cloudwatch_client: Boto3 CloudWatch client
+        dimensions: LoadBalancer dimension values, one per ALB
+        days: Number of days of hourly data to use
+        alb_hourly_price: Price per ALB-hour
+        lcu_hourly_price: Price per LCU-hour
+        
+    Returns:
+        List of per-ALB cost dictionaries, in the same order as dimensions
+    """
+    costs = compute_lcu_costs(fetch_hourly_lcu_metrics(cloudwatch_client, dimensions, days),
+                              alb_hourly_price, lcu_hourly_price)
+    
+    return [
+        {
+            'estimated_monthly_cost': round(float(costs['monthly_cost'][i]), 2),
+            'lcu_monthly_cost': round(float(costs['lcu_monthly_cost'][i]), 2),
+            'lcu_hours': round(float(costs['lcu_hours'][i]), 2),
+            'lcu_p50': round(float(costs['lcu_p50'][i]), 4),
+            'lcu_p95': round(float(costs['lcu_p95'][i]), 4),
+            'lcu_p99': round(float(costs['lcu_p99'][i]), 4),
+            'lcu_max': round(float(costs['lcu_max'][i]), 4),
+            'dominant_dimension': LCU_DIMENSIONS[int(costs['dominant_dimension'][i])]
+        }
+        for i in range(len(dimensions))
+    ]
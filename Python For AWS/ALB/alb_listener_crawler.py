@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+ALB Listener Crawler
+
+Concurrent crawler for load balancer listeners and their full certificate lists.
+Listeners of every load balancer are fetched through a bounded worker pool, and
+describe_listener_certificates is called for each HTTPS listener so SNI certificates
+are included alongside the default one. Results are yielded as each load balancer
+completes. Every API call goes through the shared ELBv2 describe rate limiter.
+
+Use Cases:
+- Region-wide certificate scans that include SNI certificates
+- Finding every listener that references a certificate
+"""
+
+from typing import Iterator, List, Dict, Optional
+from alb_fanout import (FanOutStats, call_with_backoff, iter_fan_out,
+                        ELBV2_DESCRIBE_LIMITER, DEFAULT_WORKERS)
+
+def _paginate(elb_client, operation: str, result_key: str, stats: Optional[FanOutStats], **kwargs) -> List[Dict]:
+    """
+    Collect every page of a describe call, drawing one rate limiter token per page.
+    """
+    items = []
+    marker = None
+    while True:
+        params = dict(kwargs, Marker=marker) if marker else kwargs
+        response = call_with_backoff(lambda p: getattr(elb_client, operation)(**p), params,
+                                     ELBV2_DESCRIBE_LIMITER, stats)
+        items.extend(response.get(result_key, []))
+        marker = response.get('NextMarker')
+        if not marker:
+            return items
+
+def get_listener_certificates(elb_client, listener_arn: str,
+                              stats: Optional[FanOutStats] = None) -> List[Dict]:
+    """
+    Get every certificate attached to a listener, default and SNI.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        listener_arn: ARN of the listener
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        List of certificate dictionaries with CertificateArn and IsDefault
+    """
+    return _paginate(elb_client, 'describe_listener_certificates', 'Certificates', stats,
+                     ListenerArn=listener_arn)
+
+def crawl_listener_certificates(elb_client, load_balancers: List[Dict], workers: int = DEFAULT_WORKERS,
+                                stats: Optional[FanOutStats] = None,
+                                failed: Optional[List[Dict]] = None) -> Iterator[Dict]:
+    """
+    Crawl listeners and their certificates for many load balancers concurrently.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        load_balancers: Load balancer dictionaries
+        workers: Number of load balancers crawled concurrently
+        stats: FanOutStats to record API calls into (optional)
+        failed: List to append load balancers whose listeners couldn't be crawled to (optional);
+                their listeners are reported and left out of the results
+                
+    Yields:
+        One dictionary per listener, as each load balancer completes, with
+        load_balancer, listener and certificates (empty for non-HTTPS listeners)
+    """
+    def crawl(lb):
+        listeners = _paginate(elb_client, 'describe_listeners', 'Listeners', stats,
+                              LoadBalancerArn=lb['LoadBalancerArn'])
+        results = []
+        for listener in listeners:
+            certificates = []
+            if listener.get('Protocol') == 'HTTPS':
+                certificates = get_listener_certificates(elb_client, listener['ListenerArn'], stats)
+            results.append({'load_balancer': lb, 'listener': listener, 'certificates': certificates})
+        return results
+    
+    def on_error(lb, error):
+        print(f"Error retrieving listeners for {lb['LoadBalancerName']}: {str(error)}")
+        if failed is not None:
+            failed.append(lb)
+        return []
+    
+    # Calls are rate limited and retried individually inside crawl()
+    for _, results in iter_fan_out(crawl, load_balancers, workers, rate_limiter=None,
+                                   on_error=on_error, max_retries=0):
+        yield from results
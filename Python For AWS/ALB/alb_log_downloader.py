@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+ALB Log Downloader
+
+Concurrent, resumable download of ALB log objects. Objects are fetched through a
+bounded thread pool sharing one S3 client (size its connection pool to the worker
+count), streamed to a .part file and renamed when complete. Each completed file's
+ETag is appended to a manifest in the output directory, so a re-run skips files
+already present with matching size and ETag and an interrupted run resumes where
+it stopped. Throughput is reported in MB/s and objects/s.
+
+Use Cases:
+- Downloading thousands of log files for a multi-hour incident window
+- Resuming interrupted downloads without re-fetching completed files
+"""
+
+import json
+import os
+import threading
+import time
+from typing import List, Dict, Optional
+from alb_fanout import FanOutStats, iter_fan_out, DEFAULT_WORKERS
+
+MANIFEST_NAME = '.alb-log-manifest.jsonl'
+CHUNK_SIZE = 1024 * 1024
+
+class DownloadStats:
+    """
+    Thread-safe object and byte counters for a download run.
+    """
+    
+    def __init__(self):
+        self.downloaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def record(self, size: int = 0, skipped: bool = False, failed: bool = False):
+        """
+        Record one object outcome.
+        """
+        with self._lock:
+            if failed:
+                self.failed += 1
+            elif skipped:
+                self.skipped += 1
+            else:
+                self.downloaded += 1
+                self.bytes += size
+    
+    def summary(self) -> str:
+        """
+        Format the counters and throughput as a one-line summary.
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (f"{self.downloaded} object(s) ({self.bytes / 1024 / 1024:.1f} MB) downloaded in {elapsed:.1f}s: "
+                f"{self.bytes / 1024 / 1024 / elapsed:.2f} MB/s, {self.downloaded / elapsed:.1f} objects/s; "
+                f"{self.skipped} already present, {self.failed} failed")
+
+class DownloadManifest:
+    """
+    Append-only JSON Lines record of completed downloads (file name, size, ETag).
+    """
+    
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['file']] = entry
+    
+    def is_complete(self, filename: str, path: str, size: int, etag: str) -> bool:
+        """
+        Check whether a file was downloaded completely from the same object version.
+        """
+        entry = self.entries.get(filename)
+        return (entry is not None and entry['etag'] == etag and entry['size'] == size
+                and os.path.exists(path) and os.path.getsize(path) == size)
+    
+    def add(self, filename: str, size: int, etag: str):
+        """
+        Record a completed download.
+        """
+        entry = {'file': filename, 'size': size, 'etag': etag}
+        with self._lock:
+            self.entries[filename] = entry
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+
+def download_log_object(s3_client, bucket: str, obj: Dict, output_dir: str) -> str:
+    """
+    Stream one object to output_dir through a .part file.
+    
+    The GET is conditional on the listed ETag, so an object replaced since it was
+    listed fails instead of being saved under the old ETag.
+    
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Bucket name
+        obj: Object dictionary with Key and ETag
+        output_dir: Directory to write into
+        
+    Returns:
+        Path of the downloaded file
+    """
+    filename = obj['Key'].split('/')[-1]
+    path = os.path.join(output_dir, filename)
+    part_path = path + '.part'
+    response = s3_client.get_object(Bucket=bucket, Key=obj['Key'], IfMatch=f'"{obj["ETag"]}"')
+    with open(part_path, 'wb') as f:
+        for chunk in response['Body'].iter_chunks(CHUNK_SIZE):
+            f.write(chunk)
+    os.replace(part_path, path)
+    return path
+
+def download_log_objects(s3_client, bucket: str, objects: List[Dict], output_dir: str,
+                         workers: int = DEFAULT_WORKERS, stats: Optional[FanOutStats] = None,
+                         progress_every: int = 100) -> DownloadStats:
+    """
+    Download log objects concurrently, skipping files completed by an earlier run.
+    
+    Args:
+        s3_client: Boto3 S3 client shared by all workers
+        bucket: Bucket name
+        objects: Object dictionaries with Key, Size and ETag (see alb_log_locator)
+        output_dir: Directory to download into
+        workers: Number of concurrent downloads
+        stats: FanOutStats to record per-object download latency into (optional)
+        progress_every: Print progress after this many objects (0 to disable)
+        
+    Returns:
+        DownloadStats for the run
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = DownloadManifest(output_dir)
+    download_stats = DownloadStats()
+    
+    to_download = []
+    for obj in objects:
+        filename = obj['Key'].split('/')[-1]
+        if manifest.is_complete(filename, os.path.join(output_dir, filename), obj['Size'], obj['ETag']):
+            download_stats.record(skipped=True)
+        else:
+            to_download.append(obj)
+    if download_stats.skipped:
+        print(f"Skipping {download_stats.skipped} file(s) already downloaded")
+    
+    def download(obj):
+        download_log_object(s3_client, bucket, obj, output_dir)
+        manifest.add(obj['Key'].split('/')[-1], obj['Size'], obj['ETag'])
+        return True
+    
+    def on_error(obj, error):
+        print(f"Error downloading {obj['Key']}: {str(error)}")
+        return False
+    
+    done = 0
+    for obj, ok in iter_fan_out(download, to_download, workers, rate_limiter=None,
+                                stats=stats, on_error=on_error):
+        download_stats.record(obj['Size'], failed=not ok)
+        done += 1
+        if progress_every and done % progress_every == 0:
+            print(f"  {done}/{len(to_download)}: {download_stats.summary()}")
+    return download_stats
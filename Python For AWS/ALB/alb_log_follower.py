@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+ALB Log Follower
+
+Near-real-time discovery of new ALB log objects. S3 object-created
+notifications are consumed from an SQS queue with long polling, so a new log
+file is picked up within seconds of landing; notifications are accepted as
+delivered by S3 directly, wrapped by an SNS topic, or forwarded by EventBridge.
+Without a queue (or while it can't be read) the log partitions are polled
+instead, through the locator or the persisted key index. New objects are
+handed out in batches, and a queue message is deleted only once the consumer
+has processed its objects. Objects the consumer fails on are retried: their
+messages are left for SQS to redeliver, and polling lists them again; a crash
+leaves the whole batch to be redelivered.
+
+Both clients take an endpoint URL, so the loop runs against a local SQS/S3
+stand-in such as LocalStack or moto's server mode.
+
+Use Cases:
+- Following an ALB's logs live during an incident
+- Feeding the log store continuously instead of re-running a moving window
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Dict, Optional
+from urllib.parse import unquote_plus
+from alb_fanout import DEFAULT_WORKERS
+from alb_log_locator import get_log_file_load_balancer_id, parse_log_key_time, locate_log_objects
+
+DEFAULT_WAIT_TIME = 20  # SQS long-poll maximum
+DEFAULT_POLL_INTERVAL = 30
+MAX_BATCH_MESSAGES = 100
+SQS_BATCH_SIZE = 10  # Limit for receive_message and delete_message_batch
+
+# Log files are normally delivered within minutes of their interval; polling
+# re-lists this far back, and keys are remembered for twice as long
+FOLLOW_LOOKBACK = timedelta(hours=1)
+
+def parse_s3_event_message(body: str) -> List[Dict]:
+    """
+    Get the created objects from an S3 event notification message.
+    
+    Handles S3 notifications (including ones wrapped in an SNS envelope) and
+    EventBridge "Object Created" events. Test events and other event types
+    yield no objects.
+    
+    Args:
+        body: SQS message body
+        
+    Returns:
+        List of object dictionaries with Bucket, Key, Size and ETag
+        
+    Raises:
+        ValueError: If the body isn't JSON
+    """
+    message = json.loads(body)
+    if message.get('Type') == 'Notification' and 'Message' in message:
+        message = json.loads(message['Message'])
+    
+    if message.get('detail-type') == 'Object Created':
+        detail = message['detail']
+        return [{'Bucket': detail['bucket']['name'], 'Key': detail['object']['key'],
+                 'Size': detail['object'].get('size', 0), 'ETag': detail['object'].get('etag', '')}]
+    
+    objects = []
+    for record in message.get('Records', []):
+        if not record.get('eventName', '').startswith('ObjectCreated:'):
+            continue
+        s3_object = record['s3']['object']
+        objects.append({'Bucket': record['s3']['bucket']['name'],
+                        # Keys in S3 notifications are URL-encoded
+                        'Key': unquote_plus(s3_object['key']),
+                        'Size': s3_object.get('size', 0),
+                        'ETag': s3_object.get('eTag', '').strip('"')})
+    return objects
+
+class SqsLogSource:
+    """
+    New log objects from S3 notifications delivered to an SQS queue.
+    """
+    
+    def __init__(self, sqs_client, queue_url: str, bucket: str, prefix: str, account_id: str, region: str,
+                 start_time: datetime, load_balancer: Optional[str] = None,
+                 wait_time: int = DEFAULT_WAIT_TIME):
+        self.sqs = sqs_client
+        self.queue_url = queue_url
+        self.bucket = bucket
+        base = f"{prefix.strip('/')}/" if prefix.strip('/') else ''
+        self.key_prefix = f"{base}AWSLogs/{account_id}/elasticloadbalancing/{region}/"
+        self.start_time = start_time
+        self.load_balancer_id = get_log_file_load_balancer_id(load_balancer) if load_balancer else None
+        self.wait_time = wait_time
+    
+    def _matches(self, obj: Dict) -> Optional[datetime]:
+        """
+        Get the interval end time of a notified object, or None if it isn't a log file being followed.
+        """
+        if obj['Bucket'] != self.bucket or not obj['Key'].startswith(self.key_prefix):
+            return None
+        key_time = parse_log_key_time(obj['Key'])
+        if key_time is None or key_time <= self.start_time:
+            return None
+        if self.load_balancer_id and obj['Key'].rsplit('/', 1)[-1].split('_')[3] != self.load_balancer_id:
+            return None
+        return key_time
+    
+    def receive(self) -> tuple:
+        """
+        Long-poll the queue, then drain what's already waiting (up to MAX_BATCH_MESSAGES).
+        
+        Returns:
+            (object dictionaries with Key, Size, ETag, Time and the ReceiptHandle of their
+            message, receipt handles of every message read)
+        """
+        response = self.sqs.receive_message(QueueUrl=self.queue_url, MaxNumberOfMessages=SQS_BATCH_SIZE,
+                                            WaitTimeSeconds=self.wait_time)
+        messages = response.get('Messages', [])
+        while messages and len(messages) < MAX_BATCH_MESSAGES:
+            more = self.sqs.receive_message(QueueUrl=self.queue_url, MaxNumberOfMessages=SQS_BATCH_SIZE,
+                                            WaitTimeSeconds=0).get('Messages', [])
+            if not more:
+                break
+            messages.extend(more)
+        
+        objects, receipts = [], []
+        for message in messages:
+            receipts.append(message['ReceiptHandle'])
+            try:
+                notified = parse_s3_event_message(message['Body'])
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Skipping unreadable message {message.get('MessageId')}: {str(e)}")
+                continue
+            for obj in notified:
+                key_time = self._matches(obj)
+                if key_time is not None:
+                    objects.append({'Key': obj['Key'], 'Size': obj['Size'], 'ETag': obj['ETag'], 'Time': key_time,
+                                    'ReceiptHandle': message['ReceiptHandle']})
+        return objects, receipts
+    
+    def delete(self, receipts: List[str]):
+        """
+        Delete processed messages from the queue.
+        """
+        for offset in range(0, len(receipts), SQS_BATCH_SIZE):
+            entries = [{'Id': str(i), 'ReceiptHandle': receipt}
+                       for i, receipt in enumerate(receipts[offset:offset + SQS_BATCH_SIZE])]
+            response = self.sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            for failure in response.get('Failed', []):
+                print(f"Error deleting message: {failure.get('Message', failure.get('Code'))}")
+
+class PollingLogSource:
+    """
+    New log objects found by re-listing the recent log partitions.
+    """
+    
+    def __init__(self, s3_client, bucket: str, prefix: str, account_id: str, region: str,
+                 start_time: datetime, load_balancer: Optional[str] = None,
+                 workers: int = DEFAULT_WORKERS, index=None):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.account_id = account_id
+        self.region = region
+        self.since = start_time
+        self.load_balancer = load_balancer
+        self.workers = workers
+        self.index = index
+    
+    def receive(self) -> List[Dict]:
+        """
+        List the log objects from the last FOLLOW_LOOKBACK (or the start time, if later) until now.
+        
+        Returns:
+            Object dictionaries with Key, Size, ETag and Time; objects returned by
+            an earlier call are listed again
+        """
+        now = datetime.utcnow()
+        objects = locate_log_objects(self.s3, self.bucket, self.prefix, self.account_id, self.region,
+                                     self.since, now, self.load_balancer, self.workers, index=self.index)
+        self.since = max(self.since, now - FOLLOW_LOOKBACK)
+        return objects
+
+def follow_log_objects(process: Callable[[List[Dict]], List[Dict]], poll_source: PollingLogSource,
+                       queue_source: Optional[SqsLogSource] = None,
+                       poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """
+    Hand batches of new log objects to process() as they land, until interrupted.
+    
+    The first batch is a poll covering everything since the start time. After
+    that, notifications are read from the queue if there is one; without a queue,
+    or whenever the queue can't be read, the partitions are polled every
+    poll_interval seconds. Objects already processed are skipped.
+    
+    Objects that process() reports as failed are retried rather than dropped:
+    they're forgotten, so the next poll lists them again, and their queue messages
+    aren't deleted, so SQS redelivers them once the queue's visibility timeout
+    expires (a redrive policy can move repeat failures to a dead-letter queue).
+    
+    Args:
+        process: Called with each batch of object dictionaries (Key, Size, ETag and
+                 Time, sorted by Time); returns the objects it failed on
+        poll_source: PollingLogSource for the backfill and the polling fallback
+        queue_source: SqsLogSource to read notifications from (optional)
+        poll_interval: Seconds between polls
+    """
+    seen = {}  # key -> interval end time
+    next_poll = time.monotonic()
+    use_queue = False
+    
+    while True:
+        objects, receipts = [], []
+        if use_queue:
+            try:
+                objects, receipts = queue_source.receive()
+            except Exception as e:
+                print(f"Error reading {queue_source.queue_url}: {str(e)}; polling instead")
+                use_queue = False
+        else:
+            time.sleep(max(0.0, next_poll - time.monotonic()))
+            next_poll = time.monotonic() + poll_interval
+            try:
+                objects = poll_source.receive()
+            except Exception as e:
+                print(f"Error polling s3://{poll_source.bucket}: {str(e)}")
+            use_queue = queue_source is not None
+        
+        forget_before = datetime.utcnow() - 2 * FOLLOW_LOOKBACK
+        for key in [key for key, key_time in seen.items() if key_time < forget_before]:
+            del seen[key]
+        new_objects = []
+        for obj in sorted(objects, key=lambda o: o['Time']):
+            if obj['Key'] not in seen:
+                seen[obj['Key']] = obj['Time']
+                new_objects.append(obj)
+        
+        failed = process(new_objects) if new_objects else []
+        for obj in failed:
+            seen.pop(obj['Key'], None)
+        if receipts:
+            retried = {obj.get('ReceiptHandle') for obj in failed}
+            queue_source.delete([receipt for receipt in receipts if receipt not in retried])
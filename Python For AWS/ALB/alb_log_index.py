@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+ALB Log Index
+
+Persisted, sorted index of ALB log objects (interval end time, key, size, ETag)
+for one log bucket and prefix. Time-range queries bisect the index instead of
+listing S3, and updates are incremental: within a day partition, keys sort by
+load balancer and then time, so each load balancer's new keys are listed from
+PARTITION_GRACE before its last indexed interval, stopping at the next load
+balancer's keys. The lookback catches files from other nodes that land after
+a later-sorting key of the same or an earlier interval; keys already indexed
+are dropped. The gaps between known load balancers are covered by the same
+listings, so load balancers that start logging are picked up too. A day
+partition listed once its grace period has passed is complete and never
+listed again.
+
+The index is a tab-separated file that new entries are appended to (sorted
+once on load), plus a JSON state file with the last key per partition and
+load balancer.
+
+Use Cases:
+- Repeated incident investigations over the same log bucket
+- Time-range lookups in buckets with millions of log objects
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+from alb_fanout import FanOutStats, fan_out, DEFAULT_WORKERS
+from alb_log_locator import parse_log_key_time, LOG_INTERVAL, KEY_TIME_FORMAT
+
+# Logs are normally delivered within minutes of the interval end; a partition
+# listed this long after its last interval is treated as complete, and listings
+# re-read this far back for files delivered out of key order
+PARTITION_GRACE = timedelta(hours=1)
+
+_EPOCH = datetime(1970, 1, 1)
+
+def _to_epoch(value: datetime) -> int:
+    return int((value - _EPOCH).total_seconds())
+
+def _load_balancer_id(key: str) -> str:
+    """
+    Get the load balancer segment (app.<name>.<id>) of a log object key.
+    """
+    return key.rsplit('/', 1)[-1].split('_')[3]
+
+class LogKeyIndex:
+    """
+    Sorted (time, key, size, ETag) index of the log objects under one bucket and prefix.
+    """
+    
+    def __init__(self, path: str, bucket: str, prefix: str):
+        self.path = path
+        self.state_path = path + '.state.json'
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self._lock = threading.Lock()
+        self.partitions = {}  # day prefix -> {'last_keys': {lb id: key}, 'complete': bool}
+        
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                state = json.load(f)
+            if (state['bucket'], state['prefix']) != (self.bucket, self.prefix):
+                raise ValueError(f"{path} indexes s3://{state['bucket']}/{state['prefix']}, "
+                                 f"not s3://{self.bucket}/{self.prefix}")
+            self.partitions = state['partitions']
+        
+        entries = []
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    timestamp, key, size, etag = line.rstrip('\n').split('\t')
+                    entries.append((int(timestamp), key, int(size), etag))
+        self._set_entries(entries)
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def _set_entries(self, entries: List[tuple]):
+        """
+        Sort entries and drop duplicates (left by a run that stopped between
+        appending entries and saving state).
+        """
+        entries.sort()
+        self._entries = [entry for i, entry in enumerate(entries) if i == 0 or entry != entries[i - 1]]
+        self._times = [entry[0] for entry in self._entries]
+    
+    def _indexed_keys(self, since: int) -> set:
+        """
+        Get the indexed keys with an interval end at or after an epoch time.
+        """
+        entries = self._entries
+        return {entry[1] for entry in entries[bisect.bisect_left(self._times, since):]}
+    
+    def _list_partition(self, s3_client, day_prefix: str) -> List[tuple]:
+        """
+        List the keys of one partition that aren't indexed yet.
+        
+        One listing runs before the first known load balancer and one from
+        PARTITION_GRACE before each known load balancer's last interval, each
+        stopping where the next known load balancer's keys begin. Keys in the
+        lookback that are already indexed are left out.
+        """
+        last_keys = self.partitions.get(day_prefix, {}).get('last_keys', {})
+        account_id, _, region = day_prefix.split('AWSLogs/', 1)[1].split('/')[:3]
+        stem = f"{day_prefix}{account_id}_elasticloadbalancing_{region}_"
+        load_balancers = sorted(last_keys)
+        ranges = [('', stem + load_balancers[0] + '_' if load_balancers else None)]
+        lookback = None
+        for index, load_balancer in enumerate(load_balancers):
+            stop = stem + load_balancers[index + 1] + '_' if index + 1 < len(load_balancers) else None
+            start_time = parse_log_key_time(last_keys[load_balancer]) - PARTITION_GRACE
+            lookback = start_time if lookback is None else min(lookback, start_time)
+            ranges.append((stem + load_balancer + '_' + start_time.strftime(KEY_TIME_FORMAT), stop))
+        
+        new_entries = []
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for start_after, stop_before in ranges:
+            params = {'Bucket': self.bucket, 'Prefix': day_prefix}
+            if start_after:
+                params['StartAfter'] = start_after
+            done = False
+            for page in paginator.paginate(**params):
+                for obj in page.get('Contents', []):
+                    if stop_before is not None and obj['Key'] >= stop_before:
+                        done = True
+                        break
+                    key_time = parse_log_key_time(obj['Key'])
+                    if key_time is not None:
+                        new_entries.append((_to_epoch(key_time), obj['Key'], obj['Size'], obj['ETag'].strip('"')))
+                if done:
+                    break
+        
+        if lookback is not None:
+            indexed = self._indexed_keys(_to_epoch(lookback))
+            new_entries = [entry for entry in new_entries if entry[1] not in indexed]
+        return new_entries
+    
+    def update(self, s3_client, day_prefixes: List[str], workers: int = DEFAULT_WORKERS,
+               stats: Optional[FanOutStats] = None) -> int:
+        """
+        Bring the index up to date for the given day partitions.
+        
+        Complete partitions are skipped; the others are listed concurrently from
+        shortly before their last indexed keys.
+        
+        Args:
+            s3_client: Boto3 S3 client
+            day_prefixes: Day partition prefixes (see alb_log_locator.get_day_prefixes)
+            workers: Number of partitions listed concurrently
+            stats: FanOutStats to record partition listings into (optional)
+            
+        Returns:
+            Number of new entries
+        """
+        pending = [p for p in day_prefixes if not self.partitions.get(p, {}).get('complete')]
+        listed_at = datetime.utcnow()
+        
+        def on_error(day_prefix, error):
+            print(f"Error listing s3://{self.bucket}/{day_prefix}: {str(error)}")
+            return None
+        
+        results = fan_out(lambda p: self._list_partition(s3_client, p), pending, workers,
+                          rate_limiter=None, stats=stats, on_error=on_error)
+        
+        added = []
+        with self._lock:
+            for day_prefix, new_entries in zip(pending, results):
+                if new_entries is None:
+                    continue
+                partition = self.partitions.setdefault(day_prefix, {'last_keys': {}, 'complete': False})
+                for entry in new_entries:
+                    load_balancer = _load_balancer_id(entry[1])
+                    if entry[1] > partition['last_keys'].get(load_balancer, ''):
+                        partition['last_keys'][load_balancer] = entry[1]
+                day = datetime.strptime(day_prefix.rstrip('/')[-10:], '%Y/%m/%d')
+                partition['complete'] = listed_at >= day + timedelta(days=1) + LOG_INTERVAL + PARTITION_GRACE
+                added.extend(new_entries)
+            
+            if added:
+                with open(self.path, 'a') as f:
+                    for entry in added:
+                        f.write('\t'.join(str(value) for value in entry) + '\n')
+                # Timsort merges the sorted index and the new run in close to linear time
+                self._set_entries(self._entries + added)
+            self._save_state()
+        return len(added)
+    
+    def _save_state(self):
+        """
+        Write the partition state atomically.
+        """
+        temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'bucket': self.bucket, 'prefix': self.prefix, 'updated': time.time(),
+                       'partitions': self.partitions}, f)
+        os.replace(temp_path, self.state_path)
+    
+    def query(self, start_time: datetime, end_time: datetime,
+              load_balancer_id: Optional[str] = None) -> List[Dict]:
+        """
+        Get the indexed log objects overlapping a time window.
+        
+        Args:
+            start_time: Start of the window (naive UTC)
+            end_time: End of the window (naive UTC)
+            load_balancer_id: Load balancer segment of file names to restrict to (optional)
+            
+        Returns:
+            List of object dictionaries with Key, Size, ETag and Time, sorted by Time
+        """
+        # Files are named by interval end, as in alb_log_locator.in_window()
+        low = bisect.bisect_right(self._times, _to_epoch(start_time))
+        high = bisect.bisect_right(self._times, _to_epoch(end_time + LOG_INTERVAL))
+        objects = []
+        for timestamp, key, size, etag in self._entries[low:high]:
+            if load_balancer_id and _load_balancer_id(key) != load_balancer_id:
+                continue
+            objects.append({'Key': key, 'Size': size, 'ETag': etag,
+                            'Time': _EPOCH + timedelta(seconds=timestamp)})
+        return objects
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+ALB Log Locator
+
+Finds the ALB access log objects covering a time window without listing the whole
+bucket. ALB logs are partitioned by day under
+<prefix>/AWSLogs/<account>/elasticloadbalancing/<region>/YYYY/MM/DD/, and each
+file name carries the end of the five-minute interval it covers. Only the day
+partitions overlapping the window are listed, concurrently and with full
+pagination, and keys are filtered on their timestamp before anything is
+downloaded. With a load balancer given, listing starts at the window's first key
+(StartAfter) and stops past its last. With a persisted key index (see
+alb_log_index), partitions are only listed from their last indexed keys and
+the window is looked up by bisection.
+
+Use Cases:
+- Pulling one incident hour from a busy ALB's log bucket
+- Listing multi-day windows without the 1,000 key cap of a single call
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+from alb_fanout import FanOutStats, fan_out, DEFAULT_WORKERS
+
+LOG_INTERVAL = timedelta(minutes=5)  # ALB publishes a log file per node every five minutes
+KEY_TIME_FORMAT = '%Y%m%dT%H%MZ'
+
+def get_log_file_load_balancer_id(load_balancer: str) -> str:
+    """
+    Get the load balancer segment of log file names (app.<name>.<id>).
+    
+    Args:
+        load_balancer: Load balancer ARN, or the segment itself
+        
+    Returns:
+        Load balancer segment string
+    """
+    if load_balancer.startswith('arn:'):
+        return load_balancer.split(':loadbalancer/', 1)[-1].replace('/', '.')
+    return load_balancer
+
+def parse_log_key_time(key: str) -> Optional[datetime]:
+    """
+    Get the interval end time from an ALB log object key.
+    
+    Keys end in <account>_elasticloadbalancing_<region>_<lb>_<end-time>_<ip>_<random>.log.gz.
+    
+    Returns:
+        Naive UTC datetime, or None if the key isn't an ALB log file
+    """
+    parts = key.rsplit('/', 1)[-1].split('_')
+    if len(parts) < 7:
+        return None
+    try:
+        return datetime.strptime(parts[4], KEY_TIME_FORMAT)
+    except ValueError:
+        return None
+
+def get_day_prefix(prefix: str, account_id: str, region: str, day: datetime) -> str:
+    """
+    Get the S3 prefix of one day partition of ALB logs.
+    """
+    base = f"{prefix.strip('/')}/" if prefix.strip('/') else ''
+    return f"{base}AWSLogs/{account_id}/elasticloadbalancing/{region}/{day.strftime('%Y/%m/%d')}/"
+
+def get_day_prefixes(prefix: str, account_id: str, region: str,
+                     start_time: datetime, end_time: datetime) -> List[str]:
+    """
+    Get the day partition prefixes holding log files for a time window.
+    
+    Files are named and partitioned by interval end time, so the partitions run
+    from the start day through the day of the last interval ending after end_time.
+    
+    Args:
+        prefix: Log prefix configured on the load balancer ('' for none)
+        account_id: AWS account ID of the load balancer
+        region: Region of the load balancer
+        start_time: Start of the window (naive UTC)
+        end_time: End of the window (naive UTC)
+        
+    Returns:
+        List of day prefixes in date order
+    """
+    day = datetime(start_time.year, start_time.month, start_time.day)
+    last = end_time + LOG_INTERVAL
+    prefixes = []
+    while day <= last:
+        prefixes.append(get_day_prefix(prefix, account_id, region, day))
+        day += timedelta(days=1)
+    return prefixes
+
+def in_window(key_time: datetime, start_time: datetime, end_time: datetime) -> bool:
+    """
+    Check whether a log file with the given interval end time overlaps the window.
+    """
+    return start_time < key_time <= end_time + LOG_INTERVAL
+
+def list_log_partition(s3_client, bucket: str, day_prefix: str, start_time: datetime, end_time: datetime,
+                       load_balancer_id: Optional[str] = None) -> List[Dict]:
+    """
+    List the log objects of one day partition that overlap a time window.
+    
+    Without a load balancer the whole partition is listed (all pages). With one,
+    listing is narrowed to its file name prefix, starts after the window's first
+    key and stops at the first key past the window, since its keys sort by time.
+    
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Log bucket name
+        day_prefix: Day partition prefix from get_day_prefixes()
+        start_time: Start of the window (naive UTC)
+        end_time: End of the window (naive UTC)
+        load_balancer_id: Load balancer segment of file names (optional)
+        
+    Returns:
+        List of object dictionaries with Key, Size, ETag and Time (interval end)
+    """
+    params = {'Bucket': bucket, 'Prefix': day_prefix}
+    if load_balancer_id:
+        # AWSLogs/<account>/elasticloadbalancing/<region>/... -> <account>_elasticloadbalancing_<region>_<lb>_
+        account_id, _, region = day_prefix.split('AWSLogs/', 1)[1].split('/')[:3]
+        params['Prefix'] = f"{day_prefix}{account_id}_elasticloadbalancing_{region}_{load_balancer_id}_"
+        params['StartAfter'] = params['Prefix'] + start_time.strftime(KEY_TIME_FORMAT)
+    
+    objects = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(**params):
+        for obj in page.get('Contents', []):
+            key_time = parse_log_key_time(obj['Key'])
+            if key_time is None:
+                continue
+            if load_balancer_id and key_time > end_time + LOG_INTERVAL:
+                return objects
+            if in_window(key_time, start_time, end_time):
+                objects.append({'Key': obj['Key'], 'Size': obj['Size'],
+                                'ETag': obj['ETag'].strip('"'), 'Time': key_time})
+    return objects
+
+def locate_log_objects(s3_client, bucket: str, prefix: str, account_id: str, region: str,
+                       start_time: datetime, end_time: datetime, load_balancer: Optional[str] = None,
+                       workers: int = DEFAULT_WORKERS, stats: Optional[FanOutStats] = None,
+                       index=None) -> List[Dict]:
+    """
+    Find the ALB log objects overlapping a time window, listing day partitions concurrently.
+    
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Log bucket name
+        prefix: Log prefix configured on the load balancer ('' for none)
+        account_id: AWS account ID of the load balancer
+        region: Region of the load balancer
+        start_time: Start of the window (naive UTC)
+        end_time: End of the window (naive UTC)
+        load_balancer: Load balancer ARN or file name segment to restrict to (optional)
+        workers: Number of partitions listed concurrently
+        stats: FanOutStats to record partition listings into (optional)
+        index: alb_log_index.LogKeyIndex to update and query instead of listing in full (optional)
+        
+    Returns:
+        List of object dictionaries with Key, Size, ETag and Time, sorted by Time
+    """
+    load_balancer_id = get_log_file_load_balancer_id(load_balancer) if load_balancer else None
+    day_prefixes = get_day_prefixes(prefix, account_id, region, start_time, end_time)
+    
+    if index is not None:
+        index.update(s3_client, day_prefixes, workers, stats)
+        return index.query(start_time, end_time, load_balancer_id)
+    
+    def list_partition(day_prefix):
+        return list_log_partition(s3_client, bucket, day_prefix, start_time, end_time, load_balancer_id)
+    
+    def on_error(day_prefix, error):
+        print(f"Error listing s3://{bucket}/{day_prefix}: {str(error)}")
+        return []
+    
+    # S3 list requests aren't subject to the ELBv2 limits; throttling (SlowDown) is still retried
+    partitions = fan_out(list_partition, day_prefixes, workers, rate_limiter=None,
+                         stats=stats, on_error=on_error)
+    objects = [obj for partition in partitions for obj in partition]
+    objects.sort(key=lambda obj: (obj['Time'], obj['Key']))
+    return objects
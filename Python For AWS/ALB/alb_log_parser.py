@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+ALB Log Parser
+
+Streaming parser for ALB access logs. Object bodies are read in chunks and
+decompressed incrementally, so memory stays flat whatever the object size and
+nothing is written locally. Lines are tokenized, including quoted fields, into
+typed records that are yielded lazily for downstream filters.
+
+Use Cases:
+- Parsing logs straight from S3 without downloading them
+- Feeding filters and aggregations with typed records
+"""
+
+import re
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, List, Dict, Optional
+
+CHUNK_SIZE = 256 * 1024
+DECOMPRESSED_CHUNK_SIZE = 1024 * 1024  # Cap on output per decompress call (logs compress ~10-20x)
+
+# Fields of an ALB access log entry, in order; newer fields AWS appends are ignored
+LOG_FIELDS = (
+    'type', 'time', 'elb', 'client', 'target', 'request_processing_time', 'target_processing_time',
+    'response_processing_time', 'elb_status_code', 'target_status_code', 'received_bytes', 'sent_bytes',
+    'request', 'user_agent', 'ssl_cipher', 'ssl_protocol', 'target_group_arn', 'trace_id', 'domain_name',
+    'chosen_cert_arn', 'matched_rule_priority', 'request_creation_time', 'actions_executed',
+    'redirect_url', 'error_reason', 'target_port_list', 'target_status_code_list', 'classification',
+    'classification_reason', 'conn_trace_id'
+)
+REQUIRED_FIELDS = 17  # Through target_group_arn
+
+# Quoted fields may contain escaped quotes; only used for lines that have them
+_TOKEN_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+
+def iter_gzip_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Decompress gzip data incrementally and yield complete lines.
+    
+    Concatenated gzip members are handled. Output per step is capped at
+    DECOMPRESSED_CHUNK_SIZE, so memory stays flat however well a chunk compresses.
+    
+    Args:
+        chunks: Compressed byte chunks (e.g. an S3 body's iter_chunks())
+        
+    Yields:
+        Lines without the trailing newline
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    pending = b''
+    for chunk in chunks:
+        while chunk:
+            data = decompressor.decompress(chunk, DECOMPRESSED_CHUNK_SIZE)
+            if decompressor.eof:
+                # Start of another gzip member
+                chunk = decompressor.unused_data
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            else:
+                chunk = decompressor.unconsumed_tail
+            if not data:
+                continue
+            lines = (pending + data).split(b'\n')
+            pending = lines.pop()
+            yield from lines
+    if pending:
+        yield pending
+
+def tokenize_log_line(line: str) -> List[str]:
+    """
+    Split a log line into fields, with quotes removed from quoted fields.
+    """
+    if '\\"' in line:
+        return [quoted if bare == '' else bare for quoted, bare in _TOKEN_PATTERN.findall(line)]
+    # Without escaped quotes, even segments are unquoted text and odd segments are quoted fields
+    fields = []
+    for index, segment in enumerate(line.split('"')):
+        if index % 2:
+            fields.append(segment)
+        else:
+            fields.extend(segment.split())
+    return fields
+
+def _parse_time(value: str) -> Optional[datetime]:
+    return datetime.fromisoformat(value.rstrip('Z')) if value != '-' else None
+
+def _parse_seconds(value: str) -> Optional[float]:
+    # -1 means the request never reached (or never got a response from) a target
+    seconds = float(value)
+    return None if seconds < 0 else seconds
+
+def _parse_int(value: str) -> Optional[int]:
+    return None if value == '-' else int(value)
+
+def _parse_str(value: str) -> Optional[str]:
+    return None if value == '-' else value
+
+def _split_address(value: str):
+    if value == '-':
+        return None, None
+    host, _, port = value.rpartition(':')
+    return host, int(port)
+
+def parse_log_line(line: str) -> Dict:
+    """
+    Parse one ALB access log line into a typed record.
+    
+    Times are naive UTC datetimes, durations are seconds (None where ALB logs -1),
+    codes and byte counts are ints, and '-' becomes None. The client and target
+    addresses are split into ip and port, and the request into method, url and
+    protocol.
+    
+    Args:
+        line: Log line
+        
+    Returns:
+        Record dictionary
+        
+    Raises:
+        ValueError: If the line is not a valid ALB access log entry
+    """
+    fields = tokenize_log_line(line)
+    if len(fields) < REQUIRED_FIELDS:
+        raise ValueError(f"expected at least {REQUIRED_FIELDS} fields, got {len(fields)}")
+    values = dict(zip(LOG_FIELDS, fields))
+    
+    client_ip, client_port = _split_address(values['client'])
+    target_ip, target_port = _split_address(values['target'])
+    method, _, rest = values['request'].partition(' ')
+    url, _, protocol = rest.rpartition(' ')
+    record = {
+        'type': values['type'],
+        'time': _parse_time(values['time']),
+        'elb': values['elb'],
+        'client_ip': client_ip,
+        'client_port': client_port,
+        'target_ip': target_ip,
+        'target_port': target_port,
+        'request_processing_time': _parse_seconds(values['request_processing_time']),
+        'target_processing_time': _parse_seconds(values['target_processing_time']),
+        'response_processing_time': _parse_seconds(values['response_processing_time']),
+        'elb_status_code': _parse_int(values['elb_status_code']),
+        'target_status_code': _parse_int(values['target_status_code']),
+        'received_bytes': int(values['received_bytes']),
+        'sent_bytes': int(values['sent_bytes']),
+        'method': method,
+        'url': url or rest,
+        'protocol': protocol if url else None,
+        'user_agent': _parse_str(values['user_agent']),
+        'ssl_cipher': _parse_str(values['ssl_cipher']),
+        'ssl_protocol': _parse_str(values['ssl_protocol']),
+        'target_group_arn': _parse_str(values['target_group_arn'])
+    }
+    for field in LOG_FIELDS[REQUIRED_FIELDS:]:
+        value = values.get(field, '-')
+        if field == 'matched_rule_priority':
+            record[field] = _parse_int(value)
+        elif field == 'request_creation_time':
+            record[field] = _parse_time(value)
+        else:
+            record[field] = _parse_str(value)
+    return record
+
+def parse_log_lines(lines: Iterable[bytes], counts: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Parse log lines lazily, skipping blank and malformed lines.
+    
+    Args:
+        lines: Raw log lines (bytes)
+        counts: Dictionary to accumulate 'records' and 'malformed' counts into (optional)
+        
+    Yields:
+        Record dictionaries
+    """
+    counts = {} if counts is None else counts
+    counts.setdefault('records', 0)
+    counts.setdefault('malformed', 0)
+    for raw_line in lines:
+        line = raw_line.decode('utf-8', errors='replace').strip()
+        if not line:
+            continue
+        try:
+            record = parse_log_line(line)
+        except ValueError:
+            counts['malformed'] += 1
+            continue
+        counts['records'] += 1
+        yield record
+
+def iter_s3_log_records(s3_client, bucket: str, key: str, chunk_size: int = CHUNK_SIZE,
+                        counts: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Stream an S3 log object and yield its records without writing it locally.
+    
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Bucket name
+        key: Object key (.log.gz)
+        chunk_size: Bytes read from the body at a time
+        counts: Dictionary to accumulate record counts into (optional)
+        
+    Yields:
+        Record dictionaries
+    """
+    body = s3_client.get_object(Bucket=bucket, Key=key)['Body']
+    try:
+        yield from parse_log_lines(iter_gzip_lines(body.iter_chunks(chunk_size)), counts)
+    finally:
+        body.close()
+
+def iter_file_log_records(path: str, chunk_size: int = CHUNK_SIZE,
+                          counts: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Stream a local .log.gz file and yield its records.
+    """
+    def read_chunks():
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                yield chunk
+    
+    yield from parse_log_lines(iter_gzip_lines(read_chunks()), counts)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+ALB Log Pipeline
+
+Multi-core decompress-and-parse stage for ALB access logs. Log objects are
+sharded across a process pool, largest first; each worker streams its object,
+decompresses it incrementally and parses lines straight into column buffers
+(see alb_log_store.ColumnBuilder), skipping per-line dictionaries. Workers hand
+back compact buffers, which pickle as a few large byte strings instead of one
+dictionary per line, and the parent merges them. Per-worker records/sec is
+collected for the run summary.
+
+Requires NumPy: pip install numpy
+
+Use Cases:
+- Parsing a day of busy-ALB logs across every core
+- Feeding the columnar log store without a single-core bottleneck
+"""
+
+import boto3
+import calendar
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterator, List, Dict, Optional
+from alb_log_parser import iter_gzip_lines, tokenize_log_line, REQUIRED_FIELDS, CHUNK_SIZE
+from alb_log_store import ColumnBuilder, url_path
+
+# Objects queued per worker process; bounds the parsed buffers held at once
+IN_FLIGHT_PER_PROCESS = 2
+
+# Per-process S3 client, created by the pool initializer
+_s3_client = None
+
+def _init_worker(region: Optional[str], endpoint_url: Optional[str]):
+    """
+    Create the worker's S3 client (clients can't be shared across processes).
+    """
+    global _s3_client
+    _s3_client = boto3.client('s3', region_name=region, endpoint_url=endpoint_url)
+
+def _duration(value: str) -> float:
+    seconds = float(value)
+    return float('nan') if seconds < 0 else seconds
+
+def add_log_lines(builder: ColumnBuilder, lines, counts: Dict):
+    """
+    Parse raw log lines directly into a column builder.
+    
+    Equivalent to alb_log_store.ColumnBuilder.add_record(alb_log_parser.parse_log_line(line))
+    per line, without building datetimes or record dictionaries. Blank and malformed
+    lines are skipped and counted.
+    
+    Args:
+        builder: ColumnBuilder to append to
+        lines: Raw log lines (bytes)
+        counts: Dictionary to accumulate 'records' and 'malformed' counts into
+    """
+    numeric = builder.numeric
+    time_column, elb_status, target_status = numeric['time'], numeric['elb_status_code'], numeric['target_status_code']
+    received, sent = numeric['received_bytes'], numeric['sent_bytes']
+    durations = (numeric['request_processing_time'], numeric['target_processing_time'],
+                 numeric['response_processing_time'])
+    add_string = builder.add_string
+    minutes = {}  # 'YYYY-MM-DDTHH:MM' -> epoch seconds
+    records = malformed = 0
+    
+    for raw_line in lines:
+        line = raw_line.decode('utf-8', errors='replace').strip()
+        if not line:
+            continue
+        fields = tokenize_log_line(line)
+        if len(fields) < REQUIRED_FIELDS:
+            malformed += 1
+            continue
+        try:
+            timestamp = fields[1]
+            minute = minutes.get(timestamp[:16])
+            if minute is None:
+                minute = minutes[timestamp[:16]] = calendar.timegm(time.strptime(timestamp[:16], '%Y-%m-%dT%H:%M'))
+            values = (minute + float(timestamp[17:].rstrip('Z')), _duration(fields[5]), _duration(fields[6]),
+                      _duration(fields[7]), 0 if fields[8] == '-' else int(fields[8]),
+                      0 if fields[9] == '-' else int(fields[9]), int(fields[10]), int(fields[11]))
+        except ValueError:
+            malformed += 1
+            continue
+        
+        time_column.append(values[0])
+        for column, value in zip(durations, values[1:4]):
+            column.append(value)
+        elb_status.append(values[4])
+        target_status.append(values[5])
+        received.append(values[6])
+        sent.append(values[7])
+        
+        method, _, rest = fields[12].partition(' ')
+        url = rest.rpartition(' ')[0] or rest
+        add_string('type', fields[0])
+        add_string('elb', fields[2])
+        add_string('client_ip', fields[3].rpartition(':')[0])
+        add_string('target', '' if fields[4] == '-' else fields[4])
+        add_string('method', method)
+        add_string('path', url_path(url))
+        domain_name = fields[18] if len(fields) > 18 else '-'
+        add_string('domain_name', '' if domain_name == '-' else domain_name)
+        add_string('target_group_arn', '' if fields[16] == '-' else fields[16])
+        add_string('user_agent', '' if fields[13] == '-' else fields[13])
+        error_reason = fields[24] if len(fields) > 24 else '-'
+        add_string('error_reason', '' if error_reason == '-' else error_reason)
+        records += 1
+    
+    counts['records'] = counts.get('records', 0) + records
+    counts['malformed'] = counts.get('malformed', 0) + malformed
+
+def parse_object(bucket: Optional[str], obj: Dict, s3_client=None) -> Dict:
+    """
+    Stream and parse one log object into column buffers.
+    
+    Args:
+        bucket: Bucket name, or None to read obj['Key'] as a local .log.gz path
+        obj: Object dictionary with Key
+        s3_client: Boto3 S3 client (default: the worker's client)
+        
+    Returns:
+        Dictionary with builder, records, malformed, seconds (wall time) and worker (pid)
+    """
+    started = time.monotonic()
+    if bucket is None:
+        source = open(obj['Key'], 'rb')
+        chunks = iter(lambda: source.read(CHUNK_SIZE), b'')
+    else:
+        source = (s3_client or _s3_client).get_object(Bucket=bucket, Key=obj['Key'])['Body']
+        chunks = source.iter_chunks(CHUNK_SIZE)
+    builder, counts = ColumnBuilder(), {}
+    try:
+        add_log_lines(builder, iter_gzip_lines(chunks), counts)
+    finally:
+        source.close()
+    return {'builder': builder, 'records': counts['records'], 'malformed': counts['malformed'],
+            'seconds': time.monotonic() - started, 'worker': os.getpid()}
+
+class PipelineStats:
+    """
+    Per-worker record counts and busy time for a pipeline run.
+    """
+    
+    def __init__(self):
+        self.workers = {}  # pid -> {'objects', 'records', 'seconds'}
+        self.malformed = 0
+        self.failed = 0
+        self.failed_objects = []
+        self.started = time.monotonic()
+    
+    def record(self, result: Dict):
+        """
+        Record one parsed object.
+        """
+        worker = self.workers.setdefault(result['worker'], {'objects': 0, 'records': 0, 'seconds': 0.0})
+        worker['objects'] += 1
+        worker['records'] += result['records']
+        worker['seconds'] += result['seconds']
+        self.malformed += result['malformed']
+    
+    def record_failure(self, obj: Dict):
+        """
+        Record one object that couldn't be fetched or parsed.
+        """
+        self.failed += 1
+        self.failed_objects.append(obj)
+    
+    def summary(self) -> str:
+        """
+        Format total and per-worker throughput as a report.
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        records = sum(w['records'] for w in self.workers.values())
+        lines = [f"Parsed {records} record(s) from {sum(w['objects'] for w in self.workers.values())} "
+                 f"object(s) in {elapsed:.1f}s with {len(self.workers)} worker(s): {records / elapsed:,.0f} records/s; "
+                 f"{self.malformed} malformed line(s), {self.failed} failed object(s)"]
+        for index, (pid, worker) in enumerate(sorted(self.workers.items()), 1):
+            rate = worker['records'] / worker['seconds'] if worker['seconds'] else 0.0
+            lines.append(f"  worker {index} (pid {pid}): {worker['objects']} object(s), "
+                         f"{worker['records']} record(s), {rate:,.0f} records/s")
+        return "\n".join(lines)
+
+def run_pipeline(bucket: Optional[str], objects: List[Dict], processes: int = 1,
+                 region: Optional[str] = None, endpoint_url: Optional[str] = None,
+                 stats: Optional[PipelineStats] = None) -> Iterator[tuple]:
+    """
+    Parse log objects across a process pool, yielding column buffers as objects complete.
+    
+    Objects are submitted largest first so one big file doesn't finish last on
+    an otherwise idle pool. Only IN_FLIGHT_PER_PROCESS objects per process are
+    submitted at a time, and a result is released once yielded, so memory is
+    bounded by the pool size rather than the number of objects. With
+    processes=1 everything runs in this process.
+    
+    Args:
+        bucket: Bucket name, or None if object keys are local .log.gz paths
+        objects: Object dictionaries with Key (and Size, used for ordering)
+        processes: Number of worker processes
+        region: Region for the workers' S3 clients
+        endpoint_url: S3 endpoint override for the workers' clients (optional)
+        stats: PipelineStats to record into (optional)
+        
+    Yields:
+        (object dictionary, ColumnBuilder) tuples in completion order; failed
+        objects are reported, skipped and listed in stats.failed_objects
+    """
+    stats = stats if stats is not None else PipelineStats()
+    ordered = sorted(objects, key=lambda obj: -obj.get('Size', 0))
+    
+    if processes <= 1:
+        if bucket is not None:
+            _init_worker(region, endpoint_url)
+        for obj in ordered:
+            try:
+                result = parse_object(bucket, obj)
+            except Exception as e:
+                print(f"Error parsing {obj['Key']}: {str(e)}")
+                stats.record_failure(obj)
+                continue
+            stats.record(result)
+            yield obj, result['builder']
+        return
+    
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=(region, endpoint_url)) as executor:
+        pending = iter(ordered)
+        futures = {}
+        while True:
+            for obj in pending:
+                futures[executor.submit(parse_object, bucket, obj)] = obj
+                if len(futures) >= processes * IN_FLIGHT_PER_PROCESS:
+                    break
+            if not futures:
+                return
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                obj = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error parsing {obj['Key']}: {str(e)}")
+                    stats.record_failure(obj)
+                    continue
+                stats.record(result)
+                yield obj, result['builder']
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+ALB Log Store
+
+Local columnar cache of parsed ALB access log fields. Columns are NumPy arrays
+saved as .npy files in hourly partitions (<store>/<YYYYmmddTHH>/<segment>/) and
+memory-mapped on load, so a query reads only the hours and columns it needs.
+String fields are dictionary-encoded (int32 codes plus a vocabulary). The store
+records which log objects (key and ETag) it holds, so a re-query over the same
+window skips downloading and parsing them again. Each write is a batch whose
+segments only become visible once the batch is committed together with its
+log objects, so an interrupted write never leaves duplicate rows behind.
+
+Queries return a LogTable, which supports vectorized filters, group-by counts,
+sums, means, rates and percentiles over tens of millions of rows.
+
+Requires NumPy: pip install numpy
+
+Use Cases:
+- p99 target latency per target, 5xx rate per path, top client IPs
+- Repeated questions about an incident window without re-parsing logs
+"""
+
+import json
+import os
+import threading
+import uuid
+import numpy as np
+from array import array
+from datetime import datetime, timedelta
+from typing import Iterable, List, Dict, Optional
+
+# (column, array typecode); missing durations are NaN and missing status codes 0
+NUMERIC_COLUMNS = [
+    ('time', 'd'),  # Epoch seconds (UTC)
+    ('request_processing_time', 'f'),
+    ('target_processing_time', 'f'),
+    ('response_processing_time', 'f'),
+    ('elb_status_code', 'h'),
+    ('target_status_code', 'h'),
+    ('received_bytes', 'q'),
+    ('sent_bytes', 'q'),
+]
+
+# Dictionary-encoded columns; target is ip:port and path is the URL path without host or query
+STRING_COLUMNS = ['type', 'elb', 'client_ip', 'target', 'method', 'path', 'domain_name',
+                  'target_group_arn', 'user_agent', 'error_reason']
+
+DEFAULT_BATCH_ROWS = 1000000
+SOURCES_NAME = 'sources.jsonl'
+PARTITION_FORMAT = '%Y%m%dT%H'
+
+_EPOCH = datetime(1970, 1, 1)
+
+def url_path(url: str) -> str:
+    """
+    Get the path of a request URL (https://host:443/a/b?x -> /a/b).
+    """
+    start = url.find('://')
+    if start >= 0:
+        slash = url.find('/', start + 3)
+        url = url[slash:] if slash >= 0 else '/'
+    return url.split('?', 1)[0]
+
+class ColumnBuilder:
+    """
+    Accumulates parsed log fields into compact column buffers.
+    
+    Numeric columns are array.array buffers and string columns are int32 codes
+    into a per-builder vocabulary, so a builder pickles cheaply between processes.
+    """
+    
+    def __init__(self):
+        self.numeric = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS}
+        self.codes = {name: array('i') for name in STRING_COLUMNS}
+        self.vocab = {name: {} for name in STRING_COLUMNS}
+    
+    def __len__(self):
+        return len(self.numeric['time'])
+    
+    def add_string(self, column: str, value: Optional[str]):
+        """
+        Append a string value ('' for missing) to a dictionary-encoded column.
+        """
+        vocab = self.vocab[column]
+        value = value or ''
+        code = vocab.get(value)
+        if code is None:
+            code = vocab[value] = len(vocab)
+        self.codes[column].append(code)
+    
+    def add_record(self, record: Dict):
+        """
+        Append one record from alb_log_parser.parse_log_line().
+        """
+        numeric = self.numeric
+        numeric['time'].append((record['time'] - _EPOCH).total_seconds())
+        for name in ('request_processing_time', 'target_processing_time', 'response_processing_time'):
+            value = record[name]
+            numeric[name].append(float('nan') if value is None else value)
+        numeric['elb_status_code'].append(record['elb_status_code'] or 0)
+        numeric['target_status_code'].append(record['target_status_code'] or 0)
+        numeric['received_bytes'].append(record['received_bytes'])
+        numeric['sent_bytes'].append(record['sent_bytes'])
+        target = f"{record['target_ip']}:{record['target_port']}" if record['target_ip'] else ''
+        for name, value in (('type', record['type']), ('elb', record['elb']), ('client_ip', record['client_ip']),
+                            ('target', target), ('method', record['method']), ('path', url_path(record['url'])),
+                            ('domain_name', record['domain_name']), ('target_group_arn', record['target_group_arn']),
+                            ('user_agent', record['user_agent']), ('error_reason', record['error_reason'])):
+            self.add_string(name, value)
+    
+    def extend(self, other: 'ColumnBuilder'):
+        """
+        Append another builder's rows, re-encoding its strings into this vocabulary.
+        """
+        for name, buffer in other.numeric.items():
+            self.numeric[name].extend(buffer)
+        for name in STRING_COLUMNS:
+            vocab = self.vocab[name]
+            mapping = np.array([vocab.setdefault(value, len(vocab)) for value in other.vocab[name]],
+                               dtype=np.int32)
+            if len(other.codes[name]):
+                self.codes[name].frombytes(mapping[np.frombuffer(other.codes[name], dtype=np.int32)].tobytes())
+    
+    def to_columns(self) -> Dict:
+        """
+        Convert the buffers to NumPy arrays.
+        
+        Returns:
+            Dictionary mapping numeric column names to arrays and string column
+            names to (codes array, vocabulary list) tuples
+        """
+        columns = {name: np.frombuffer(buffer, dtype=buffer.typecode) for name, buffer in self.numeric.items()}
+        for name in STRING_COLUMNS:
+            vocab = sorted(self.vocab[name], key=self.vocab[name].get)
+            columns[name] = (np.frombuffer(self.codes[name], dtype=np.int32), vocab)
+        return columns
+
+class LogTable:
+    """
+    In-memory columnar query result.
+    
+    Numeric columns are arrays; string columns are int32 codes into vocab[column].
+    """
+    
+    def __init__(self, columns: Dict[str, np.ndarray], vocab: Dict[str, List[str]]):
+        self.columns = columns
+        self.vocab = vocab
+    
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+    
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+    
+    def code(self, column: str, value: str) -> int:
+        """
+        Get the code of a string value (-1 if it never occurs, which matches no rows).
+        """
+        try:
+            return self.vocab[column].index(value)
+        except ValueError:
+            return -1
+    
+    def where(self, mask: np.ndarray) -> 'LogTable':
+        """
+        Get the rows where a boolean mask is true.
+        """
+        return LogTable({name: values[mask] for name, values in self.columns.items()}, self.vocab)
+    
+    def decode(self, column: str, codes: np.ndarray) -> List[str]:
+        """
+        Translate codes of a string column back to values.
+        """
+        vocab = self.vocab[column]
+        return [vocab[code] for code in codes]
+    
+    def group_by(self, key: str, value: Optional[str] = None, agg: str = 'count',
+                 percentile: float = 99.0, mask: Optional[np.ndarray] = None) -> List[tuple]:
+        """
+        Aggregate a column per value of a string column.
+        
+        Args:
+            key: String column to group by
+            value: Numeric column to aggregate (not needed for count or rate)
+            agg: 'count', 'sum', 'mean', 'percentile' or 'rate' (fraction of rows in mask)
+            percentile: Percentile for agg='percentile'
+            mask: Boolean row mask for agg='rate'
+            
+        Returns:
+            (group value, result, row count) tuples, largest result first; NaN values
+            are ignored by sum, mean and percentile
+        """
+        codes = self.columns[key]
+        if value is not None and agg not in ('count', 'rate'):
+            values = self.columns[value]
+            valid = ~np.isnan(values) if values.dtype.kind == 'f' else np.ones(len(values), dtype=bool)
+            codes, values = codes[valid], values[valid].astype(np.float64)
+        # Codes are dense vocabulary indexes, so bincount groups in one pass without sorting
+        size = len(self.vocab[key])
+        all_counts = np.bincount(codes, minlength=size)
+        groups = np.flatnonzero(all_counts)
+        counts = all_counts[groups]
+        
+        if agg == 'count':
+            results = counts.astype(np.float64)
+        elif agg == 'rate':
+            results = np.bincount(codes, weights=mask.astype(np.float64), minlength=size)[groups] / counts
+        elif agg == 'sum':
+            results = np.bincount(codes, weights=values, minlength=size)[groups]
+        elif agg == 'mean':
+            results = np.bincount(codes, weights=values, minlength=size)[groups] / counts
+        elif agg == 'percentile':
+            # One sort of code * span + value orders rows by group, then value;
+            # each group's percentile is then an offset into its run
+            if len(values):
+                low, span = values.min(), values.max() - values.min() + 1.0
+                keys = np.sort(codes * span + (values - low))
+                offsets = np.cumsum(counts) - counts + np.floor((counts - 1) * percentile / 100.0).astype(np.int64)
+                results = keys[offsets] - groups * span + low
+            else:
+                results = np.empty(0)
+        else:
+            raise ValueError(f"Unknown aggregation '{agg}'")
+        
+        ranked = np.argsort(-results, kind='stable')
+        names = self.decode(key, groups[ranked])
+        return list(zip(names, results[ranked].tolist(), counts[ranked].tolist()))
+
+class LogStore:
+    """
+    Hour-partitioned directory of column segments plus the list of ingested log objects.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self.sources = {}
+        self.batches = set()
+        sources_path = os.path.join(path, SOURCES_NAME)
+        if os.path.exists(sources_path):
+            with open(sources_path, 'rb+') as f:
+                committed = 0
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Torn commit from an interrupted write: the batch never committed
+                        f.truncate(committed)
+                        break
+                    committed += len(line)
+                    if line.strip():
+                        commit = json.loads(line)
+                        self.batches.add(commit['batch'])
+                        for source in commit['sources']:
+                            self.sources[source['key']] = source['etag']
+    
+    def has_object(self, obj: Dict) -> bool:
+        """
+        Check whether a log object (Key, ETag) has already been ingested.
+        """
+        return self.sources.get(obj['Key']) == obj['ETag']
+    
+    def write_columns(self, columns: Dict, objects: List[Dict]):
+        """
+        Write a batch of columns, split into hourly partitions, and record its source objects.
+        
+        Segments are named after the batch, and the batch is committed, with its
+        sources, in a single sources.jsonl line once every segment is in place.
+        Scans skip segments of uncommitted batches, so an interrupted write adds no
+        rows and leaves the objects to be ingested again.
+        
+        Args:
+            columns: Output of ColumnBuilder.to_columns()
+            objects: Log objects (Key, ETag) whose records the batch holds
+        """
+        hours = (columns['time'] // 3600).astype(np.int64)
+        batch = uuid.uuid4().hex[:16]
+        with self._lock:
+            first_hour = hours.min() if len(hours) else 0
+            for hour in first_hour + np.flatnonzero(np.bincount(hours - first_hour)):
+                rows = hours == hour
+                partition = (_EPOCH + timedelta(hours=int(hour))).strftime(PARTITION_FORMAT)
+                partition_dir = os.path.join(self.path, partition)
+                os.makedirs(partition_dir, exist_ok=True)
+                segment = f"{self._next_segment(partition_dir)}-{batch}"
+                temp_dir = os.path.join(partition_dir, f".{segment}.tmp")
+                os.makedirs(temp_dir, exist_ok=True)
+                for name, _ in NUMERIC_COLUMNS:
+                    np.save(os.path.join(temp_dir, f"{name}.npy"), columns[name][rows])
+                for name in STRING_COLUMNS:
+                    codes, vocab = columns[name]
+                    # Keep only the vocabulary used in this hour
+                    hour_codes = codes[rows]
+                    used = np.flatnonzero(np.bincount(hour_codes, minlength=len(vocab)))
+                    remap = np.zeros(len(vocab), dtype=np.int32)
+                    remap[used] = np.arange(len(used), dtype=np.int32)
+                    np.save(os.path.join(temp_dir, f"{name}.npy"), remap[hour_codes])
+                    with open(os.path.join(temp_dir, f"{name}.vocab.json"), 'w') as f:
+                        json.dump([vocab[code] for code in used], f)
+                os.rename(temp_dir, os.path.join(partition_dir, segment))
+            
+            commit = {'batch': batch, 'sources': [{'key': obj['Key'], 'etag': obj['ETag']} for obj in objects]}
+            with open(os.path.join(self.path, SOURCES_NAME), 'a') as f:
+                f.write(json.dumps(commit) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.batches.add(batch)
+            for obj in objects:
+                self.sources[obj['Key']] = obj['ETag']
+    
+    @staticmethod
+    def _next_segment(partition_dir: str) -> int:
+        """
+        Get the next free segment number of a partition (leftover .tmp directories don't count).
+        """
+        numbers = [int(name.split('-', 1)[0]) for name in os.listdir(partition_dir) if not name.startswith('.')]
+        return max(numbers) + 1 if numbers else 0
+    
+    def ingest_columns(self, columns_by_object: Iterable, batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+        """
+        Ingest per-object column buffers, writing a batch every batch_rows rows.
+        
+        Args:
+            columns_by_object: (object dictionary, ColumnBuilder) pairs
+            batch_rows: Rows buffered before a batch is written
+            
+        Returns:
+            Number of rows ingested
+        """
+        batch, objects, total = ColumnBuilder(), [], 0
+        for obj, builder in columns_by_object:
+            batch.extend(builder)
+            objects.append(obj)
+            if len(batch) >= batch_rows:
+                total += len(batch)
+                self.write_columns(batch.to_columns(), objects)
+                batch, objects = ColumnBuilder(), []
+        if objects:
+            total += len(batch)
+            self.write_columns(batch.to_columns(), objects)
+        return total
+    
+    def ingest(self, records_by_object: Iterable, batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+        """
+        Ingest parsed records, writing a batch every batch_rows rows.
+        
+        Args:
+            records_by_object: (object dictionary, iterable of records) pairs
+            batch_rows: Rows buffered before a batch is written
+            
+        Returns:
+            Number of rows ingested
+        """
+        def build(records):
+            builder = ColumnBuilder()
+            for record in records:
+                builder.add_record(record)
+            return builder
+        
+        return self.ingest_columns(((obj, build(records)) for obj, records in records_by_object), batch_rows)
+    
+    def _segments(self, start_time: datetime, end_time: datetime) -> List[str]:
+        """
+        Get the committed segment directories of the partitions overlapping a time window.
+        """
+        first = start_time.strftime(PARTITION_FORMAT)
+        last = end_time.strftime(PARTITION_FORMAT)
+        segments = []
+        for partition in sorted(os.listdir(self.path)):
+            partition_dir = os.path.join(self.path, partition)
+            if not os.path.isdir(partition_dir) or not first <= partition <= last:
+                continue
+            segments.extend(os.path.join(partition_dir, s) for s in sorted(os.listdir(partition_dir))
+                            if not s.startswith('.') and s.split('-', 1)[-1] in self.batches)
+        return segments
+    
+    def scan(self, start_time: datetime, end_time: datetime,
+             columns: Optional[List[str]] = None) -> LogTable:
+        """
+        Load the rows of a time window into a LogTable.
+        
+        Only partitions overlapping the window and the requested columns are read;
+        arrays are memory-mapped and copied only for the rows inside the window.
+        
+        Args:
+            start_time: Start of the window (naive UTC)
+            end_time: End of the window (naive UTC)
+            columns: Columns to load (default: all)
+            
+        Returns:
+            LogTable of the matching rows (string vocabularies merged across segments)
+        """
+        names = columns or [name for name, _ in NUMERIC_COLUMNS] + STRING_COLUMNS
+        start = (start_time - _EPOCH).total_seconds()
+        end = (end_time - _EPOCH).total_seconds()
+        parts = {name: [] for name in names}
+        vocab = {name: {} for name in names if name in STRING_COLUMNS}
+        
+        for segment in self._segments(start_time, end_time):
+            times = np.load(os.path.join(segment, 'time.npy'), mmap_mode='r')
+            rows = (times >= start) & (times <= end)
+            if not rows.any():
+                continue
+            for name in names:
+                values = np.load(os.path.join(segment, f"{name}.npy"), mmap_mode='r')[rows]
+                if name in vocab:
+                    with open(os.path.join(segment, f"{name}.vocab.json")) as f:
+                        segment_vocab = json.load(f)
+                    merged = vocab[name]
+                    mapping = np.array([merged.setdefault(v, len(merged)) for v in segment_vocab], dtype=np.int32)
+                    values = mapping[values]
+                parts[name].append(values)
+        
+        data = {}
+        for name in names:
+            if parts[name]:
+                data[name] = np.concatenate(parts[name])
+            else:
+                data[name] = np.empty(0, dtype=np.int32 if name in vocab else dict(NUMERIC_COLUMNS)[name])
+        return LogTable(data, {name: list(values) for name, values in vocab.items()})
+
+def run_standard_queries(table: LogTable, top: int = 10) -> str:
+    """
+    Format the standard incident questions for a LogTable as a report.
+    
+    Covers p99 target processing time per target, 5xx rate per path and top
+    client IPs. The table needs the time, target_processing_time, target, path,
+    elb_status_code and client_ip columns.
+    
+    Args:
+        table: LogTable from LogStore.scan()
+        top: Rows shown per question
+        
+    Returns:
+        Report string
+    """
+    lines = [f"{len(table)} request(s)", "", f"p99 target processing time by target (top {top}):"]
+    for target, p99, count in table.group_by('target', 'target_processing_time', 'percentile', 99)[:top]:
+        lines.append(f"  {target or '-':<24} {p99 * 1000:>10.1f}ms  ({count} requests)")
+    
+    lines += ["", f"5xx rate by path (top {top}, min 10 requests):"]
+    is_5xx = table['elb_status_code'] >= 500
+    by_path = [row for row in table.group_by('path', agg='rate', mask=is_5xx) if row[2] >= 10]
+    for path, rate, count in by_path[:top]:
+        lines.append(f"  {rate * 100:6.2f}%  {path}  ({count} requests)")
+    
+    lines += ["", f"Top {top} client IPs:"]
+    for client_ip, count, _ in table.group_by('client_ip')[:top]:
+        lines.append(f"  {client_ip:<40} {int(count)}")
+    return "\n".join(lines)
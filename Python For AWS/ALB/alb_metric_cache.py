@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+ALB Metric Cache
+
+Incremental on-disk cache for CloudWatch datapoints, backed by SQLite.
+Datapoints are keyed by (namespace, metric, dimension, period, statistic, timestamp)
+and each series records the time range already fetched, so callers only request
+the missing head/tail windows from CloudWatch. Data older than the retention
+period is evicted.
+
+Use Cases:
+- Nightly cost optimizer runs without re-downloading the whole lookback window
+- Reducing CloudWatch API calls and cost for repeated analyses
+"""
+
+import calendar
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+DEFAULT_RETENTION_DAYS = 90
+
+# Periods ending within this many seconds of "now" are re-fetched on the next
+# run, since CloudWatch may still be aggregating late datapoints for them
+SETTLE_SECONDS = 15 * 60
+
+def _to_epoch(value: datetime) -> int:
+    """
+    Convert a datetime (naive UTC or timezone-aware) to epoch seconds.
+    """
+    if value.tzinfo is None:
+        return calendar.timegm(value.utctimetuple())
+    return int(value.timestamp())
+
+def _from_epoch(value: int) -> datetime:
+    """
+    Convert epoch seconds to a naive UTC datetime.
+    """
+    return datetime(1970, 1, 1) + timedelta(seconds=value)
+
+class MetricCache:
+    """
+    SQLite-backed store of CloudWatch datapoints with per-series coverage tracking.
+    
+    A series is identified by (namespace, metric, dimension, period, statistic).
+    The connection is shared across threads behind a lock so the cache can be
+    used from the cost optimizer's worker pool.
+    """
+    
+    def __init__(self, path: str, retention_days: int = DEFAULT_RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        self.windows_fetched = 0
+        self.datapoints_fetched = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS datapoints (
+                namespace TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                period INTEGER NOT NULL,
+                stat TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (namespace, metric, dimension, period, stat, timestamp)
+            );
+            CREATE TABLE IF NOT EXISTS series (
+                namespace TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                period INTEGER NOT NULL,
+                stat TEXT NOT NULL,
+                fetched_from INTEGER NOT NULL,
+                fetched_until INTEGER NOT NULL,
+                PRIMARY KEY (namespace, metric, dimension, period, stat)
+            );
+        """)
+        self._conn.commit()
+    
+    def close(self):
+        """
+        Close the underlying SQLite connection.
+        """
+        with self._lock:
+            self._conn.close()
+    
+    def missing_windows(self, series: Tuple, start_time: datetime,
+                        end_time: datetime) -> List[Tuple[datetime, datetime]]:
+        """
+        Get the time windows of a series that still need to be fetched.
+        
+        The start of the request is aligned down to the series period so cached
+        buckets line up with the datapoints CloudWatch returns.
+        
+        Args:
+            series: (namespace, metric, dimension, period, stat) tuple
+            start_time: Start of the requested range (naive UTC)
+            end_time: End of the requested range (naive UTC)
+            
+        Returns:
+            List of (start, end) datetime windows; empty if fully cached
+        """
+        period = series[3]
+        start = _to_epoch(start_time) // period * period
+        end = _to_epoch(end_time)
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_from, fetched_until FROM series "
+                "WHERE namespace = ? AND metric = ? AND dimension = ? AND period = ? AND stat = ?",
+                series
+            ).fetchone()
+        
+        if row is None:
+            return [(_from_epoch(start), end_time)]
+        
+        fetched_from, fetched_until = row
+        windows = []
+        if start < fetched_from:
+            windows.append((_from_epoch(start), _from_epoch(fetched_from)))
+        if end > fetched_until:
+            windows.append((_from_epoch(max(start, fetched_until)), end_time))
+        
+        return windows
+    
+    def store(self, series: Tuple, datapoints: List[Tuple[datetime, float]],
+              window_start: datetime, window_end: datetime, complete: bool = True):
+        """
+        Store fetched datapoints and extend the series' fetched range.
+        
+        Only periods that have fully settled are marked as fetched; the most
+        recent ones are stored but requested again on the next run. A window
+        that does not touch the existing range replaces it, so gaps are never
+        reported as cached. Incomplete results are stored without marking
+        anything as fetched, so their window is requested again.
+        
+        Args:
+            series: (namespace, metric, dimension, period, stat) tuple
+            datapoints: List of (timestamp, value) pairs
+            window_start: Start of the window that was fetched
+            window_end: End of the window that was fetched
+            complete: Whether CloudWatch returned the window in full (StatusCode Complete)
+        """
+        period = series[3]
+        settled = (_to_epoch(datetime.utcnow()) - SETTLE_SECONDS) // period * period
+        covered_from = _to_epoch(window_start)
+        covered_until = min(_to_epoch(window_end), settled)
+        
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO datapoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [series + (_to_epoch(timestamp), value) for timestamp, value in datapoints]
+            )
+            if complete and covered_until > covered_from:
+                self._conn.execute(
+                    "INSERT INTO series VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (namespace, metric, dimension, period, stat) DO UPDATE SET "
+                    "fetched_from = CASE WHEN excluded.fetched_from <= fetched_until "
+                    "AND excluded.fetched_until >= fetched_from "
+                    "THEN MIN(fetched_from, excluded.fetched_from) ELSE excluded.fetched_from END, "
+                    "fetched_until = CASE WHEN excluded.fetched_from <= fetched_until "
+                    "AND excluded.fetched_until >= fetched_from "
+                    "THEN MAX(fetched_until, excluded.fetched_until) ELSE excluded.fetched_until END",
+                    series + (covered_from, covered_until)
+                )
+            self._conn.commit()
+        self.windows_fetched += 1
+        self.datapoints_fetched += len(datapoints)
+    
+    def get_datapoints(self, series: Tuple, start_time: datetime,
+                       end_time: datetime) -> List[Tuple[datetime, float]]:
+        """
+        Read cached datapoints for a series.
+        
+        Args:
+            series: (namespace, metric, dimension, period, stat) tuple
+            start_time: Start of the requested range (aligned down to the period)
+            end_time: End of the requested range
+            
+        Returns:
+            List of (timestamp, value) pairs ordered by timestamp
+        """
+        period = series[3]
+        start = _to_epoch(start_time) // period * period
+        
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT timestamp, value FROM datapoints "
+                "WHERE namespace = ? AND metric = ? AND dimension = ? AND period = ? AND stat = ? "
+                "AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+                series + (start, _to_epoch(end_time))
+            ).fetchall()
+        
+        return [(_from_epoch(timestamp), value) for timestamp, value in rows]
+    
+    def evict(self) -> int:
+        """
+        Remove datapoints older than the retention period.
+        
+        Returns:
+            Number of datapoints removed
+        """
+        cutoff = _to_epoch(datetime.utcnow() - timedelta(days=self.retention_days))
+        
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM datapoints WHERE timestamp < ?", (cutoff,)
+            ).rowcount
+            self._conn.execute(
+                "UPDATE series SET fetched_from = ? WHERE fetched_from < ?", (cutoff, cutoff)
+            )
+            self._conn.execute("DELETE FROM series WHERE fetched_until <= fetched_from")
+            self._conn.commit()
+        
+        return removed
+
+def metric_series(metric_name: str, dimension_name: str, dimension_value: str,
+                  period: int, stat: str, namespace: str = 'AWS/ApplicationELB') -> Tuple:
+    """
+    Build the cache key for a single-dimension CloudWatch series.
+    
+    Args:
+        metric_name: CloudWatch metric name
+        dimension_name: Dimension name (e.g. LoadBalancer)
+        dimension_value: Dimension value
+        period: Period in seconds
+        stat: Statistic name (Sum, Average, ...)
+        namespace: CloudWatch namespace
+        
+    Returns:
+        (namespace, metric, dimension, period, stat) tuple
+    """
+    return (namespace, metric_name, f"{dimension_name}={dimension_value}", period, stat)
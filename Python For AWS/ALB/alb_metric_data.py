@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+ALB Metric Data
+
+Batched CloudWatch GetMetricData helper shared by the ALB scripts. Queries are
+sent up to 500 per request with NextToken pagination, and the final status of
+each query is reported so callers can tell complete results from partial ones.
+
+Use Cases:
+- Fetching usage metrics for many load balancers in a few API calls
+- Reading gate metrics where missing data must not look like healthy data
+"""
+
+from datetime import datetime
+from typing import List, Dict, Optional
+
+# GetMetricData accepts at most 500 metric queries per request
+METRIC_DATA_MAX_QUERIES = 500
+
+def get_metric_data_batched(cloudwatch_client, queries: List[Dict], start_time: datetime, end_time: datetime,
+                            statuses: Optional[Dict[str, str]] = None,
+                            raise_errors: bool = False) -> Dict[str, List[tuple]]:
+    """
+    Run GetMetricData queries in batches of up to 500, following NextToken.
+    
+    Args:
+        cloudwatch_client: Boto3 CloudWatch client
+        queries: MetricDataQueries entries, each with a unique 'Id'
+        start_time: Start of the metric window
+        end_time: End of the metric window
+        statuses: Dictionary to record each query's final StatusCode into
+                  ('Complete', 'InternalError', ...; 'Failed' if its batch failed) (optional)
+        raise_errors: Raise when a batch fails instead of reporting it and going on
+        
+    Returns:
+        Dictionary mapping query Id to its list of (timestamp, value) pairs.
+        Queries from a batch that failed are left out.
+    """
+    datapoints = {}
+    statuses = statuses if statuses is not None else {}
+    paginator = cloudwatch_client.get_paginator('get_metric_data')
+    
+    for offset in range(0, len(queries), METRIC_DATA_MAX_QUERIES):
+        batch = queries[offset:offset + METRIC_DATA_MAX_QUERIES]
+        batch_datapoints = {query['Id']: [] for query in batch}
+        batch_statuses = {}
+        try:
+            for page in paginator.paginate(MetricDataQueries=batch,
+                                           StartTime=start_time,
+                                           EndTime=end_time):
+                for result in page['MetricDataResults']:
+                    batch_datapoints[result['Id']].extend(
+                        zip(result.get('Timestamps', []), result.get('Values', []))
+                    )
+                    # PartialData on earlier pages becomes Complete on the last one
+                    batch_statuses[result['Id']] = result.get('StatusCode', 'Complete')
+            for query_id, status in batch_statuses.items():
+                if status != 'Complete':
+                    print(f"Warning: incomplete metric data for query {query_id} ({status})")
+            datapoints.update(batch_datapoints)
+            statuses.update(batch_statuses)
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Error getting metric data batch {offset // METRIC_DATA_MAX_QUERIES + 1}: {str(e)}")
+            statuses.update({query['Id']: 'Failed' for query in batch})
+    
+    return datapoints
@@ -11,13 +11,25 @@ Use Cases:
 - Automated certificate rotation
 - Security compliance (TLS version enforcement)
 - Multi-certificate management
+- Scans served from a per-run ACM certificate index (see alb_certificate_index)
+- Concurrent listener crawl including SNI certificates (see alb_listener_crawler)
+- Bulk rotation across all listeners with a rollback journal (see alb_certificate_rotation)
+- Expiry watch daemon driven by a min-heap of threshold deadlines (see alb_certificate_watch)
 """
 
 import boto3
 import argparse
+import sys
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import json
+from alb_fanout import FanOutStats
+from alb_certificate_index import CertificateIndex, build_certificate_index
+from alb_listener_crawler import crawl_listener_certificates
+from alb_certificate_rotation import (rotate_certificate_everywhere, rollback_rotation,
+                                      DEFAULT_BATCH_SIZE)
+from alb_certificate_watch import (CertificateWatcher, format_expiry_alert,
+                                   DEFAULT_THRESHOLDS, DEFAULT_SWEEP_INTERVAL)
 
 def get_all_load_balancers(elb_client) -> List[Dict]:
     """
@@ -61,17 +73,22 @@ def get_listeners(elb_client, load_balancer_arn: str) -> List[Dict]:
         print(f"Error retrieving listeners: {str(e)}")
         return []
 
-def get_certificate_details(acm_client, certificate_arn: str) -> Optional[Dict]:
+def get_certificate_details(acm_client, certificate_arn: str,
+                            index: Optional[CertificateIndex] = None) -> Optional[Dict]:
     """
     Get details about an ACM certificate.
     
     Args:
         acm_client: Boto3 ACM client
         certificate_arn: ARN of the certificate
+        index: CertificateIndex to serve the lookup from (optional)
         
     Returns:
         Certificate details dictionary or None
     """
+    if index is not None and certificate_arn in index:
+        return index.get(certificate_arn)
+    
     try:
         response = acm_client.describe_certificate(CertificateArn=certificate_arn)
         return response['Certificate']
@@ -82,23 +99,26 @@ def get_certificate_details(acm_client, certificate_arn: str) -> Optional[Dict]:
         print(f"Error retrieving certificate: {str(e)}")
         return None
 
-def get_certificate_expiration_date(acm_client, certificate_arn: str) -> Optional[datetime]:
+def get_certificate_expiration_date(acm_client, certificate_arn: str,
+                                    index: Optional[CertificateIndex] = None) -> Optional[datetime]:
     """
     Get expiration date for a certificate.
     
     Args:
         acm_client: Boto3 ACM client
         certificate_arn: ARN of the certificate
+        index: CertificateIndex to serve the lookup from (optional)
         
     Returns:
         Expiration datetime or None
     """
-    cert_details = get_certificate_details(acm_client, certificate_arn)
+    cert_details = get_certificate_details(acm_client, certificate_arn, index)
     if cert_details and 'NotAfter' in cert_details:
         return cert_details['NotAfter'].replace(tzinfo=None)
     return None
 
-def is_certificate_expiring_soon(acm_client, certificate_arn: str, days_threshold: int = 30) -> bool:
+def is_certificate_expiring_soon(acm_client, certificate_arn: str, days_threshold: int = 30,
+                                 index: Optional[CertificateIndex] = None) -> bool:
     """
     Check if certificate is expiring within the threshold.
     
@@ -106,11 +126,12 @@ def is_certificate_expiring_soon(acm_client, certificate_arn: str, days_threshol
         acm_client: Boto3 ACM client
         certificate_arn: ARN of the certificate
         days_threshold: Number of days to check ahead (default: 30)
+        index: CertificateIndex to serve the lookup from (optional)
         
     Returns:
         True if expiring soon, False otherwise
     """
-    expiration = get_certificate_expiration_date(acm_client, certificate_arn)
+    expiration = get_certificate_expiration_date(acm_client, certificate_arn, index)
     if not expiration:
         return False
     
@@ -166,15 +187,20 @@ def update_listener_certificate(elb_client, listener_arn: str,
         return False
 
 def scan_certificates(elb_client, acm_client, region: str, 
-                     days_threshold: int = 30) -> List[Dict]:
+                     days_threshold: int = 30, workers: int = 10) -> List[Dict]:
     """
     Scan all ALBs and their listeners for certificate information.
     
+    Listeners and all their certificates (default and SNI) are crawled concurrently
+    and streamed in as each load balancer completes; every certificate is then looked
+    up once, from a CertificateIndex built for the run.
+    
     Args:
         elb_client: Boto3 ELBv2 client
         acm_client: Boto3 ACM client
         region: AWS region
         days_threshold: Days ahead to check for expiration
+        workers: Concurrent load balancers crawled and describe_certificate calls
         
     Returns:
         List of certificate scan results
@@ -184,50 +210,54 @@ def scan_certificates(elb_client, acm_client, region: str,
     
     print(f"Scanning {len(load_balancers)} Application Load Balancer(s)...")
     
-    for lb in load_balancers:
-        lb_name = lb['LoadBalancerName']
-        lb_arn = lb['LoadBalancerArn']
+    listener_certificates = []
+    crawl_stats = FanOutStats()
+    for entry in crawl_listener_certificates(elb_client, load_balancers, workers, crawl_stats):
+        lb = entry['load_balancer']
+        listener = entry['listener']
+        
+        # Only HTTPS listeners have certificates. A default certificate that is
+        # also in the SNI list is returned twice; list it once, as the default
+        certificates = {}
+        for cert in entry['certificates']:
+            certificates[cert['CertificateArn']] = (certificates.get(cert['CertificateArn'], False)
+                                                    or cert.get('IsDefault', False))
+        for cert_arn, is_default in certificates.items():
+            listener_certificates.append((lb['LoadBalancerName'], lb['LoadBalancerArn'], listener['Port'],
+                                          listener['ListenerArn'], cert_arn, is_default))
+    print(f"Found {len(listener_certificates)} listener certificate(s); "
+          f"listener crawl: {crawl_stats.summary()}")
+    
+    stats = FanOutStats()
+    index = build_certificate_index(acm_client, [c[4] for c in listener_certificates], workers, stats=stats)
+    print(f"Indexed {len(index)} certificate(s); describe_certificate: {stats.summary()}")
+    
+    for lb_name, lb_arn, listener_port, listener_arn, cert_arn, is_default in listener_certificates:
+        # Get certificate details
+        cert_details = get_certificate_details(acm_client, cert_arn, index)
+        expiration = get_certificate_expiration_date(acm_client, cert_arn, index)
+        expiring_soon = is_certificate_expiring_soon(acm_client, cert_arn, days_threshold, index)
+        
+        days_until_expiry = None
+        if expiration:
+            days_until_expiry = (expiration - datetime.now()).days
         
-        listeners = get_listeners(elb_client, lb_arn)
+        result = {
+            'load_balancer_name': lb_name,
+            'load_balancer_arn': lb_arn,
+            'listener_port': listener_port,
+            'listener_arn': listener_arn,
+            'certificate_arn': cert_arn,
+            'is_default': is_default,
+            'domain_name': cert_details.get('DomainName', 'N/A') if cert_details else 'N/A',
+            'expiration_date': expiration.isoformat() if expiration else 'N/A',
+            'days_until_expiry': days_until_expiry,
+            'expiring_soon': expiring_soon,
+            'status': cert_details.get('Status', 'N/A') if cert_details else 'N/A',
+            'in_use': cert_details.get('InUseBy', []) if cert_details else []
+        }
         
-        for listener in listeners:
-            listener_port = listener['Port']
-            listener_arn = listener['ListenerArn']
-            protocol = listener.get('Protocol', 'HTTP')
-            
-            # Only check HTTPS listeners
-            if protocol != 'HTTPS':
-                continue
-            
-            certificates = listener.get('Certificates', [])
-            
-            for cert in certificates:
-                cert_arn = cert['CertificateArn']
-                
-                # Get certificate details
-                cert_details = get_certificate_details(acm_client, cert_arn)
-                expiration = get_certificate_expiration_date(acm_client, cert_arn)
-                expiring_soon = is_certificate_expiring_soon(acm_client, cert_arn, days_threshold)
-                
-                days_until_expiry = None
-                if expiration:
-                    days_until_expiry = (expiration - datetime.now()).days
-                
-                result = {
-                    'load_balancer_name': lb_name,
-                    'load_balancer_arn': lb_arn,
-                    'listener_port': listener_port,
-                    'listener_arn': listener_arn,
-                    'certificate_arn': cert_arn,
-                    'domain_name': cert_details.get('DomainName', 'N/A') if cert_details else 'N/A',
-                    'expiration_date': expiration.isoformat() if expiration else 'N/A',
-                    'days_until_expiry': days_until_expiry,
-                    'expiring_soon': expiring_soon,
-                    'status': cert_details.get('Status', 'N/A') if cert_details else 'N/A',
-                    'in_use': cert_details.get('InUseBy', []) if cert_details else []
-                }
-                
-                results.append(result)
+        results.append(result)
     
     return results
 
@@ -298,6 +328,28 @@ def main():
     parser.add_argument('--old-cert', help='Old certificate ARN (for update)')
     parser.add_argument('--new-cert', help='New certificate ARN (for update)')
     parser.add_argument('--export-json', help='Export results to JSON file')
+    parser.add_argument('--workers', '-w', type=int, default=10,
+                       help='Concurrent listener crawls and describe_certificate calls during a scan (default: 10)')
+    parser.add_argument('--rotate-all', nargs=2, metavar=('OLD', 'NEW'),
+                       help='Replace certificate OLD with NEW on every listener using it (default and SNI)')
+    parser.add_argument('--rollback', metavar='JOURNAL',
+                       help='Roll back a --rotate-all run from its journal')
+    parser.add_argument('--journal', help='Rotation journal file (default: cert_rotation_<timestamp>.jsonl)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                       help=f'Listeners changed per batch during rotation (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--rollback-on-failure', action='store_true',
+                       help='Automatically roll back the rotation if any listener change fails')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Show the listeners --rotate-all would change without changing them')
+    parser.add_argument('--watch-certs', action='store_true',
+                       help='Run continuously, alerting as certificates cross expiry thresholds')
+    parser.add_argument('--thresholds', default=','.join(str(t) for t in DEFAULT_THRESHOLDS),
+                       help=f'Comma-separated expiry thresholds in days for --watch-certs '
+                            f'(default: {",".join(str(t) for t in DEFAULT_THRESHOLDS)})')
+    parser.add_argument('--sweep-interval', type=int, default=DEFAULT_SWEEP_INTERVAL,
+                       help=f'Seconds between delta sweeps for new listeners and renewals in '
+                            f'--watch-certs (default: {DEFAULT_SWEEP_INTERVAL})')
+    parser.add_argument('--sns-topic-arn', help='SNS topic for --watch-certs alerts (optional)')
     
     args = parser.parse_args()
     
@@ -306,7 +358,7 @@ def main():
     acm_client = boto3.client('acm', region_name=args.region)
     
     if args.scan:
-        results = scan_certificates(elb_client, acm_client, args.region, args.days)
+        results = scan_certificates(elb_client, acm_client, args.region, args.days, args.workers)
         report = generate_certificate_report(results)
         print(report)
         
@@ -322,6 +374,51 @@ def main():
         
         update_listener_certificate(elb_client, args.listener_arn, args.old_cert, args.new_cert)
     
+    elif args.rotate_all:
+        old_cert, new_cert = args.rotate_all
+        journal = args.journal or f"cert_rotation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        stats = FanOutStats()
+        try:
+            summary = rotate_certificate_everywhere(
+                elb_client, get_all_load_balancers(elb_client), old_cert, new_cert, journal,
+                args.workers, args.batch_size, args.dry_run, args.rollback_on_failure, stats
+            )
+        except RuntimeError as e:
+            print(f"Error: {str(e)}; no listeners were changed")
+            sys.exit(1)
+        print(f"Rotation: {summary['applied']}/{summary['planned']} listener(s) rotated, "
+              f"{summary['failed']} failed, {summary['rolled_back']} rolled back ({stats.summary()})")
+        if summary['failed'] and not args.rollback_on_failure:
+            print(f"To roll back: python alb_ssl_certificate_manager.py --region {args.region} --rollback {journal}")
+    
+    elif args.watch_certs:
+        sns_client = boto3.client('sns', region_name=args.region) if args.sns_topic_arn else None
+        
+        def notify(alert):
+            message = format_expiry_alert(alert)
+            print(message)
+            if sns_client:
+                try:
+                    sns_client.publish(TopicArn=args.sns_topic_arn, Message=message,
+                                       Subject=f"ALB certificate expiry - {alert['domain_name']}"[:100])
+                except Exception as e:
+                    print(f"Error sending SNS notification: {str(e)}")
+        
+        thresholds = [int(t) for t in args.thresholds.split(',') if t.strip()]
+        # IAM is global; it's only used for IAM server certificates on listeners
+        watcher = CertificateWatcher(elb_client, acm_client, thresholds, args.workers, notify,
+                                     iam_client=boto3.client('iam'))
+        try:
+            watcher.run(lambda: get_all_load_balancers(elb_client), args.sweep_interval)
+        except KeyboardInterrupt:
+            print("\nCertificate watch stopped.")
+    
+    elif args.rollback:
+        stats = FanOutStats()
+        summary = rollback_rotation(elb_client, args.rollback, args.workers, stats)
+        print(f"Rollback: {summary['rolled_back']} listener(s) restored, {summary['failed']} failed "
+              f"({stats.summary()})")
+    
     else:
         parser.print_help()
 
@@ -11,6 +11,9 @@ Use Cases:
 - Maintenance windows
 - Auto-scaling integration
 - Traffic shifting between environments
+- Bulk registration from CSV/JSONL files across many target groups (see alb_bulk_targets)
+- Drain waits across many target groups with adaptive polling (see alb_drain_coordinator)
+- Metric-gated weighted traffic shifts with automatic rollback (see alb_traffic_shift)
 """
 
 import boto3
@@ -18,6 +21,13 @@ import argparse
 import sys
 import time
 from typing import List, Dict, Optional
+from alb_fanout import FanOutStats, ELBV2_MODIFY_LIMITER, ELBV2_MODIFY_RATE
+from alb_bulk_targets import (load_target_file, resolve_target_group_arns, bulk_update_targets,
+                              summarize_chunk_results, DEFAULT_CHUNK_SIZE)
+from alb_drain_coordinator import wait_for_drains, DEFAULT_DRAIN_TIMEOUT
+from alb_traffic_shift import (shift_traffic, DEFAULT_STEPS, DEFAULT_BAKE_TIME, DEFAULT_CHECK_INTERVAL,
+                               DEFAULT_MAX_5XX_PERCENT, DEFAULT_MAX_P99_LATENCY,
+                               DEFAULT_MIN_HEALTHY_PERCENT, DEFAULT_MIN_REQUESTS)
 
 def get_target_group_by_name(elb_client, target_group_name: str) -> Optional[Dict]:
     """
@@ -100,39 +110,21 @@ def wait_for_targets_drained(elb_client, target_group_arn: str, targets: List[Di
     """
     Wait for targets to finish draining connections.
     
+    Polling adapts to the target group's deregistration delay (see
+    alb_drain_coordinator) and only queries the targets being drained.
+    
     Args:
         elb_client: Boto3 ELBv2 client
         target_group_arn: ARN of the target group
         targets: List of targets being drained
         timeout: Maximum time to wait in seconds
-        check_interval: Time between checks in seconds
+        check_interval: Unused; kept for compatibility
     """
-    start_time = time.time()
-    target_ids = [t['Id'] for t in targets]
-    
-    while time.time() - start_time < timeout:
-        try:
-            response = elb_client.describe_target_health(TargetGroupArn=target_group_arn)
-            
-            all_drained = True
-            for target_health in response['TargetHealthDescriptions']:
-                target_id = target_health['Target']['Id']
-                if target_id in target_ids:
-                    state = target_health['TargetHealth']['State']
-                    if state != 'draining' and state != 'unused':
-                        all_drained = False
-                        break
-            
-            if all_drained:
-                print("All targets have finished draining")
-                return
-            
-            time.sleep(check_interval)
-        except Exception as e:
-            print(f"Error checking drain status: {str(e)}")
-            return
-    
-    print(f"Timeout reached after {timeout} seconds. Some targets may still be draining.")
+    result = wait_for_drains(elb_client, [(target_group_arn, targets)], timeout)[target_group_arn]
+    if result['drained']:
+        print("All targets have finished draining")
+    else:
+        print(f"Timeout reached after {timeout} seconds. Some targets may still be draining.")
 
 def get_current_targets(elb_client, target_group_arn: str) -> List[Dict]:
     """
@@ -215,8 +207,8 @@ def main():
     parser = argparse.ArgumentParser(
         description='Manage ALB Target Groups - Register, deregister, and configure targets'
     )
-    parser.add_argument('--target-group', '-tg', required=True,
-                       help='Name of the target group')
+    parser.add_argument('--target-group', '-tg',
+                       help='Name of the target group (required except for bulk)')
     parser.add_argument('--region', '-r', default='us-east-1',
                        help='AWS region (default: us-east-1)')
     
@@ -245,6 +237,50 @@ def main():
     health_parser.add_argument('--healthy-threshold', type=int, help='Healthy threshold count')
     health_parser.add_argument('--unhealthy-threshold', type=int, help='Unhealthy threshold count')
     
+    # Bulk command
+    bulk_parser = subparsers.add_parser('bulk', help='Register or deregister targets from a CSV/JSONL file')
+    bulk_parser.add_argument('--file', '-f', required=True,
+                             help='CSV or JSONL file with target_group, id, port, availability_zone')
+    bulk_parser.add_argument('--action', choices=['register', 'deregister'], default='register',
+                             help='Operation to perform (default: register)')
+    bulk_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                             help=f'Targets per API call (default: {DEFAULT_CHUNK_SIZE})')
+    bulk_parser.add_argument('--workers', '-w', type=int, default=10,
+                             help='Target groups processed in parallel (default: 10)')
+    bulk_parser.add_argument('--rate', type=float, default=ELBV2_MODIFY_RATE,
+                             help=f'Max register/deregister calls per second across all target groups '
+                                  f'(default: {ELBV2_MODIFY_RATE})')
+    bulk_parser.add_argument('--drain', action='store_true',
+                             help='After a bulk deregister, wait for all targets to finish draining')
+    bulk_parser.add_argument('--drain-timeout', type=int, default=DEFAULT_DRAIN_TIMEOUT,
+                             help=f'Maximum seconds to wait for draining (default: {DEFAULT_DRAIN_TIMEOUT})')
+    
+    # Shift command
+    shift_parser = subparsers.add_parser('shift',
+                                         help='Shift listener traffic from --target-group to another target group')
+    shift_parser.add_argument('--to', required=True,
+                              help='Name of the target group to shift traffic to')
+    shift_parser.add_argument('--listener-arn', required=True,
+                              help='ARN of the listener whose forward action is shifted')
+    shift_parser.add_argument('--rule-arn',
+                              help='ARN of a listener rule to shift instead of the default action')
+    shift_parser.add_argument('--steps', default=','.join(str(s) for s in DEFAULT_STEPS),
+                              help=f'Comma-separated weights for the new target group '
+                                   f'(default: {",".join(str(s) for s in DEFAULT_STEPS)})')
+    shift_parser.add_argument('--bake-time', type=int, default=DEFAULT_BAKE_TIME,
+                              help=f'Seconds to watch each step (default: {DEFAULT_BAKE_TIME})')
+    shift_parser.add_argument('--check-interval', type=int, default=DEFAULT_CHECK_INTERVAL,
+                              help=f'Seconds between gate checks (default: {DEFAULT_CHECK_INTERVAL})')
+    shift_parser.add_argument('--max-5xx-percent', type=float, default=DEFAULT_MAX_5XX_PERCENT,
+                              help=f'Maximum target 5xx rate in percent (default: {DEFAULT_MAX_5XX_PERCENT})')
+    shift_parser.add_argument('--max-latency', type=float, default=DEFAULT_MAX_P99_LATENCY,
+                              help=f'Maximum p99 target response time in seconds '
+                                   f'(default: {DEFAULT_MAX_P99_LATENCY})')
+    shift_parser.add_argument('--min-healthy-percent', type=float, default=DEFAULT_MIN_HEALTHY_PERCENT,
+                              help=f'Minimum healthy targets in percent (default: {DEFAULT_MIN_HEALTHY_PERCENT:.0f})')
+    shift_parser.add_argument('--min-requests', type=int, default=DEFAULT_MIN_REQUESTS,
+                              help=f'Requests needed before the 5xx rate is gated on (default: {DEFAULT_MIN_REQUESTS})')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -254,6 +290,45 @@ def main():
     # Initialize ELB client
     elb_client = boto3.client('elbv2', region_name=args.region)
     
+    if args.command == 'bulk':
+        try:
+            targets_by_group = load_target_file(args.file, args.target_group)
+        except (OSError, ValueError) as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
+        arns = resolve_target_group_arns(elb_client, list(targets_by_group))
+        missing = [name for name in targets_by_group if name not in arns]
+        if missing:
+            print(f"Skipping {len(missing)} unknown target group(s): {', '.join(missing)}")
+        targets_by_arn = {}
+        for name, targets in targets_by_group.items():
+            if name in arns:
+                targets_by_arn.setdefault(arns[name], []).extend(targets)
+        
+        ELBV2_MODIFY_LIMITER.configure(args.rate, burst=max(1, int(args.rate)))
+        print(f"Bulk {args.action}: {sum(len(t) for t in targets_by_arn.values())} target(s) "
+              f"across {len(targets_by_arn)} target group(s)")
+        stats = FanOutStats()
+        started = time.time()
+        results = bulk_update_targets(elb_client, targets_by_arn, args.action, args.chunk_size,
+                                      args.workers, stats)
+        print(summarize_chunk_results(results))
+        print(f"API: {stats.summary()}")
+        
+        drained = True
+        if args.drain and args.action == 'deregister':
+            print("Waiting for connections to drain...")
+            drains = wait_for_drains(elb_client, list(targets_by_arn.items()), args.drain_timeout, started)
+            drained = all(d['drained'] for d in drains.values())
+        
+        if missing or not drained or any(r['error'] for r in results):
+            sys.exit(1)
+        return
+    
+    if not args.target_group:
+        print("Error: --target-group is required")
+        sys.exit(1)
+    
     # Find target group
     tg = get_target_group_by_name(elb_client, args.target_group)
     if not tg:
@@ -297,6 +372,38 @@ def main():
             health_params['UnhealthyThresholdCount'] = args.unhealthy_threshold
         
         update_health_check(elb_client, tg_arn, **health_params)
+    
+    elif args.command == 'shift':
+        to_tg = get_target_group_by_name(elb_client, args.to)
+        if not to_tg:
+            print(f"Target group '{args.to}' not found")
+            sys.exit(1)
+        try:
+            steps = [int(s) for s in args.steps.split(',') if s.strip()]
+        except ValueError:
+            steps = []
+        if (not steps or not all(a < b for a, b in zip(steps, steps[1:]))
+                or steps[0] < 1 or steps[-1] > 100):
+            print("Error: --steps must be increasing weights between 1 and 100")
+            sys.exit(1)
+        
+        cloudwatch_client = boto3.client('cloudwatch', region_name=args.region)
+        print(f"Shifting traffic to {args.to} in steps {steps}")
+        try:
+            result = shift_traffic(elb_client, cloudwatch_client, args.listener_arn, tg_arn,
+                                   to_tg['TargetGroupArn'], steps, args.rule_arn, args.bake_time,
+                                   args.check_interval, args.max_5xx_percent, args.max_latency,
+                                   args.min_healthy_percent, args.min_requests)
+        except Exception as e:
+            print(f"Error shifting traffic: {str(e)}")
+            sys.exit(1)
+        
+        if result['completed']:
+            print(f"Shift complete: {args.to} receives {result['weight']}% of traffic")
+        else:
+            state = 'rolled back' if result['rolled_back'] else 'NOT rolled back'
+            print(f"Shift stopped at {result['weight']}% and {state}")
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
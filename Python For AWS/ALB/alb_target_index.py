@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+ALB Target Group Index
+
+Builds a region-wide, in-memory index of load balancer ARN -> target groups ->
+target health summary. One paginated describe_target_groups sweep plus concurrent
+describe_target_health lookups replace the per-ALB describe_target_groups and
+per-target-group describe_target_health calls made by the ALB scripts.
+
+Use Cases:
+- Fleet-wide ALB analysis without N+1 API calls per load balancer
+- Shared target group / health lookups for the ALB tooling
+"""
+
+import boto3
+import argparse
+from typing import List, Dict, Optional
+from alb_fanout import FanOutStats, describe_target_health_many
+
+def summarize_target_health(target_health_descriptions: List[Dict]) -> Dict:
+    """
+    Summarize target health descriptions into counts.
+    
+    Args:
+        target_health_descriptions: TargetHealthDescriptions from describe_target_health
+        
+    Returns:
+        Dictionary with health summary statistics
+    """
+    healthy = sum(1 for t in target_health_descriptions if t['TargetHealth']['State'] == 'healthy')
+    unhealthy = sum(1 for t in target_health_descriptions if t['TargetHealth']['State'] == 'unhealthy')
+    total = len(target_health_descriptions)
+    
+    return {
+        'total': total,
+        'healthy': healthy,
+        'unhealthy': unhealthy,
+        'has_targets': total > 0,
+        'all_healthy': healthy > 0 and unhealthy == 0
+    }
+
+class TargetGroupIndex:
+    """
+    Load balancer ARN -> target groups -> health summary lookups.
+    
+    A target group attached to several load balancers appears under each of them.
+    """
+    
+    def __init__(self, target_groups: List[Dict], health: Dict[str, Dict]):
+        self.target_groups = {tg['TargetGroupArn']: tg for tg in target_groups}
+        self.health = health
+        self.by_load_balancer = {}
+        for tg in target_groups:
+            for lb_arn in tg.get('LoadBalancerArns', []):
+                self.by_load_balancer.setdefault(lb_arn, []).append(tg['TargetGroupArn'])
+    
+    def target_groups_for(self, load_balancer_arn: str) -> List[Dict]:
+        """
+        Get target groups attached to a load balancer.
+        
+        Args:
+            load_balancer_arn: ARN of the load balancer
+            
+        Returns:
+            List of target group dictionaries
+        """
+        return [self.target_groups[arn] for arn in self.by_load_balancer.get(load_balancer_arn, [])]
+    
+    def health_for(self, target_group_arn: str) -> Dict:
+        """
+        Get the health summary for a target group.
+        
+        Args:
+            target_group_arn: ARN of the target group
+            
+        Returns:
+            Health summary dictionary (empty summary if not indexed)
+        """
+        return self.health.get(target_group_arn, summarize_target_health([]))
+
+def get_all_target_groups(elb_client) -> List[Dict]:
+    """
+    Retrieve every target group in the region with a single paginated sweep.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        
+    Returns:
+        List of target group dictionaries
+    """
+    target_groups = []
+    paginator = elb_client.get_paginator('describe_target_groups')
+    
+    try:
+        for page in paginator.paginate():
+            target_groups.extend(page['TargetGroups'])
+    except Exception as e:
+        print(f"Error retrieving target groups: {str(e)}")
+        raise
+    
+    return target_groups
+
+def build_target_index(elb_client, workers: int = 10,
+                       stats: Optional[FanOutStats] = None) -> TargetGroupIndex:
+    """
+    Build the region-wide target group index.
+    
+    Health is only looked up for target groups attached to a load balancer,
+    since unattached groups never appear in an ALB lookup. Lookups go through
+    the shared rate-limited fan-out (see alb_fanout).
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        workers: Number of concurrent describe_target_health calls
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        TargetGroupIndex instance
+    """
+    target_groups = get_all_target_groups(elb_client)
+    attached = [tg['TargetGroupArn'] for tg in target_groups if tg.get('LoadBalancerArns')]
+    
+    descriptions = describe_target_health_many(elb_client, attached, workers, stats=stats)
+    health = {arn: summarize_target_health(targets or []) for arn, targets in descriptions.items()}
+    
+    return TargetGroupIndex(target_groups, health)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build a region-wide ALB target group and target health index'
+    )
+    parser.add_argument('--region', '-r', default='us-east-1',
+                       help='AWS region (default: us-east-1)')
+    parser.add_argument('--workers', '-w', type=int, default=10,
+                       help='Concurrent describe_target_health calls (default: 10)')
+    
+    args = parser.parse_args()
+    
+    elb_client = boto3.client('elbv2', region_name=args.region)
+    
+    stats = FanOutStats()
+    index = build_target_index(elb_client, args.workers, stats)
+    print(f"Health lookups: {stats.summary()}")
+    print(f"Indexed {len(index.target_groups)} target group(s) "
+          f"across {len(index.by_load_balancer)} load balancer(s)")
+    
+    for lb_arn, tg_arns in sorted(index.by_load_balancer.items()):
+        print(f"{lb_arn}")
+        for tg_arn in tg_arns:
+            health = index.health_for(tg_arn)
+            print(f"  {index.target_groups[tg_arn]['TargetGroupName']}: "
+                  f"{health['healthy']}/{health['total']} healthy")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+ALB Traffic Shift
+
+Metric-gated weighted cutover between two target groups behind a listener.
+The listener's forward action (default action, or a listener rule) is rewritten
+into a weighted ForwardConfig, and the weight of the new target group is raised
+in steps. After each step the new target group is watched for a bake period:
+live target health is checked, along with its 5xx rate and p99 response time
+from CloudWatch. Metrics that can't be read count as a breach, so the ramp never
+continues without a signal. A breach, an error, or an interrupt restores the
+listener's original actions.
+
+Use Cases:
+- Blue-green cutovers without manual minutes-per-step
+- Canary releases with automatic rollback
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+from alb_fanout import FanOutStats, call_with_backoff, ELBV2_DESCRIBE_LIMITER, ELBV2_MODIFY_LIMITER
+from alb_metric_data import get_metric_data_batched
+
+DEFAULT_STEPS = (10, 25, 50, 100)
+DEFAULT_BAKE_TIME = 300  # Seconds each step is watched before the next one
+DEFAULT_CHECK_INTERVAL = 60
+DEFAULT_MAX_5XX_PERCENT = 1.0
+DEFAULT_MAX_P99_LATENCY = 1.0  # Seconds
+DEFAULT_MIN_HEALTHY_PERCENT = 100.0
+DEFAULT_MIN_REQUESTS = 50  # Below this, the 5xx rate is too noisy to gate on
+
+def get_load_balancer_dimension_from_arn(arn: str) -> str:
+    """
+    Get the CloudWatch LoadBalancer dimension (app/<name>/<id>) from a listener or rule ARN.
+    """
+    resource = arn.split(':', 5)[5]
+    return '/'.join(resource.split('/')[1:4])
+
+def get_target_group_dimension(target_group_arn: str) -> str:
+    """
+    Get the CloudWatch TargetGroup dimension (targetgroup/<name>/<id>) from a target group ARN.
+    """
+    return target_group_arn.split(':')[-1]
+
+def get_actions(elb_client, listener_arn: str, rule_arn: Optional[str] = None,
+                stats: Optional[FanOutStats] = None) -> List[Dict]:
+    """
+    Get the actions of a listener rule, or the listener's default actions.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        listener_arn: ARN of the listener
+        rule_arn: ARN of a listener rule (optional)
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        List of action dictionaries
+    """
+    if rule_arn:
+        response = call_with_backoff(lambda arn: elb_client.describe_rules(RuleArns=[arn]),
+                                     rule_arn, ELBV2_DESCRIBE_LIMITER, stats)
+        return response['Rules'][0]['Actions']
+    response = call_with_backoff(lambda arn: elb_client.describe_listeners(ListenerArns=[arn]),
+                                 listener_arn, ELBV2_DESCRIBE_LIMITER, stats)
+    return response['Listeners'][0]['DefaultActions']
+
+def set_actions(elb_client, listener_arn: str, actions: List[Dict], rule_arn: Optional[str] = None,
+                stats: Optional[FanOutStats] = None):
+    """
+    Replace the actions of a listener rule, or the listener's default actions.
+    """
+    if rule_arn:
+        call_with_backoff(lambda a: elb_client.modify_rule(RuleArn=rule_arn, Actions=a),
+                          actions, ELBV2_MODIFY_LIMITER, stats)
+    else:
+        call_with_backoff(lambda a: elb_client.modify_listener(ListenerArn=listener_arn, DefaultActions=a),
+                          actions, ELBV2_MODIFY_LIMITER, stats)
+
+def _forward_target_groups(action: Dict) -> List[Dict]:
+    """
+    Get the weighted target groups of a forward action.
+    """
+    if action.get('ForwardConfig', {}).get('TargetGroups'):
+        return action['ForwardConfig']['TargetGroups']
+    if action.get('TargetGroupArn'):
+        return [{'TargetGroupArn': action['TargetGroupArn'], 'Weight': 1}]
+    return []
+
+def weighted_actions(actions: List[Dict], from_arn: str, to_arn: str, to_weight: int) -> List[Dict]:
+    """
+    Rewrite the forward action that targets either target group with new weights.
+    
+    The two target groups get weights 100 - to_weight and to_weight; other target
+    groups in the forward action keep their weights, and stickiness is preserved.
+    
+    Args:
+        actions: Current actions
+        from_arn: ARN of the target group traffic moves away from
+        to_arn: ARN of the target group traffic moves to
+        to_weight: Weight (0-100) of the target group traffic moves to
+        
+    Returns:
+        New list of action dictionaries
+        
+    Raises:
+        ValueError: If no forward action targets either target group
+    """
+    new_actions = []
+    found = False
+    for action in actions:
+        target_groups = _forward_target_groups(action) if action['Type'] == 'forward' else []
+        arns = {tg['TargetGroupArn'] for tg in target_groups}
+        if found or not arns & {from_arn, to_arn}:
+            new_actions.append(action)
+            continue
+        found = True
+        weights = [{'TargetGroupArn': from_arn, 'Weight': 100 - to_weight},
+                   {'TargetGroupArn': to_arn, 'Weight': to_weight}]
+        weights += [tg for tg in target_groups if tg['TargetGroupArn'] not in (from_arn, to_arn)]
+        forward_config = {'TargetGroups': weights}
+        stickiness = action.get('ForwardConfig', {}).get('TargetGroupStickinessConfig')
+        if stickiness:
+            forward_config['TargetGroupStickinessConfig'] = stickiness
+        new_action = {'Type': 'forward', 'ForwardConfig': forward_config}
+        if 'Order' in action:
+            new_action['Order'] = action['Order']
+        new_actions.append(new_action)
+    
+    if not found:
+        raise ValueError("No forward action targets either target group")
+    return new_actions
+
+def check_target_health(elb_client, target_group_arn: str,
+                        min_healthy_percent: float = DEFAULT_MIN_HEALTHY_PERCENT,
+                        stats: Optional[FanOutStats] = None) -> Optional[str]:
+    """
+    Check that enough of a target group's targets are healthy.
+    
+    Draining targets are not counted.
+    
+    Returns:
+        Breach description, or None if the target group is healthy enough
+    """
+    response = call_with_backoff(lambda arn: elb_client.describe_target_health(TargetGroupArn=arn),
+                                 target_group_arn, ELBV2_DESCRIBE_LIMITER, stats)
+    states = [d['TargetHealth']['State'] for d in response['TargetHealthDescriptions']
+              if d['TargetHealth']['State'] != 'draining']
+    if not states:
+        return "no registered targets"
+    healthy_percent = states.count('healthy') * 100.0 / len(states)
+    if healthy_percent < min_healthy_percent:
+        return (f"{states.count('healthy')}/{len(states)} targets healthy "
+                f"({healthy_percent:.0f}% < {min_healthy_percent:.0f}%)")
+    return None
+
+def get_gate_metrics(cloudwatch_client, load_balancer_dimension: str, target_group_dimension: str,
+                     start_time: datetime, end_time: datetime) -> Dict:
+    """
+    Get a target group's request count, target 5xx count and p99 response time.
+    
+    Args:
+        cloudwatch_client: Boto3 CloudWatch client
+        load_balancer_dimension: LoadBalancer dimension value (app/<name>/<id>)
+        target_group_dimension: TargetGroup dimension value (targetgroup/<name>/<id>)
+        start_time: Start of the metric window
+        end_time: End of the metric window
+        
+    Returns:
+        Dictionary with requests, errors, p99_latency (None without datapoints) and
+        incomplete (metric names whose data CloudWatch didn't return in full)
+        
+    Raises:
+        Exception: If the metric data can't be read (errors aren't swallowed, so
+        the caller can't mistake them for a quiet target group)
+    """
+    dimensions = [{'Name': 'LoadBalancer', 'Value': load_balancer_dimension},
+                  {'Name': 'TargetGroup', 'Value': target_group_dimension}]
+    queries = [
+        {'Id': query_id, 'ReturnData': True,
+         'MetricStat': {'Metric': {'Namespace': 'AWS/ApplicationELB', 'MetricName': metric_name,
+                                   'Dimensions': dimensions},
+                        'Period': 60, 'Stat': stat}}
+        for query_id, metric_name, stat in (('requests', 'RequestCount', 'Sum'),
+                                            ('errors', 'HTTPCode_Target_5XX_Count', 'Sum'),
+                                            ('latency', 'TargetResponseTime', 'p99'))
+    ]
+    statuses = {}
+    datapoints = get_metric_data_batched(cloudwatch_client, queries, start_time, end_time,
+                                         statuses=statuses, raise_errors=True)
+    latencies = [value for _, value in datapoints.get('latency', [])]
+    return {
+        'requests': sum(value for _, value in datapoints.get('requests', [])),
+        'errors': sum(value for _, value in datapoints.get('errors', [])),
+        # Worst minute, so a short latency spike isn't averaged away
+        'p99_latency': max(latencies) if latencies else None,
+        'incomplete': [query['MetricStat']['Metric']['MetricName'] for query in queries
+                       if statuses.get(query['Id']) != 'Complete']
+    }
+
+def evaluate_metric_gates(metrics: Dict, max_5xx_percent: float = DEFAULT_MAX_5XX_PERCENT,
+                          max_p99_latency: float = DEFAULT_MAX_P99_LATENCY,
+                          min_requests: int = DEFAULT_MIN_REQUESTS) -> List[str]:
+    """
+    Compare gate metrics against their thresholds.
+    
+    Incomplete metric data is a breach: without it the gates can't be evaluated.
+    
+    Returns:
+        List of breach descriptions (empty if every gate passed)
+    """
+    breaches = []
+    if metrics.get('incomplete'):
+        breaches.append(f"incomplete metric data for {', '.join(metrics['incomplete'])}")
+    if metrics['requests'] >= min_requests:
+        error_percent = metrics['errors'] * 100.0 / metrics['requests']
+        if error_percent > max_5xx_percent:
+            breaches.append(f"5xx rate {error_percent:.2f}% > {max_5xx_percent:.2f}% "
+                            f"({metrics['errors']:.0f}/{metrics['requests']:.0f} requests)")
+    if metrics['p99_latency'] is not None and metrics['p99_latency'] > max_p99_latency:
+        breaches.append(f"p99 response time {metrics['p99_latency'] * 1000:.0f}ms > "
+                        f"{max_p99_latency * 1000:.0f}ms")
+    return breaches
+
+def shift_traffic(elb_client, cloudwatch_client, listener_arn: str, from_arn: str, to_arn: str,
+                  steps=DEFAULT_STEPS, rule_arn: Optional[str] = None,
+                  bake_time: int = DEFAULT_BAKE_TIME, check_interval: int = DEFAULT_CHECK_INTERVAL,
+                  max_5xx_percent: float = DEFAULT_MAX_5XX_PERCENT,
+                  max_p99_latency: float = DEFAULT_MAX_P99_LATENCY,
+                  min_healthy_percent: float = DEFAULT_MIN_HEALTHY_PERCENT,
+                  min_requests: int = DEFAULT_MIN_REQUESTS,
+                  stats: Optional[FanOutStats] = None) -> Dict:
+    """
+    Shift traffic between two target groups in weighted steps, gated on health and metrics.
+    
+    Before the first step the new target group must pass the health gate. Each
+    step is then watched for bake_time seconds, with the gates checked every
+    check_interval seconds. On a breach the original actions are restored.
+    
+    Args:
+        elb_client: Boto3 ELBv2 client
+        cloudwatch_client: Boto3 CloudWatch client
+        listener_arn: ARN of the listener
+        from_arn: ARN of the target group traffic moves away from
+        to_arn: ARN of the target group traffic moves to
+        steps: Increasing weights (1-100) of the new target group
+        rule_arn: ARN of a listener rule to shift instead of the default action (optional)
+        bake_time: Seconds each step is watched
+        check_interval: Seconds between gate checks during a step
+        max_5xx_percent: Maximum target 5xx rate of the new target group
+        max_p99_latency: Maximum p99 target response time in seconds
+        min_healthy_percent: Minimum percentage of healthy targets in the new target group
+        min_requests: Minimum requests in the window before the 5xx rate is gated on
+        stats: FanOutStats to record API calls into (optional)
+        
+    Returns:
+        Dictionary with completed, weight (last weight applied), breaches and rolled_back
+    """
+    original_actions = get_actions(elb_client, listener_arn, rule_arn, stats)
+    # Validate the actions before anything is changed
+    weighted_actions(original_actions, from_arn, to_arn, 0)
+    lb_dimension = get_load_balancer_dimension_from_arn(rule_arn or listener_arn)
+    tg_dimension = get_target_group_dimension(to_arn)
+    result = {'completed': False, 'weight': 0, 'breaches': [], 'rolled_back': False}
+    
+    breach = check_target_health(elb_client, to_arn, min_healthy_percent, stats)
+    if breach:
+        result['breaches'].append(f"before first step: {breach}")
+        print(f"Not shifting: {breach}")
+        return result
+    
+    try:
+        for weight in steps:
+            set_actions(elb_client, listener_arn,
+                        weighted_actions(original_actions, from_arn, to_arn, weight), rule_arn, stats)
+            result['weight'] = weight
+            step_start = datetime.utcnow()
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Shifted to {100 - weight}/{weight}, "
+                  f"baking for {bake_time}s")
+            
+            deadline = time.time() + bake_time
+            while True:
+                time.sleep(max(0.0, min(check_interval, deadline - time.time())))
+                breaches = []
+                health_breach = check_target_health(elb_client, to_arn, min_healthy_percent, stats)
+                if health_breach:
+                    breaches.append(f"health: {health_breach}")
+                # Start a minute early so the first partial period is included
+                try:
+                    metrics = get_gate_metrics(cloudwatch_client, lb_dimension, tg_dimension,
+                                               step_start - timedelta(minutes=1), datetime.utcnow())
+                    breaches += evaluate_metric_gates(metrics, max_5xx_percent, max_p99_latency, min_requests)
+                except Exception as e:
+                    breaches.append(f"metrics unavailable: {str(e)}")
+                if breaches:
+                    result['breaches'] = [f"at weight {weight}: {b}" for b in breaches]
+                    break
+                latency = metrics['p99_latency']
+                print(f"  {metrics['requests']:.0f} requests, {metrics['errors']:.0f} 5xx, p99 "
+                      f"{'N/A' if latency is None else f'{latency * 1000:.0f}ms'}: gates passed")
+                if time.time() >= deadline:
+                    break
+            if result['breaches']:
+                break
+        else:
+            result['completed'] = True
+    except (Exception, KeyboardInterrupt) as e:
+        result['breaches'].append(f"at weight {result['weight']}: interrupted: {str(e) or type(e).__name__}")
+    
+    if not result['completed']:
+        for breach in result['breaches']:
+            print(f"Gate breached {breach}")
+        print("Rolling back to the original listener actions...")
+        try:
+            set_actions(elb_client, listener_arn, original_actions, rule_arn, stats)
+            result['rolled_back'] = True
+        except Exception as e:
+            print(f"Error rolling back: {str(e)}")
+    return result
@@ -1,34 +1,271 @@
-import boto3
-from datetime import datetime
+#!/usr/bin/env python3
+"""
+Fetch Load Balancer Logs
+
+Downloads ALB access logs from S3 for a time window. Only the day partitions
+covering the window are listed (see alb_log_locator), and keys are filtered on
+their timestamp before download. Objects are downloaded concurrently, and files
+completed by an earlier run are skipped (see alb_log_downloader). With
+--parse-to, objects are instead streamed and parsed into JSON Lines records
+without being written locally (see alb_log_parser). With --store, parsed
+fields are cached in a local columnar store and the standard incident queries
+are run against it; objects already in the store aren't fetched again
+(see alb_log_store). Objects are decompressed and parsed across --processes
+worker processes (see alb_log_pipeline). With --index, object keys are kept
+in a local sorted index that later runs update incrementally instead of listing
+partitions in full (see alb_log_index). With --follow, new log objects are
+parsed as they land, from S3 notifications on an SQS queue (--queue-url) or by
+polling, into --store (reporting on a trailing window after each batch) or
+--parse-to (see alb_log_follower). Credentials come from the default AWS
+credential chain (environment, profile or instance role).
 
-# AWS credentials and region
-aws_access_key_id = 'your_access_key_id'
-aws_secret_access_key = 'your_secret_access_key'
-region_name = 'us-east-2'
+Use Cases:
+- Pulling the logs of an incident window for troubleshooting
+- Collecting logs for traffic pattern analysis
+- Following live logs during an incident
+"""
 
-# S3 bucket and prefix
-bucket_name = 'account#-us-east-1-elb-logs'
-prefix = 'enterS3filepath'
+import boto3
+import argparse
+import json
+import os
+import sys
+from botocore.config import Config
+from datetime import datetime, timedelta
+from alb_fanout import FanOutStats
+from alb_log_locator import locate_log_objects, LOG_INTERVAL
+from alb_log_downloader import download_log_objects
+from alb_log_parser import iter_s3_log_records
+from alb_log_index import LogKeyIndex
+from alb_log_follower import SqsLogSource, PollingLogSource, follow_log_objects
 
-# Timeframe for logs (in UTC)
-start_time = datetime(2024, 2, 27, 15, 0, 0)  # 3pm UTC
-end_time = datetime(2024, 2, 27, 22, 0, 0)    # 5pm UTC
+def parse_time(value: str) -> datetime:
+    """
+    Parse a UTC time argument (YYYY-MM-DDTHH:MM[:SS] or 'YYYY-MM-DD HH:MM[:SS]').
+    """
+    try:
+        return datetime.fromisoformat(value.rstrip('Z'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time '{value}' (expected YYYY-MM-DDTHH:MM)")
 
-# Connect to S3
-s3 = boto3.client('s3',
-                  aws_access_key_id=aws_access_key_id,
-                  aws_secret_access_key=aws_secret_access_key,
-                  region_name=region_name)
+def follow(args, s3, account_id: str, index, log_store, log_pipeline):
+    """
+    Parse new log objects as they land into --store or --parse-to, until interrupted.
+    """
+    poll_source = PollingLogSource(s3, args.bucket, args.prefix, account_id, args.region,
+                                   args.start, args.load_balancer, args.workers, index)
+    queue_source = None
+    if args.queue_url:
+        sqs = boto3.client('sqs', region_name=args.region, endpoint_url=args.endpoint_url)
+        queue_source = SqsLogSource(sqs, args.queue_url, args.bucket, args.prefix, account_id, args.region,
+                                    args.start, args.load_balancer)
+        print(f"Following s3://{args.bucket} from {args.start} UTC via {args.queue_url} (Ctrl+C to stop)")
+    else:
+        print(f"Following s3://{args.bucket} from {args.start} UTC, polling every {args.poll_interval}s "
+              f"(Ctrl+C to stop)")
+    
+    store = log_store.LogStore(args.store) if log_store else None
+    out = open(args.parse_to, 'a') if args.parse_to else None
+    
+    def process(objects):
+        if store:
+            objects = [obj for obj in objects if not store.has_object(obj)]
+        if not objects:
+            return []
+        started = datetime.utcnow()
+        failed = []
+        if store:
+            pipeline_stats = log_pipeline.PipelineStats()
+            try:
+                rows = store.ingest_columns(log_pipeline.run_pipeline(
+                    args.bucket, objects, min(args.processes, len(objects)), args.region, args.endpoint_url,
+                    pipeline_stats))
+            except Exception as e:
+                print(f"Error writing to {args.store}: {str(e)}")
+                return [obj for obj in objects if not store.has_object(obj)]
+            failed = pipeline_stats.failed_objects
+        else:
+            rows = 0
+            for obj in objects:
+                # Written through a checkpoint, so a file that fails part way leaves no records behind
+                position = out.tell()
+                written = 0
+                try:
+                    for record in iter_s3_log_records(s3, args.bucket, obj['Key']):
+                        if record['time'] >= args.start:
+                            out.write(json.dumps(record, default=str) + "\n")
+                            written += 1
+                    out.flush()
+                except Exception as e:
+                    print(f"Error parsing {obj['Key']}: {str(e)}")
+                    out.seek(position)
+                    out.truncate()
+                    failed.append(obj)
+                    continue
+                rows += written
+        print(f"[{started:%H:%M:%S}] {len(objects) - len(failed)} new log file(s), {rows} record(s) "
+              f"in {(datetime.utcnow() - started).total_seconds():.1f}s"
+              + (f"; {len(failed)} failed, will retry" if failed else ""))
+        if store:
+            window_end = datetime.utcnow()
+            table = store.scan(window_end - timedelta(minutes=args.report_window), window_end,
+                               ['time', 'target_processing_time', 'elb_status_code',
+                                'target', 'path', 'client_ip'])
+            print(f"Last {args.report_window} minute(s): " + log_store.run_standard_queries(table, args.top))
+            print("")
+        return failed
+    
+    try:
+        follow_log_objects(process, poll_source, queue_source, args.poll_interval)
+    except KeyboardInterrupt:
+        print("Stopped following")
+    finally:
+        if out:
+            out.close()
 
-# List objects in the bucket with the given prefix
-response = s3.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
+def main():
+    parser = argparse.ArgumentParser(
+        description='Download ALB access logs from S3 for a time window'
+    )
+    parser.add_argument('--bucket', '-b', required=True,
+                       help='S3 bucket the load balancer writes access logs to')
+    parser.add_argument('--prefix', '-p', default='',
+                       help='Log prefix configured on the load balancer (default: none)')
+    parser.add_argument('--account-id',
+                       help='AWS account ID of the load balancer (default: caller account)')
+    parser.add_argument('--region', '-r', default='us-east-1',
+                       help='Region of the load balancer (default: us-east-1)')
+    parser.add_argument('--start', type=parse_time,
+                       help='Start of the window in UTC, e.g. 2024-02-27T15:00 (--follow default: now)')
+    parser.add_argument('--end', type=parse_time,
+                       help='End of the window in UTC, e.g. 2024-02-27T22:00 (not used with --follow)')
+    parser.add_argument('--load-balancer', '-lb',
+                       help='Only fetch logs of this load balancer (ARN or app.<name>.<id>)')
+    parser.add_argument('--output-dir', '-o', default='.',
+                       help='Directory to download logs into (default: current directory)')
+    parser.add_argument('--workers', '-w', type=int, default=10,
+                       help='Concurrent partition listings and downloads (default: 10)')
+    parser.add_argument('--index',
+                       help='Keep a sorted key index of the bucket in this file and update it incrementally')
+    parser.add_argument('--parse-to',
+                       help='Stream and parse the logs into this JSON Lines file instead of downloading them')
+    parser.add_argument('--store',
+                       help='Cache parsed logs in this columnar store directory and query it (requires numpy)')
+    parser.add_argument('--top', type=int, default=10,
+                       help='Rows shown per --store query (default: 10)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                       help='Worker processes parsing logs for --store (default: one per CPU)')
+    parser.add_argument('--follow', action='store_true',
+                       help='Keep parsing new log files into --store or --parse-to as they land')
+    parser.add_argument('--queue-url',
+                       help='SQS queue receiving the bucket\'s object-created notifications (--follow)')
+    parser.add_argument('--poll-interval', type=float, default=30,
+                       help='Seconds between partition listings when following without a queue (default: 30)')
+    parser.add_argument('--report-window', type=int, default=15,
+                       help='Minutes of logs reported after each --follow batch into --store (default: 15)')
+    parser.add_argument('--endpoint-url',
+                       help='Endpoint for the S3 and SQS clients, e.g. a local stand-in (http://localhost:4566)')
+    
+    args = parser.parse_args()
+    
+    if args.follow:
+        if args.end:
+            print("Error: --end can't be used with --follow")
+            sys.exit(1)
+        if not (args.store or args.parse_to):
+            print("Error: --follow requires --store or --parse-to")
+            sys.exit(1)
+        # Also pick up the log files of the interval in progress
+        args.start = args.start or datetime.utcnow() - LOG_INTERVAL
+    elif not (args.start and args.end):
+        print("Error: --start and --end are required")
+        sys.exit(1)
+    elif args.end <= args.start:
+        print("Error: --end must be after --start")
+        sys.exit(1)
+    
+    # The columnar store needs numpy, so check before doing any work
+    log_store = log_pipeline = None
+    if args.store:
+        try:
+            import alb_log_store as log_store
+            import alb_log_pipeline as log_pipeline
+        except ImportError:
+            print("Error: --store requires numpy (pip install numpy)")
+            sys.exit(1)
+    
+    # One client shared by all workers, with a connection per worker
+    s3 = boto3.client('s3', region_name=args.region, endpoint_url=args.endpoint_url,
+                      config=Config(max_pool_connections=max(10, args.workers)))
+    account_id = args.account_id or boto3.client('sts', region_name=args.region,
+                                                 endpoint_url=args.endpoint_url).get_caller_identity()['Account']
+    
+    index = None
+    if args.index:
+        try:
+            index = LogKeyIndex(args.index, args.bucket, args.prefix)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
+    
+    if args.follow:
+        follow(args, s3, account_id, index, log_store, log_pipeline)
+        return
+    
+    stats = FanOutStats()
+    objects = locate_log_objects(s3, args.bucket, args.prefix, account_id, args.region,
+                                 args.start, args.end, args.load_balancer, args.workers, stats, index)
+    print(f"Found {len(objects)} log file(s) ({sum(o['Size'] for o in objects) / 1024 / 1024:.1f} MB) "
+          f"between {args.start} and {args.end} UTC; listing: {stats.summary()}")
+    
+    if log_store:
+        store = log_store.LogStore(args.store)
+        to_ingest = [obj for obj in objects if not store.has_object(obj)]
+        print(f"{len(objects) - len(to_ingest)} log file(s) already in {args.store}, "
+              f"parsing {len(to_ingest)}")
+        pipeline_stats = log_pipeline.PipelineStats()
+        rows = store.ingest_columns(log_pipeline.run_pipeline(args.bucket, to_ingest, args.processes,
+                                                              args.region, args.endpoint_url, pipeline_stats))
+        if to_ingest:
+            print(pipeline_stats.summary())
+        print(f"Ingested {rows} record(s)")
+        print("")
+        table = store.scan(args.start, args.end, ['time', 'target_processing_time', 'elb_status_code',
+                                                  'target', 'path', 'client_ip'])
+        print(log_store.run_standard_queries(table, args.top))
+        return
+    
+    if args.parse_to:
+        counts = {}
+        written = failed = 0
+        with open(args.parse_to, 'w') as out:
+            for obj in objects:
+                # Drop the partial output of an object that fails part way through
+                position = out.tell()
+                object_written = 0
+                try:
+                    records = iter_s3_log_records(s3, args.bucket, obj['Key'], counts=counts)
+                    # Files at the edges of the window also hold entries just outside it
+                    for record in (r for r in records if args.start <= r['time'] <= args.end):
+                        out.write(json.dumps(record, default=str) + "\n")
+                        object_written += 1
+                except Exception as e:
+                    print(f"Error parsing {obj['Key']}: {str(e)}")
+                    out.seek(position)
+                    out.truncate()
+                    failed += 1
+                    continue
+                written += object_written
+        print(f"Wrote {written} record(s) to {args.parse_to} "
+              f"({counts.get('malformed', 0)} malformed line(s) skipped, {failed} log file(s) failed)")
+        if failed:
+            sys.exit(1)
+        return
+    
+    download_stats = download_log_objects(s3, args.bucket, objects, args.output_dir, args.workers)
+    print(download_stats.summary())
+    if download_stats.failed:
+        sys.exit(1)
 
-# Download logs within the specified timeframe
-for obj in response.get('Contents', []):
-    key = obj['Key']
-    timestamp_str = key.split('/')[-1].split('.')[1]  # Extract timestamp from key
-    timestamp = datetime.strptime(timestamp_str, '%Y%m%dT%H%M%S')
-    if start_time <= timestamp <= end_time:
-        filename = key.split('/')[-1]
-        s3.download_file(bucket_name, key, filename)
-        print(f"Downloaded: {filename}")
+if __name__ == "__main__":
+    main()